@@ -0,0 +1,16 @@
+# gunicorn.conf.py
+# gunicorn lo lee solo si se arranca desde este directorio (WORKDIR /app en el Dockerfile).
+#
+# preload_app: smartsales.wsgi (y con él los modelos ML, ver predictions/modelos.py)
+# se importa UNA vez en el master y los workers lo heredan copy-on-write, en vez
+# de que cada worker cargue su propia copia de los bosques.
+import gc
+import os
+
+preload_app = os.environ.get("GUNICORN_PRELOAD", "true").lower() in ("1", "true", "yes")
+
+
+def when_ready(server):
+    # Lo cargado hasta aquí sale del GC: recorrerlo en los workers escribiría
+    # en esas páginas y rompería el copy-on-write
+    gc.freeze()
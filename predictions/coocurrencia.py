@@ -0,0 +1,124 @@
+# predictions/coocurrencia.py
+# Recomendador ítem a ítem por co-ocurrencia en la misma venta (scipy.sparse).
+#
+# Alternativa al modelo 3 de train_models.py, que arma todos los pares
+# permutations(productos, 2) en un DataFrame: O(N²) filas. Aquí, en una sola
+# pasada por DetalleVenta(venta_id, producto_id), se arma la matriz dispersa
+# ventas x productos (B, binaria) y C = Bᵀ·B da cuántas ventas contienen cada
+# par; solo se guardan los pares que de verdad aparecieron juntos.
+#
+# Puntajes para el producto a y un vecino b (n = ventas, n_a = ventas con a):
+#   lift    = C_ab * n / (n_a * n_b)
+#   coseno  = C_ab / sqrt(n_a * n_b)
+#   jaccard = C_ab / (n_a + n_b - C_ab)
+#
+# Se serializa como CSR en un .npz comprimido (ml_models/coocurrencia.npz).
+# Una consulta es una fila de la CSR (unos cientos de vecinos) y operaciones
+# vectorizadas sobre ella: microsegundos, sin tocar la BD.
+
+import os
+from array import array
+
+import numpy as np
+from django.conf import settings
+from scipy import sparse
+
+METRICAS = ('lift', 'coseno', 'jaccard')
+
+
+def ruta_motor():
+    return os.path.join(settings.BASE_DIR, 'ml_models', 'coocurrencia.npz')
+
+
+class MotorCoocurrencia:
+
+    def __init__(self, ids, conteos, indptr, indices, datos, n_cestas):
+        self.ids = ids            # ids de producto ordenados (columna -> id)
+        self.conteos = conteos    # ventas que contienen cada producto
+        self.indptr = indptr      # CSR de C sin la diagonal
+        self.indices = indices
+        self.datos = datos
+        self.n_cestas = n_cestas
+
+    @classmethod
+    def construir(cls, pares):
+        """Desde un iterable de (venta_id, producto_id), en una sola pasada."""
+        ventas, productos = array('q'), array('q')
+        for venta_id, producto_id in pares:
+            ventas.append(venta_id)
+            productos.append(producto_id)
+        if not ventas:
+            vacio = np.zeros(0, dtype=np.int32)
+            return cls(np.zeros(0, dtype=np.int64), vacio, np.zeros(1, dtype=np.int32), vacio, vacio, 0)
+
+        _, filas = np.unique(np.frombuffer(ventas, dtype=np.int64), return_inverse=True)
+        ids, columnas = np.unique(np.frombuffer(productos, dtype=np.int64), return_inverse=True)
+        cestas = sparse.csr_matrix(
+            (np.ones(len(filas), dtype=np.int32), (filas, columnas)),
+            shape=(filas.max() + 1, len(ids)),
+        )
+        # El mismo producto en dos líneas de una venta cuenta una sola vez
+        cestas.data[:] = 1
+
+        coocurrencias = (cestas.T @ cestas).tocsr()
+        conteos = coocurrencias.diagonal().astype(np.int32)
+        coocurrencias.setdiag(0)
+        coocurrencias.eliminate_zeros()
+        coocurrencias.sort_indices()
+        return cls(
+            ids, conteos,
+            coocurrencias.indptr.astype(np.int32), coocurrencias.indices.astype(np.int32),
+            coocurrencias.data.astype(np.int32), int(cestas.shape[0]),
+        )
+
+    @classmethod
+    def construir_desde_bd(cls):
+        from ventas.models import DetalleVenta
+
+        pares = DetalleVenta.objects.order_by().values_list('venta_id', 'producto_id')
+        return cls.construir(pares.iterator(chunk_size=5000))
+
+    def guardar(self, ruta=None):
+        np.savez_compressed(
+            ruta or ruta_motor(),
+            ids=self.ids, conteos=self.conteos, indptr=self.indptr,
+            indices=self.indices, datos=self.datos, n_cestas=np.array([self.n_cestas]),
+        )
+
+    @classmethod
+    def cargar(cls, ruta=None):
+        with np.load(ruta or ruta_motor()) as archivo:
+            return cls(
+                archivo['ids'], archivo['conteos'], archivo['indptr'],
+                archivo['indices'], archivo['datos'], int(archivo['n_cestas'][0]),
+            )
+
+    def recomendar(self, producto_id, k=3, metrica='lift', min_soporte=1):
+        """[(producto_id, puntaje)] de los k vecinos con mayor puntaje ('metrica')."""
+        if metrica not in METRICAS:
+            raise ValueError(f"Métrica '{metrica}' no válida. Usa: {', '.join(METRICAS)}.")
+        posicion = np.searchsorted(self.ids, producto_id)
+        if posicion >= len(self.ids) or self.ids[posicion] != producto_id:
+            return []
+
+        inicio, fin = self.indptr[posicion], self.indptr[posicion + 1]
+        vecinos = self.indices[inicio:fin]
+        juntos = self.datos[inicio:fin].astype(np.float64)
+        if min_soporte > 1:
+            soporte = juntos >= min_soporte
+            vecinos, juntos = vecinos[soporte], juntos[soporte]
+        if not len(vecinos):
+            return []
+
+        n_a = float(self.conteos[posicion])
+        n_b = self.conteos[vecinos].astype(np.float64)
+        if metrica == 'lift':
+            puntajes = juntos * self.n_cestas / (n_a * n_b)
+        elif metrica == 'coseno':
+            puntajes = juntos / np.sqrt(n_a * n_b)
+        else:
+            puntajes = juntos / (n_a + n_b - juntos)
+
+        # Mayor puntaje primero; empates: más ventas juntas, luego menor id
+        orden = np.lexsort((self.ids[vecinos], -juntos, -puntajes))[:k]
+        return [(int(self.ids[vecinos[i]]), float(puntajes[i])) for i in orden]
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from predictions import modelos, recomendaciones
+
+
+class Command(BaseCommand):
+    help = (
+        "🧠 Precalcula el top-K de recomendaciones de cada producto (por empresa) con el "
+        "modelo de recomendación entrenado. Correr después de train_models.py."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--empresa', type=int, action='append', help='ID de la empresa (repetible; por defecto: todas).')
+        parser.add_argument('--k', type=int, help='Recomendaciones por producto (por defecto: PREDICCIONES_RECOMENDACIONES_K).')
+
+    def handle(self, *args, **options):
+        modelo = modelos.obtener('recommendation_model')
+        if modelo is None:
+            error = modelos.estado()['modelos']['recommendation_model'].get('error')
+            raise CommandError(f"No se pudo cargar el modelo de recomendación: {error}")
+
+        k = options['k'] or recomendaciones.k_tabla()
+        self.stdout.write(self.style.HTTP_INFO(f"⏳ Precalculando top-{k} de recomendaciones..."))
+        inicio = time.perf_counter()
+        creadas = recomendaciones.precalcular(modelo, options['empresa'], k)
+        for empresa_id, filas in creadas.items():
+            self.stdout.write(f"  empresa {empresa_id}: {filas} recomendaciones")
+        self.stdout.write(self.style.SUCCESS(
+            f"🎉 Recomendaciones precalculadas en {time.perf_counter() - inicio:.1f}s."
+        ))
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.5 on 2026-10-18 15:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('products', '0002_initial'),
+        ('tenants', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecomendacionProducto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('posicion', models.PositiveSmallIntegerField()),
+                ('probabilidad', models.FloatField()),
+                ('generado_en', models.DateTimeField()),
+                ('empresa', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='tenants.empresa')),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='products.producto')),
+                ('recomendado', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='products.producto')),
+            ],
+            options={
+                'db_table': 'recomendacion_producto',
+                'unique_together': {('producto', 'posicion')},
+            },
+        ),
+    ]
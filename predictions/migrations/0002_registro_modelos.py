@@ -0,0 +1,33 @@
+# Generated by Django 5.2.5 on 2026-10-18 15:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('predictions', '0001_recomendaciones_precalculadas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionModelo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=50)),
+                ('version', models.PositiveIntegerField()),
+                ('archivo', models.CharField(max_length=255)),
+                ('filas_entrenamiento', models.PositiveIntegerField(default=0)),
+                ('features', models.JSONField(default=list)),
+                ('metricas', models.JSONField(default=dict)),
+                ('creado_en', models.DateTimeField()),
+                ('fijada', models.BooleanField(default=False)),
+                ('actualizado_en', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'version_modelo',
+                'ordering': ['nombre', '-version'],
+                'unique_together': {('nombre', 'version')},
+            },
+        ),
+    ]
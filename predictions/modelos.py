@@ -0,0 +1,237 @@
+# predictions/modelos.py
+# Carga de los modelos ML: perezosa, segura entre hilos y compartible entre workers.
+#
+# PredictionsConfig.ready() solo cargaba los .pkl con 'runserver' en sys.argv,
+# así que con 'gunicorn smartsales.wsgi' todos los endpoints respondían
+# "Modelo ... no cargado". Ahora cada modelo se carga la primera vez que se
+# pide (obtener), con un lock por modelo para que dos hilos no lo carguen a la
+# vez, y queda en memoria del proceso.
+#
+# - mmap (PREDICCIONES_MODELOS_MMAP='r'): joblib.load(mmap_mode='r') mapea los
+#   arrays numpy del .pkl desde el archivo en vez de leerlos a un buffer. Los
+#   árboles de scikit-learn copian sus nodos al deserializarse, así que para
+#   los RandomForest baja sobre todo el pico de memoria y el tiempo de carga.
+# - --preload (gunicorn.conf.py): smartsales/wsgi.py llama precargar() al
+#   importarse, que con preload_app ocurre UNA vez en el master antes del
+#   fork; los workers heredan los bosques ya cargados copy-on-write en vez de
+#   cargar cada uno su copia.
+# - Versiones (predictions/registro.py): se carga la versión activa de cada
+#   modelo. Un hilo por worker revisa cada PREDICCIONES_MODELOS_INTERVALO
+#   segundos si cambió (entrenamiento nuevo, fijar, rollback), carga la nueva
+#   en segundo plano y la cambia con una sola asignación: las peticiones en
+#   curso terminan con la versión que ya tenían. Un modelo recargado así es
+#   memoria propia del worker (ya no la comparte con el master).
+#
+# estado() expone por proceso la versión, el tiempo de carga, el RSS
+# antes/después y la memoria compartida (GET /api/predict/modelos/).
+
+import logging
+import os
+import threading
+import time
+
+import joblib
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from . import registro
+
+logger = logging.getLogger(__name__)
+
+
+def _cargar_pkl(ruta):
+    return joblib.load(ruta, mmap_mode=getattr(settings, 'PREDICCIONES_MODELOS_MMAP', 'r') or None)
+
+
+def _guardar_pkl(objeto):
+    return lambda ruta: joblib.dump(objeto, ruta)
+
+
+def _cargar_coocurrencia(ruta):
+    from .coocurrencia import MotorCoocurrencia
+
+    return MotorCoocurrencia.cargar(ruta)
+
+
+# nombre -> (archivo en ml_models/ antes del registro, descripción, función de carga)
+MODELOS = {
+    'sales_category_model': ('sales_category_model.pkl', 'Ventas Categoría', _cargar_pkl),
+    'demand_product_model': ('demand_product_model.pkl', 'Demanda Producto', _cargar_pkl),
+    'recommendation_model': ('recommendation_model.pkl', 'Recomendación', _cargar_pkl),
+    'coocurrencia_engine': ('coocurrencia.npz', 'Co-ocurrencia', _cargar_coocurrencia),
+}
+
+_locks = {nombre: threading.Lock() for nombre in MODELOS}
+# nombre -> (version, objeto); se reemplaza la tupla entera (cambio atómico)
+_cargados = {}
+_estado = {}
+# (version, mtime) del artefacto que falló al cargar: no se reintenta hasta que cambie
+_fallidos = {}
+# Último intento sin éxito (monotonic): obtener() no consulta el registro en cada petición
+_intentos = {}
+_vigilante_pid = None
+_lock_vigilante = threading.Lock()
+
+
+def ruta(nombre):
+    """Archivo de antes del registro (ml_models/<archivo>), si no hay versiones."""
+    return os.path.join(settings.BASE_DIR, 'ml_models', MODELOS[nombre][0])
+
+
+def _intervalo():
+    return getattr(settings, 'PREDICCIONES_MODELOS_INTERVALO', 30)
+
+
+def memoria_mb():
+    """(rss, compartida) del proceso en MB, desde /proc/self/statm; (None, None) fuera de Linux."""
+    try:
+        with open('/proc/self/statm') as statm:
+            _, residente, compartida = statm.read().split()[:3]
+        pagina = os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+        return round(int(residente) * pagina, 1), round(int(compartida) * pagina, 1)
+    except (OSError, ValueError, AttributeError):
+        return None, None
+
+
+def guardar(nombre, objeto, filas=0, features=None, metricas=None):
+    """Registra 'objeto' como la versión nueva de 'nombre' (desde train_models.py)."""
+    extension = os.path.splitext(MODELOS[nombre][0])[1]
+    guardar_artefacto = objeto.guardar if nombre == 'coocurrencia_engine' else _guardar_pkl(objeto)
+    return registro.registrar(nombre, guardar_artefacto, extension, filas, features, metricas)
+
+
+def _artefacto(nombre, activas=None):
+    """(version, ruta) activos: los del registro o, sin versiones, el archivo de antes."""
+    version = activas.get(nombre) if activas is not None else registro.activa(nombre)
+    if version is None:
+        return None, ruta(nombre)
+    return version.version, registro.ruta(version)
+
+
+def _cargar(nombre, version, ruta_archivo):
+    archivo, descripcion, cargar = MODELOS[nombre]
+    try:
+        modificado = os.path.getmtime(ruta_archivo)
+    except OSError:
+        # Si había una versión cargada se sigue usando; se informa el error
+        _estado[nombre] = {**_estado.get(nombre, {}), 'error': f"v{version}: no existe (¿se corrió train_models.py?)."}
+        return None
+    if _fallidos.get(nombre) == (version, modificado):
+        return None
+
+    rss_antes, _ = memoria_mb()
+    inicio = time.perf_counter()
+    try:
+        objeto = cargar(ruta_archivo)
+    except Exception as e:
+        _fallidos[nombre] = (version, modificado)
+        _estado[nombre] = {**_estado.get(nombre, {}), 'error': f"v{version}: {e}"}
+        logger.warning("No se cargó el modelo %s v%s: %s", descripcion, version, e)
+        return None
+    segundos = time.perf_counter() - inicio
+    rss_despues, _ = memoria_mb()
+
+    _cargados[nombre] = (version, objeto)
+    _fallidos.pop(nombre, None)
+    _estado[nombre] = {
+        'version': version,
+        'archivo': os.path.relpath(ruta_archivo, os.path.join(settings.BASE_DIR, 'ml_models')),
+        'cargado_en': timezone.now().isoformat(),
+        'pid': os.getpid(),
+        'segundos': round(segundos, 4),
+        'rss_mb_antes': rss_antes,
+        'rss_mb_despues': rss_despues,
+    }
+    logger.info("Modelo %s v%s cargado en %.3fs (pid %s).", descripcion, version, segundos, os.getpid())
+    return objeto
+
+
+def _obtener(nombre):
+    cargado = _cargados.get(nombre)
+    if cargado is not None:
+        return cargado[1]
+    with _locks[nombre]:
+        # Otro hilo pudo cargarlo mientras se esperaba el lock
+        cargado = _cargados.get(nombre)
+        if cargado is not None:
+            return cargado[1]
+        intento = _intentos.get(nombre)
+        if intento is not None and time.monotonic() - intento < _intervalo():
+            return None
+        objeto = _cargar(nombre, *_artefacto(nombre))
+        if objeto is None:
+            _intentos[nombre] = time.monotonic()
+        return objeto
+
+
+def obtener(nombre):
+    """El modelo cargado (lo carga la primera vez), o None si no se pudo cargar."""
+    _asegurar_vigilante()
+    return _obtener(nombre)
+
+
+def precargar():
+    """Carga todos los modelos ahora (smartsales/wsgi.py, antes del fork con --preload)."""
+    return {nombre: _obtener(nombre) is not None for nombre in MODELOS}
+
+
+# --- RECARGA EN CALIENTE ---
+
+def sincronizar():
+    """
+    Carga la versión activa de los modelos ya cargados que cambiaron y la
+    pone en lugar de la anterior. Devuelve {nombre: version nueva}.
+    """
+    activas = registro.activas()
+    cambiados = {}
+    for nombre in MODELOS:
+        cargado = _cargados.get(nombre)
+        if cargado is None:
+            continue
+        version, ruta_archivo = _artefacto(nombre, activas)
+        if version is None or version == cargado[0]:
+            continue
+        with _locks[nombre]:
+            if _cargar(nombre, version, ruta_archivo) is not None:
+                cambiados[nombre] = version
+    return cambiados
+
+
+def _vigilar():
+    # Primero una revisión inmediata: un worker creado después del arranque
+    # hereda del master los modelos que había al precargar
+    while True:
+        try:
+            sincronizar()
+        except Exception:
+            logger.exception("Error revisando versiones de los modelos.")
+        finally:
+            connection.close()
+        time.sleep(_intervalo())
+
+
+def _asegurar_vigilante():
+    """Un hilo por proceso: los hilos no sobreviven al fork de los workers."""
+    global _vigilante_pid
+    if _vigilante_pid == os.getpid() or _intervalo() <= 0:
+        return
+    with _lock_vigilante:
+        if _vigilante_pid != os.getpid():
+            _vigilante_pid = os.getpid()
+            threading.Thread(target=_vigilar, name='modelos-vigilante', daemon=True).start()
+
+
+def estado():
+    _asegurar_vigilante()
+    rss, compartida = memoria_mb()
+    return {
+        'pid': os.getpid(),
+        'rss_mb': rss,
+        'compartida_mb': compartida,
+        'mmap': getattr(settings, 'PREDICCIONES_MODELOS_MMAP', 'r') or None,
+        'modelos': {
+            nombre: {'cargado': nombre in _cargados, **_estado.get(nombre, {})}
+            for nombre in MODELOS
+        },
+    }
@@ -1,3 +1,46 @@
 from django.db import models
 
-# Create your models here.
+
+class RecomendacionProducto(models.Model):
+    """
+    Top-K precalculado del modelo de recomendación (predictions/recomendaciones.py):
+    para cada producto, los K productos de su misma empresa con mayor probabilidad
+    de comprarse juntos. Lo llena 'precalcular_recomendaciones' después de entrenar.
+    """
+    empresa = models.ForeignKey('tenants.Empresa', on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    producto = models.ForeignKey('products.Producto', on_delete=models.CASCADE, related_name='+')
+    recomendado = models.ForeignKey('products.Producto', on_delete=models.CASCADE, related_name='+')
+    posicion = models.PositiveSmallIntegerField()  # 1 = la más probable
+    probabilidad = models.FloatField()
+    generado_en = models.DateTimeField()
+
+    class Meta:
+        db_table = "recomendacion_producto"
+        unique_together = ('producto', 'posicion')
+
+
+class VersionModelo(models.Model):
+    """
+    Registro de modelos entrenados (predictions/registro.py): cada corrida de
+    train_models.py guarda un artefacto nuevo (ml_models/<nombre>/v0001.pkl)
+    con sus metadatos. La versión activa de cada nombre es la fijada, si la
+    hay, o la más nueva; los workers la cargan en caliente (predictions/modelos.py).
+    """
+    nombre = models.CharField(max_length=50)  # ej. 'recommendation_model'
+    version = models.PositiveIntegerField()
+    archivo = models.CharField(max_length=255)  # relativo a ml_models/
+    filas_entrenamiento = models.PositiveIntegerField(default=0)
+    features = models.JSONField(default=list)
+    metricas = models.JSONField(default=dict)
+    creado_en = models.DateTimeField()
+    fijada = models.BooleanField(default=False)
+    # Última vez que esta versión pasó a ser (o dejó de ser) la activa
+    actualizado_en = models.DateTimeField()
+
+    class Meta:
+        db_table = "version_modelo"
+        unique_together = ('nombre', 'version')
+        ordering = ['nombre', '-version']
+
+    def __str__(self):
+        return f"{self.nombre} v{self.version}{' (fijada)' if self.fijada else ''}"
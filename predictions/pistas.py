@@ -0,0 +1,62 @@
+# predictions/pistas.py
+# "Pistas" (features) de los modelos de predicción, para uno o muchos ids.
+#
+# Las usan tanto las vistas de una predicción como las de lote: para N ids se
+# hace UNA consulta agrupada (GROUP BY id) y se arma UN DataFrame de N filas,
+# con las mismas columnas y en el mismo orden que en train_models.py, para
+# una sola llamada vectorizada a model.predict.
+
+from datetime import datetime, timedelta
+
+import pandas as pd
+from django.db.models import Sum
+from django.utils import timezone
+
+from ventas.models import DetalleVenta
+
+COLUMNAS_VENTAS_CATEGORIA = ['subcategoria_id', 'mes', 'ventas_mes_anterior']
+COLUMNAS_DEMANDA_PRODUCTO = ['producto_id', 'mes', 'semana_del_anio', 'ventas_semana_anterior']
+
+
+def _sumas(filtro, campo_id, ids):
+    """{id: unidades vendidas} con una sola consulta agrupada."""
+    filas = DetalleVenta.objects.filter(
+        **{f'{campo_id}__in': ids}, **filtro
+    ).values(campo_id).annotate(total_vendido=Sum('cantidad')).order_by()
+    return {fila[campo_id]: fila['total_vendido'] or 0 for fila in filas}
+
+
+def ventas_categoria(subcategoria_ids):
+    """
+    DataFrame ['subcategoria_id', 'mes', 'ventas_mes_anterior'] (una fila por id,
+    en el mismo orden): unidades vendidas en el mes calendario anterior.
+    """
+    hoy = timezone.now()
+    primer_dia_mes_actual = hoy.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    ultimo_dia_mes_pasado = primer_dia_mes_actual - timedelta(seconds=1)
+    primer_dia_mes_pasado = ultimo_dia_mes_pasado.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+    ventas = _sumas(
+        {'venta__fecha__range': (primer_dia_mes_pasado, ultimo_dia_mes_pasado)},
+        'producto__subcategoria_id', subcategoria_ids,
+    )
+    return pd.DataFrame({
+        'subcategoria_id': subcategoria_ids,
+        'mes': [hoy.month] * len(subcategoria_ids),
+        'ventas_mes_anterior': [ventas.get(i, 0) for i in subcategoria_ids],
+    }, columns=COLUMNAS_VENTAS_CATEGORIA)
+
+
+def demanda_producto(producto_ids):
+    """
+    DataFrame ['producto_id', 'mes', 'semana_del_anio', 'ventas_semana_anterior']
+    (una fila por id, en el mismo orden): unidades vendidas en los últimos 7 días.
+    """
+    hoy = datetime.now()
+    ventas = _sumas({'venta__fecha__gte': hoy - timedelta(days=7)}, 'producto_id', producto_ids)
+    return pd.DataFrame({
+        'producto_id': producto_ids,
+        'mes': [hoy.month] * len(producto_ids),
+        'semana_del_anio': [hoy.isocalendar().week] * len(producto_ids),
+        'ventas_semana_anterior': [ventas.get(i, 0) for i in producto_ids],
+    }, columns=COLUMNAS_DEMANDA_PRODUCTO)
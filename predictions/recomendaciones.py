@@ -0,0 +1,120 @@
+# predictions/recomendaciones.py
+# Recomendaciones "comprados juntos" con el modelo 3 (RandomForestClassifier).
+#
+# Evaluar el modelo contra todo el catálogo en cada petición cuesta O(catálogo).
+# Después de entrenar, 'precalcular_recomendaciones' evalúa cada producto contra
+# los demás productos de su empresa (por lotes, con predict_proba vectorizado) y
+# guarda su top-K en RecomendacionProducto: la vista solo hace una búsqueda por
+# índice. Si la tabla no existe para el producto, es anterior a la versión
+# activa del modelo (predictions/registro.py) o más vieja que
+# PREDICCIONES_RECOMENDACIONES_MAX_ANTIGUEDAD, se calcula en el momento.
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from products.models import Producto
+
+from . import registro
+from .models import RecomendacionProducto
+
+# Productos A por llamada a predict_proba al precalcular (filas = LOTE x catálogo)
+LOTE = 100
+
+
+def k_tabla():
+    return getattr(settings, 'PREDICCIONES_RECOMENDACIONES_K', 10)
+
+
+def candidatos(producto):
+    """Ids de los otros productos de la misma empresa."""
+    return list(
+        Producto.objects.filter(empresa_id=producto.empresa_id).exclude(id=producto.id).values_list('id', flat=True)
+    )
+
+
+def _top(probabilidades, ids, k):
+    """[(id, probabilidad)] de las k mayores; los empates, por id (mismo orden en tabla y fallback)."""
+    ids = np.asarray(ids)
+    indices = np.lexsort((ids, -probabilidades))[:k]
+    return [(int(ids[i]), float(probabilidades[i])) for i in indices]
+
+
+def calcular(modelo, producto_id, ids_candidatos, k):
+    """Top-k en el momento: una fila por candidato y un predict_proba."""
+    df_predict = pd.DataFrame({
+        'producto_A': [producto_id] * len(ids_candidatos),
+        'producto_B': ids_candidatos,
+    })
+    probabilidades = modelo.predict_proba(df_predict)[:, 1]
+    return _top(probabilidades, ids_candidatos, k)
+
+
+# --- PRECÁLCULO (después de entrenar) ---
+
+def _precalcular_empresa(modelo, empresa_id, k, generado_en):
+    ids = np.array(
+        Producto.objects.filter(empresa_id=empresa_id).order_by('id').values_list('id', flat=True)
+    )
+    filas = []
+    for inicio in range(0, len(ids), LOTE):
+        lote = ids[inicio:inicio + LOTE]
+        # Todos los pares (A del lote, B del catálogo) en una sola llamada
+        df_predict = pd.DataFrame({
+            'producto_A': np.repeat(lote, len(ids)),
+            'producto_B': np.tile(ids, len(lote)),
+        })
+        probabilidades = modelo.predict_proba(df_predict)[:, 1].reshape(len(lote), len(ids))
+        for fila, producto_id in enumerate(lote):
+            # El propio producto no se recomienda a sí mismo
+            probabilidades[fila, inicio + fila] = -1
+            for posicion, (recomendado, probabilidad) in enumerate(
+                _top(probabilidades[fila], ids, min(k, len(ids) - 1)), start=1
+            ):
+                filas.append(RecomendacionProducto(
+                    empresa_id=empresa_id, producto_id=int(producto_id), recomendado_id=recomendado,
+                    posicion=posicion, probabilidad=probabilidad, generado_en=generado_en,
+                ))
+
+    with transaction.atomic():
+        RecomendacionProducto.objects.filter(empresa_id=empresa_id).delete()
+        RecomendacionProducto.objects.bulk_create(filas, batch_size=2000)
+    return len(filas)
+
+
+def precalcular(modelo, empresa_ids=None, k=None):
+    """
+    Recalcula la tabla de las empresas dadas (por defecto, todas las que
+    tienen productos). Devuelve {empresa_id: filas creadas}.
+    """
+    k = k or k_tabla()
+    if empresa_ids is None:
+        empresa_ids = list(Producto.objects.order_by().values_list('empresa_id', flat=True).distinct())
+    generado_en = timezone.now()
+    return {empresa_id: _precalcular_empresa(modelo, empresa_id, k, generado_en) for empresa_id in empresa_ids}
+
+
+# --- LECTURA ---
+
+def _vigente(generado_en):
+    antiguedad = (timezone.now() - generado_en).total_seconds()
+    if antiguedad > getattr(settings, 'PREDICCIONES_RECOMENDACIONES_MAX_ANTIGUEDAD', 7 * 24 * 60 * 60):
+        return False
+    # Una versión del modelo activada después del precálculo (entrenamiento, fijar o rollback) invalida la tabla
+    cambio = registro.cambio('recommendation_model')
+    return cambio is None or generado_en >= cambio
+
+
+def precalculadas(producto_id, k):
+    """[(id, probabilidad)] desde la tabla, o None si no sirve (falta, vieja o k mayor al guardado)."""
+    if k > k_tabla():
+        return None
+    filas = list(
+        RecomendacionProducto.objects.filter(producto_id=producto_id, posicion__lte=k)
+        .order_by('posicion').values_list('recomendado_id', 'probabilidad', 'generado_en')
+    )
+    if not filas or not _vigente(filas[0][2]):
+        return None
+    return [(recomendado, probabilidad) for recomendado, probabilidad, _ in filas]
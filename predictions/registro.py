@@ -0,0 +1,131 @@
+# predictions/registro.py
+# Registro versionado de los modelos ML.
+#
+# train_models.py sobreescribía ml_models/*.pkl en el mismo lugar y los
+# servidores no veían el modelo nuevo sin reiniciar. Ahora cada entrenamiento
+# se guarda como un artefacto NUEVO (ml_models/<nombre>/v0003.pkl, escrito a un
+# temporal y renombrado: nunca se lee a medio escribir) y una fila de
+# VersionModelo con sus metadatos (filas, features, métricas, fecha).
+#
+# La versión activa de cada nombre es la fijada, si la hay, o la más nueva.
+# Fijar una versión anterior es el "rollback"; soltarla vuelve a seguir la
+# última. Los workers detectan el cambio y la cargan en caliente
+# (predictions/modelos.py). Se conservan las PREDICCIONES_MODELOS_CONSERVAR
+# versiones más nuevas (y la fijada); las demás se borran con su archivo.
+
+import logging
+import os
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import VersionModelo
+
+logger = logging.getLogger(__name__)
+
+
+def directorio():
+    return os.path.join(settings.BASE_DIR, 'ml_models')
+
+
+def ruta(version):
+    return os.path.join(directorio(), version.archivo)
+
+
+def registrar(nombre, guardar, extension, filas=0, features=None, metricas=None):
+    """
+    Guarda un artefacto nuevo con guardar(ruta) y lo registra como la versión
+    siguiente de 'nombre' (que pasa a ser la activa si no hay una fijada).
+    """
+    numero = (VersionModelo.objects.filter(nombre=nombre).aggregate(ultima=Max('version'))['ultima'] or 0) + 1
+    archivo = os.path.join(nombre, f'v{numero:04d}{extension}')
+    final = os.path.join(directorio(), archivo)
+    os.makedirs(os.path.dirname(final), exist_ok=True)
+
+    # Temporal con la misma extensión (np.savez_compressed la agrega si falta)
+    temporal = os.path.join(os.path.dirname(final), f'.v{numero:04d}.{os.getpid()}.tmp{extension}')
+    guardar(temporal)
+    os.replace(temporal, final)
+
+    ahora = timezone.now()
+    try:
+        version = VersionModelo.objects.create(
+            nombre=nombre, version=numero, archivo=archivo, filas_entrenamiento=filas,
+            features=list(features or []), metricas=metricas or {},
+            creado_en=ahora, actualizado_en=ahora,
+        )
+    except IntegrityError:
+        # Otro entrenamiento registró el mismo número a la vez
+        os.remove(final)
+        raise
+    _limpiar(nombre)
+    return version
+
+
+def _limpiar(nombre):
+    conservar = max(1, getattr(settings, 'PREDICCIONES_MODELOS_CONSERVAR', 3))
+    viejas = VersionModelo.objects.filter(nombre=nombre, fijada=False).order_by('-version')[conservar:]
+    for version in viejas:
+        try:
+            os.remove(ruta(version))
+        except OSError:
+            pass
+        version.delete()
+
+
+def versiones(nombre):
+    return list(VersionModelo.objects.filter(nombre=nombre).order_by('-version'))
+
+
+def activa(nombre):
+    """La VersionModelo activa (fijada o la más nueva), o None si no hay ninguna."""
+    return VersionModelo.objects.filter(nombre=nombre).order_by('-fijada', '-version').first()
+
+
+def activas():
+    """{nombre: VersionModelo activa} de todos los nombres, en una consulta."""
+    resultado = {}
+    for version in VersionModelo.objects.order_by('nombre', '-fijada', '-version'):
+        resultado.setdefault(version.nombre, version)
+    return resultado
+
+
+def cambio(nombre):
+    """Desde cuándo la versión activa es la activa (None si no hay versiones)."""
+    version = activa(nombre)
+    return version.actualizado_en if version else None
+
+
+def fijar(nombre, numero):
+    """
+    Fija la versión 'numero' como activa aunque haya más nuevas; con None se
+    suelta y vuelve a activarse la más nueva. Devuelve la nueva activa.
+    """
+    with transaction.atomic():
+        anterior = activa(nombre)
+        if numero is not None:
+            version = VersionModelo.objects.select_for_update().get(nombre=nombre, version=numero)
+        VersionModelo.objects.filter(nombre=nombre, fijada=True).update(fijada=False)
+        if numero is not None:
+            version.fijada = True
+            version.save(update_fields=['fijada'])
+        nueva = activa(nombre)
+        if nueva is not None and (anterior is None or anterior.pk != nueva.pk):
+            # Marca el cambio (lo usan, p. ej., las recomendaciones precalculadas)
+            nueva.actualizado_en = timezone.now()
+            nueva.save(update_fields=['actualizado_en'])
+    logger.info("Modelo %s: versión activa v%s.", nombre, nueva.version if nueva else None)
+    return nueva
+
+
+def rollback(nombre):
+    """Fija la versión anterior a la activa. Devuelve la nueva activa, o None si no hay anterior."""
+    actual = activa(nombre)
+    if actual is None:
+        return None
+    previa = VersionModelo.objects.filter(nombre=nombre, version__lt=actual.version).order_by('-version').first()
+    if previa is None:
+        return None
+    return fijar(nombre, previa.version)
@@ -24,4 +24,32 @@ urlpatterns = [
     path('sales/category/<int:subcategoria_id>/', 
          views.PredictSalesView.as_view(), 
          name='predict_sales_category'),
-]
\ No newline at end of file
+
+    # --- Lotes: muchos ids en una petición (una consulta y un predict) ---
+    # (Ej: POST /api/predict/demand/batch/ {"producto_ids": [1, 2, 3]})
+    path('demand/batch/',
+         views.PredictDemandBatchView.as_view(),
+         name='predict_demand_batch'),
+
+    path('sales/category/batch/',
+         views.PredictSalesBatchView.as_view(),
+         name='predict_sales_category_batch'),
+
+    # --- Modelos cargados en el worker, tiempos de carga y memoria (admin) ---
+    path('modelos/',
+         views.ModelosEstadoView.as_view(),
+         name='predict_modelos_estado'),
+
+    # --- Registro de versiones: listar, fijar / soltar y rollback (admin) ---
+    path('modelos/versiones/',
+         views.ModelosVersionesView.as_view(),
+         name='predict_modelos_versiones'),
+
+    path('modelos/<str:nombre>/fijar/',
+         views.ModeloFijarVersionView.as_view(),
+         name='predict_modelo_fijar'),
+
+    path('modelos/<str:nombre>/rollback/',
+         views.ModeloRollbackView.as_view(),
+         name='predict_modelo_rollback'),
+]
@@ -1,14 +1,9 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-import pandas as pd
-from datetime import datetime, timedelta
-from django.db.models import Sum
-from rest_framework.permissions import AllowAny 
-from django.apps import apps 
-from .apps import PredictionsConfig # Importamos la "Plantilla"
-from django.utils import timezone
-from dateutil.relativedelta import relativedelta
+from rest_framework.permissions import AllowAny, IsAdminUser
+from django.conf import settings
+from . import modelos, pistas, recomendaciones, registro
 
 # --- Importamos los modelos de la BD ---
 try:
@@ -20,6 +15,49 @@ try:
 except ImportError:
     Producto = None
 
+def _prediccion_ventas(fila, prediccion):
+    return {
+        "subcategoria_id": int(fila['subcategoria_id']),
+        "prediccion_proximo_mes (unidades)": round(prediccion),
+        "datos_usados_para_predecir": {
+            "mes_actual": int(fila['mes']),
+            "ventas_reales_mes_pasado": int(fila['ventas_mes_anterior'])
+        }
+    }
+
+
+def _prediccion_demanda(fila, prediccion):
+    return {
+        "producto_id": int(fila['producto_id']),
+        "prediccion_proxima_semana (unidades)": round(prediccion),
+        "datos_usados_para_predecir": {
+            "mes_actual": int(fila['mes']),
+            "semana_actual": int(fila['semana_del_anio']),
+            "ventas_reales_ultimos_7_dias": int(fila['ventas_semana_anterior'])
+        }
+    }
+
+
+def _leer_ids(request, campo):
+    """
+    Lista de ids del lote: JSON {"<campo>": [1, 2, 3]} o ?<campo>=1,2,3.
+    Sin repetidos y en el orden recibido. Devuelve (ids, error).
+    """
+    valores = request.data.get(campo) if hasattr(request.data, 'get') else None
+    if valores is None:
+        valores = [v for v in request.query_params.get(campo, '').split(',') if v.strip()]
+    if not isinstance(valores, list) or not valores:
+        return None, f"Envía '{campo}' como una lista de ids."
+    try:
+        ids = list(dict.fromkeys(int(v) for v in valores))
+    except (TypeError, ValueError):
+        return None, f"'{campo}' solo puede contener ids enteros."
+    maximo = getattr(settings, 'PREDICCIONES_MAX_LOTE', 1000)
+    if len(ids) > maximo:
+        return None, f"Máximo {maximo} ids por lote."
+    return ids, None
+
+
 # ===================================================================
 # --- VISTA 1: PREDICCIÓN DE VENTAS 
 # ===================================================================
@@ -28,49 +66,16 @@ class PredictSalesView(APIView):
     
     # --- ¡CAMBIO AQUÍ! ---
     def get(self, request, subcategoria_id, format=None): 
-        model = PredictionsConfig.sales_category_model
+        model = modelos.obtener('sales_category_model')
         if model is None:
             return Response({"error": "Modelo de Ventas por Categoría no cargado."}, 
                             status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
         # --- Pistas: ['subcategoria_id', 'mes', 'ventas_mes_anterior'] ---
-        hoy = timezone.now()
-        mes_actual = hoy.month
-
-        primer_dia_mes_actual = hoy.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        ultimo_dia_mes_pasado = primer_dia_mes_actual - timedelta(seconds=1) 
-        primer_dia_mes_pasado = ultimo_dia_mes_pasado.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-
-        # --- ¡CAMBIO AQUÍ! ---
-        ventas_pasadas = DetalleVenta.objects.filter(
-            producto__subcategoria_id=subcategoria_id, # <-- ¡Usamos tu cambio!
-            venta__fecha__range=(primer_dia_mes_pasado, ultimo_dia_mes_pasado)
-        ).aggregate(total_vendido=Sum('cantidad'))
-        
-        ventas_mes_anterior = ventas_pasadas.get('total_vendido', 0)
-        if ventas_mes_anterior is None: ventas_mes_anterior = 0
-
-        # --- ¡CAMBIO AQUÍ! ---
-        data_para_predecir = {
-            'subcategoria_id': [subcategoria_id], # <-- ¡Usamos tu cambio!
-            'mes': [mes_actual],
-            'ventas_mes_anterior': [ventas_mes_anterior]
-        }
-        columnas_ordenadas = ['subcategoria_id', 'mes', 'ventas_mes_anterior'] # <-- ¡Usamos tu cambio!
-        df_predict = pd.DataFrame(data_para_predecir, columns=columnas_ordenadas)
-
+        df_predict = pistas.ventas_categoria([subcategoria_id])
         prediccion_array = model.predict(df_predict)
-        prediccion_final = round(prediccion_array[0])
 
-        # --- ¡CAMBIO AQUÍ! ---
-        return Response({
-            "subcategoria_id": subcategoria_id, # <-- ¡Usamos tu cambio!
-            "prediccion_proximo_mes (unidades)": prediccion_final,
-            "datos_usados_para_predecir": {
-                "mes_actual": mes_actual,
-                "ventas_reales_mes_pasado": ventas_mes_anterior
-            }
-        }, status=status.HTTP_200_OK)
+        return Response(_prediccion_ventas(df_predict.iloc[0], prediccion_array[0]), status=status.HTTP_200_OK)
 
 # ===================================================================
 # --- VISTA 2: PREDICCIÓN DE DEMANDA POR PRODUCTO 
@@ -79,89 +84,263 @@ class PredictDemandView(APIView):
     permission_classes = [AllowAny]
     
     def get(self, request, producto_id, format=None):
-        model = PredictionsConfig.demand_product_model
+        model = modelos.obtener('demand_product_model')
         if model is None:
             return Response({"error": "Modelo de Demanda por Producto no cargado."}, 
                             status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-        hoy = datetime.now()
-        mes_actual = hoy.month
-        semana_actual = hoy.isocalendar().week
-        hace_7_dias = hoy - timedelta(days=7)
-        
-        ventas_pasadas = DetalleVenta.objects.filter(
-            producto_id=producto_id,
-            venta__fecha__gte=hace_7_dias
-        ).aggregate(total_vendido=Sum('cantidad'))
-        ventas_semana_anterior = ventas_pasadas.get('total_vendido', 0)
-        if ventas_semana_anterior is None: ventas_semana_anterior = 0
-
-        data_para_predecir = {
-            'producto_id': [producto_id],
-            'mes': [mes_actual],
-            'semana_del_anio': [semana_actual],
-            'ventas_semana_anterior': [ventas_semana_anterior]
-        }
-        columnas_ordenadas = ['producto_id', 'mes', 'semana_del_anio', 'ventas_semana_anterior']
-        df_predict = pd.DataFrame(data_para_predecir, columns=columnas_ordenadas)
-
+        # --- Pistas: ['producto_id', 'mes', 'semana_del_anio', 'ventas_semana_anterior'] ---
+        df_predict = pistas.demanda_producto([producto_id])
         prediccion_array = model.predict(df_predict)
-        prediccion_final = round(prediccion_array[0])
+
+        return Response(_prediccion_demanda(df_predict.iloc[0], prediccion_array[0]), status=status.HTTP_200_OK)
+
+# ===================================================================
+# --- VISTAS DE LOTE: MUCHOS IDS EN UNA PETICIÓN
+# Una consulta agrupada para las pistas de todos los ids y UNA llamada a
+# model.predict sobre el DataFrame completo (en vez de N peticiones).
+# ===================================================================
+class PredictSalesBatchView(APIView):
+    """
+    POST {"subcategoria_ids": [1, 2, 3]}  (o GET ?subcategoria_ids=1,2,3)
+    Mismo resultado por id que /sales/category/<id>/, en 'predicciones'.
+    """
+    permission_classes = [AllowAny]
+
+    def post(self, request, format=None):
+        model = modelos.obtener('sales_category_model')
+        if model is None:
+            return Response({"error": "Modelo de Ventas por Categoría no cargado."},
+                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        subcategoria_ids, error = _leer_ids(request, 'subcategoria_ids')
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        df_predict = pistas.ventas_categoria(subcategoria_ids)
+        predicciones = model.predict(df_predict)
+
+        return Response({
+            "predicciones": [
+                _prediccion_ventas(fila, prediccion)
+                for fila, prediccion in zip(df_predict.to_dict('records'), predicciones)
+            ]
+        }, status=status.HTTP_200_OK)
+
+    get = post
+
+
+class PredictDemandBatchView(APIView):
+    """
+    POST {"producto_ids": [1, 2, 3]}  (o GET ?producto_ids=1,2,3)
+    Mismo resultado por id que /demand/<id>/, en 'predicciones'.
+    """
+    permission_classes = [AllowAny]
+
+    def post(self, request, format=None):
+        model = modelos.obtener('demand_product_model')
+        if model is None:
+            return Response({"error": "Modelo de Demanda por Producto no cargado."},
+                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        producto_ids, error = _leer_ids(request, 'producto_ids')
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        df_predict = pistas.demanda_producto(producto_ids)
+        predicciones = model.predict(df_predict)
 
         return Response({
-            "producto_id": producto_id,
-            "prediccion_proxima_semana (unidades)": prediccion_final,
-            "datos_usados_para_predecir": {
-                "mes_actual": mes_actual,             
-                "semana_actual": semana_actual,      
-                "ventas_reales_ultimos_7_dias": ventas_semana_anterior
-            }
+            "predicciones": [
+                _prediccion_demanda(fila, prediccion)
+                for fila, prediccion in zip(df_predict.to_dict('records'), predicciones)
+            ]
         }, status=status.HTTP_200_OK)
 
+    get = post
+
+
 # ===================================================================
 # --- VISTA 3: RECOMENDACIÓN DE PRODUCTOS 
 # ===================================================================
 class RecommendProductView(APIView):
+    """
+    GET /recommend/<producto_id>/?k=3  (k se limita a PREDICCIONES_RECOMENDACIONES_K)
+    Se lee del top-K precalculado (predictions/recomendaciones.py); si no está
+    o quedó viejo, se calcula con el modelo contra los productos de la empresa.
+    Con ?motor=coocurrencia&metrica=lift|coseno|jaccard (o PREDICCIONES_RECOMENDADOR)
+    se usa el motor de co-ocurrencia (predictions/coocurrencia.py).
+    """
     permission_classes = [AllowAny]
     
     def get(self, request, producto_id, format=None):
-        model = PredictionsConfig.recommendation_model
-        
-        if model is None:
-            return Response({"error": "Modelo de Recomendación no cargado."}, 
-                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         if Producto is None:
             return Response({"error": "No se pudo importar 'Producto'"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
         try:
-            otros_productos_ids = list(Producto.objects.exclude(id=producto_id).values_list('id', flat=True))
-        except Exception as e:
-            return Response({"error": f"Error al buscar productos: {e}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            k = int(request.query_params.get('k', 3))
+        except ValueError:
+            return Response({"error": "'k' debe ser un entero."}, status=status.HTTP_400_BAD_REQUEST)
+        # Hasta el K de la tabla precalculada: un 'k' mayor la saltaría y forzaría
+        # el modelo contra todo el catálogo en cada petición (endpoint anónimo)
+        k = min(max(1, k), recomendaciones.k_tabla())
 
-        if not otros_productos_ids:
-            return Response({"error": "No se encontraron otros productos para recomendar."}, status=status.HTTP_404_NOT_FOUND)
+        # Motor alternativo: co-ocurrencia en la misma venta (predictions/coocurrencia.py)
+        motor = request.query_params.get('motor', getattr(settings, 'PREDICCIONES_RECOMENDADOR', 'modelo'))
+        if motor == 'coocurrencia':
+            return self._coocurrencia(request, producto_id, k)
 
-        data_para_predecir = {
-            'producto_A': [producto_id] * len(otros_productos_ids),
-            'producto_B': otros_productos_ids
-        }
-        df_predict = pd.DataFrame(data_para_predecir)
-        
-        probabilidades = model.predict_proba(df_predict)
-        probabilidad_de_compra_juntos = probabilidades[:, 1]
-        
-        resultados = zip(otros_productos_ids, probabilidad_de_compra_juntos)
-        resultados_ordenados = sorted(resultados, key=lambda x: x[1], reverse=True)
-        top_3_recomendaciones_tuplas = resultados_ordenados[:3]
-        
-        top_3_final = []
-        for prod_id, prob in top_3_recomendaciones_tuplas:
-            top_3_final.append({
-                "producto_id_recomendado": prod_id,
-                "probabilidad": f"{prob * 100:.2f}%"
-            })
+        # 1. Búsqueda por índice en la tabla precalculada
+        top = recomendaciones.precalculadas(producto_id, k)
+        precalculado = top is not None
+
+        # 2. Fallback: el modelo en el momento (O(catálogo de la empresa))
+        if top is None:
+            model = modelos.obtener('recommendation_model')
+            if model is None:
+                return Response({"error": "Modelo de Recomendación no cargado."}, 
+                                status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            try:
+                producto = Producto.objects.only('id', 'empresa_id').get(pk=producto_id)
+                otros_productos_ids = recomendaciones.candidatos(producto)
+            except Producto.DoesNotExist:
+                return Response({"error": "Producto no encontrado."}, status=status.HTTP_404_NOT_FOUND)
+            except Exception as e:
+                return Response({"error": f"Error al buscar productos: {e}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+            if not otros_productos_ids:
+                return Response({"error": "No se encontraron otros productos para recomendar."}, status=status.HTTP_404_NOT_FOUND)
+
+            top = recomendaciones.calcular(model, producto_id, otros_productos_ids, k)
+
+        response = Response({
+            "producto_consultado": producto_id,
+            "recomendaciones": [
+                {
+                    "producto_id_recomendado": prod_id,
+                    "probabilidad": f"{prob * 100:.2f}%"
+                }
+                for prod_id, prob in top
+            ]
+        }, status=status.HTTP_200_OK)
+        response['X-Recomendaciones-Precalculadas'] = 'true' if precalculado else 'false'
+        return response
+
+    def _coocurrencia(self, request, producto_id, k):
+        engine = modelos.obtener('coocurrencia_engine')
+        if engine is None:
+            return Response({"error": "Motor de Co-ocurrencia no cargado."},
+                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        metrica = request.query_params.get('metrica', getattr(settings, 'PREDICCIONES_COOCURRENCIA_METRICA', 'lift'))
+        try:
+            top = engine.recomendar(
+                producto_id, k, metrica,
+                min_soporte=getattr(settings, 'PREDICCIONES_COOCURRENCIA_MIN_SOPORTE', 1),
+            )
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if not top:
+            return Response({"error": "No hay ventas de este producto junto a otros."}, status=status.HTTP_404_NOT_FOUND)
 
         return Response({
             "producto_consultado": producto_id,
-            "recomendaciones": top_3_final
-        }, status=status.HTTP_200_OK)
\ No newline at end of file
+            "motor": "coocurrencia",
+            "metrica": metrica,
+            "recomendaciones": [
+                {"producto_id_recomendado": prod_id, "puntaje": round(puntaje, 4)}
+                for prod_id, puntaje in top
+            ]
+        }, status=status.HTTP_200_OK)
+
+
+# ===================================================================
+# --- ESTADO DE LOS MODELOS (por proceso/worker)
+# ===================================================================
+class ModelosEstadoView(APIView):
+    """
+    GET /api/predict/modelos/  (?precargar=true carga los que falten)
+    Qué modelos tiene cargados ESTE worker, cuánto tardó cada carga y el
+    RSS / memoria compartida del proceso (predictions/modelos.py).
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, format=None):
+        if request.query_params.get('precargar', '').lower() in ('1', 'true', 'si', 'sí'):
+            modelos.precargar()
+        return Response(modelos.estado(), status=status.HTTP_200_OK)
+
+
+# ===================================================================
+# --- REGISTRO DE VERSIONES (predictions/registro.py)
+# Los demás workers toman el cambio en PREDICCIONES_MODELOS_INTERVALO
+# segundos; el que atiende la petición, en el momento.
+# ===================================================================
+def _version_dict(version, activa):
+    return {
+        "version": version.version,
+        "archivo": version.archivo,
+        "filas_entrenamiento": version.filas_entrenamiento,
+        "features": version.features,
+        "metricas": version.metricas,
+        "creado_en": version.creado_en,
+        "fijada": version.fijada,
+        "activa": activa is not None and version.pk == activa.pk,
+    }
+
+
+def _versiones_modelo(nombre):
+    activa = registro.activa(nombre)
+    return {
+        "nombre": nombre,
+        "version_activa": activa.version if activa else None,
+        "versiones": [_version_dict(version, activa) for version in registro.versiones(nombre)],
+    }
+
+
+class ModelosVersionesView(APIView):
+    """GET /api/predict/modelos/versiones/: versiones registradas de cada modelo y cuál está activa."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, format=None):
+        return Response({
+            "modelos": [_versiones_modelo(nombre) for nombre in modelos.MODELOS]
+        }, status=status.HTTP_200_OK)
+
+
+class ModeloFijarVersionView(APIView):
+    """
+    POST /api/predict/modelos/<nombre>/fijar/ {"version": 3}
+    Fija esa versión aunque se entrenen otras más nuevas; {"version": null}
+    la suelta y vuelve a activarse la más nueva.
+    """
+    permission_classes = [IsAdminUser]
+
+    def post(self, request, nombre, format=None):
+        if nombre not in modelos.MODELOS:
+            return Response({"error": "Modelo no encontrado."}, status=status.HTTP_404_NOT_FOUND)
+        if 'version' not in request.data:
+            return Response({"error": "Falta 'version' (un número, o null para soltarla)."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        numero = request.data['version']
+        if numero is not None:
+            try:
+                numero = int(numero)
+            except (TypeError, ValueError):
+                return Response({"error": "'version' debe ser un entero o null."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            registro.fijar(nombre, numero)
+        except registro.VersionModelo.DoesNotExist:
+            return Response({"error": f"No existe la versión {numero} de {nombre}."}, status=status.HTTP_404_NOT_FOUND)
+        modelos.sincronizar()
+        return Response(_versiones_modelo(nombre), status=status.HTTP_200_OK)
+
+
+class ModeloRollbackView(APIView):
+    """POST /api/predict/modelos/<nombre>/rollback/: fija la versión anterior a la activa."""
+    permission_classes = [IsAdminUser]
+
+    def post(self, request, nombre, format=None):
+        if nombre not in modelos.MODELOS:
+            return Response({"error": "Modelo no encontrado."}, status=status.HTTP_404_NOT_FOUND)
+        if registro.rollback(nombre) is None:
+            return Response({"error": f"{nombre} no tiene una versión anterior a la activa."},
+                            status=status.HTTP_409_CONFLICT)
+        modelos.sincronizar()
+        return Response(_versiones_modelo(nombre), status=status.HTTP_200_OK)
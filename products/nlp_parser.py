@@ -1,8 +1,8 @@
 import json
-from decouple import config
-import google.generativeai as genai 
 from django.utils import timezone
 
+from utils import gemini
+
 # ----------------- PROMPT DE PRODUCTOS (RETAIL) -----------------
 PROMPT_PLANTILLA = """
 Eres un analizador de lenguaje natural experto en retail de electrodomésticos y tecnología.
@@ -77,16 +77,7 @@ def parse_natural_query(texto_usuario: str) -> dict:
     
     # Esta función es IDÉNTICA a la de tu app 'reports'
     
-    api_key = config('API_GEMINI', default=config('GOOGLE_API_KEY', default=''))
-    if not api_key:
-        print("ERROR: Clave API_GEMINI no configurada.")
-        return {"error": "API Key no configurada"}
-    
     try:
-        genai.configure(api_key=api_key)
-        # Usamos el modelo que SÍ te funciona
-        model = genai.GenerativeModel('gemini-2.5-flash') 
-
         fecha_hoy_str = timezone.now().strftime('%Y-%m-%d')
         # ¡IMPORTANTE! Usamos la plantilla de PRODUCTOS
         prompt_final = PROMPT_PLANTILLA.format(
@@ -94,8 +85,8 @@ def parse_natural_query(texto_usuario: str) -> dict:
             fecha_hoy=fecha_hoy_str
         )
 
-        response = model.generate_content(prompt_final)
-        raw_text = response.text.strip()
+        # Cliente compartido (utils/gemini.py): timeout, cupo y circuit breaker
+        raw_text = gemini.generar(prompt_final).strip()
         
         # Limpieza de JSON
         if raw_text.startswith("```json"):
@@ -106,6 +97,10 @@ def parse_natural_query(texto_usuario: str) -> dict:
         parsed_json = json.loads(raw_text)
         return parsed_json
 
+    except gemini.GeminiNoConfigurado:
+        print("ERROR: Clave API_GEMINI no configurada.")
+        return {"error": "API Key no configurada"}
+
     except json.JSONDecodeError as e:
         print(f"Error JSON Decode: No se pudo parsear. Texto crudo: '{raw_text}'")
         return {"error": "Respuesta de IA no es un JSON válido"} 
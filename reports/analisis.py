@@ -0,0 +1,121 @@
+# reports/analisis.py
+# Preparación de datos para el análisis con Gemini (AnalizarVentasProductoView).
+#
+# En vez de mandar todas las filas del catálogo, se manda un resumen compacto:
+# estadísticas ya calculadas, los N productos con más ingresos (como lista de
+# listas) y el resto agregado en "otros". Si el JSON pasa del presupuesto de
+# tokens se recorta el top hasta que entre.
+#
+# El análisis se cachea con un hash del prompt + datos compactados: si los
+# datos no cambiaron, se devuelve el análisis guardado sin llamar a la API.
+
+import hashlib
+import json
+import statistics
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .nlp_utils import analyze_data_with_gemini
+
+COLUMNAS = ['producto', 'sku', 'unidades', 'ingresos', 'pct_ingresos', 'precio_promedio']
+
+# Aproximación usada para el presupuesto: ~4 caracteres por token
+CARACTERES_POR_TOKEN = 4
+
+
+def _numero(valor):
+    return round(float(valor or 0), 2)
+
+
+def _pct(parte, total):
+    return round(100 * parte / total, 1) if total else 0.0
+
+
+def _fila(registro, ingresos_totales):
+    unidades = registro['cantidad_total'] or 0
+    ingresos = _numero(registro['ingresos_totales'])
+    return [
+        registro['producto__nombre'] or 'Sin Producto',
+        registro['producto__sku'] or '',
+        unidades,
+        ingresos,
+        _pct(ingresos, ingresos_totales),
+        _numero(ingresos / unidades) if unidades else 0.0,
+    ]
+
+
+def _otros(filas, ingresos_totales):
+    ingresos = _numero(sum(fila[3] for fila in filas))
+    return {
+        'productos': len(filas),
+        'unidades': sum(fila[2] for fila in filas),
+        'ingresos': ingresos,
+        'pct_ingresos': _pct(ingresos, ingresos_totales),
+    }
+
+
+def estimar_tokens(texto):
+    return len(texto) // CARACTERES_POR_TOKEN + 1
+
+
+def serializar(datos):
+    return json.dumps(datos, ensure_ascii=False, separators=(',', ':'))
+
+
+def compactar(registros, top_n=None, max_tokens=None):
+    """
+    'registros' son las filas de rollups.ventas_por_producto (ordenadas por
+    ingresos, de mayor a menor). Devuelve el dict compacto que va al prompt.
+    """
+    top_n = top_n if top_n is not None else getattr(settings, 'REPORTES_ANALISIS_TOP_N', 25)
+    max_tokens = max_tokens if max_tokens is not None else getattr(settings, 'REPORTES_ANALISIS_MAX_TOKENS', 1500)
+
+    ingresos_totales = sum(_numero(r['ingresos_totales']) for r in registros)
+    filas = [_fila(r, ingresos_totales) for r in registros]
+    unidades_totales = sum(fila[2] for fila in filas)
+    ingresos_por_producto = [fila[3] for fila in filas]
+
+    resumen = {
+        'productos': len(filas),
+        'unidades_totales': unidades_totales,
+        'ingresos_totales': _numero(ingresos_totales),
+        'precio_promedio': _numero(ingresos_totales / unidades_totales) if unidades_totales else 0.0,
+        'ingreso_medio_por_producto': _numero(statistics.mean(ingresos_por_producto)) if filas else 0.0,
+        'ingreso_mediano_por_producto': _numero(statistics.median(ingresos_por_producto)) if filas else 0.0,
+        'pct_ingresos_top_5': _pct(sum(ingresos_por_producto[:5]), ingresos_totales),
+    }
+
+    n = min(top_n, len(filas))
+    while True:
+        datos = {
+            'resumen': resumen,
+            'columnas': COLUMNAS,
+            'top': filas[:n],
+        }
+        if n < len(filas):
+            datos['otros'] = _otros(filas[n:], ingresos_totales)
+        if n == 0 or estimar_tokens(serializar(datos)) <= max_tokens:
+            return datos
+        # Fuera de presupuesto: una fila menos en el top (pasa a "otros")
+        n -= 1
+
+
+def analizar(registros, prompt_analista):
+    """
+    Devuelve (resultado, desde_cache). 'resultado' es el dict de
+    analyze_data_with_gemini ({'analisis': ...} o {'error': ...}).
+    """
+    datos_json_str = serializar(compactar(registros))
+    clave = 'reportes:analisis:' + hashlib.sha256(
+        f'{prompt_analista}\n{datos_json_str}'.encode('utf-8')
+    ).hexdigest()
+
+    resultado = cache.get(clave)
+    if resultado is not None:
+        return resultado, True
+
+    resultado = analyze_data_with_gemini(datos_json_str, prompt_analista)
+    if "error" not in resultado:
+        cache.set(clave, resultado, getattr(settings, 'REPORTES_ANALISIS_CACHE_TTL', 7 * 24 * 60 * 60))
+    return resultado, False
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ReportsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'reports'
+
+    def ready(self):
+        # Rollups al día con cada escritura de Venta / DetalleVenta / Pago
+        from . import signals  # noqa: F401
@@ -0,0 +1,99 @@
+# reports/cache.py
+# Caché de resultados de reportes (JSON de los gráficos y archivos pdf/excel/csv).
+#
+# La clave incluye (empresa, reporte, formato, día inicio, día fin) y las
+# "versiones" de los buckets mensuales que cubre el rango. Invalidar es subir la
+# versión de los buckets afectados: las entradas viejas dejan de encontrarse y
+# expiran solas por TTL. Las versiones se suben cuando se recalculan los rollups
+# (reports/rollups.py), que es de donde leen todos los reportes, así una venta
+# nueva solo invalida su empresa y su mes.
+#
+# Con varios workers de gunicorn las versiones de los buckets solo se comparten
+# con un backend común (Redis, ver CACHES en settings.py): con LocMemCache cada
+# proceso tiene las suyas y solo el que escribió la venta las sube. Por eso la
+# clave lleva además la versión de CambioVentas de la empresa, la misma del
+# ETag (reports/condicional.py), que está en la BD: ningún worker sirve un
+# resultado anterior al último recálculo de los rollups aunque su caché sea local.
+
+import datetime
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import caches
+
+from . import condicional, rollups
+
+PREFIJO = 'reportes'
+
+
+def _cache():
+    return caches[getattr(settings, 'REPORTES_CACHE_ALIAS', 'default')]
+
+
+def _ttl():
+    return getattr(settings, 'REPORTES_CACHE_TTL', 600)
+
+
+def _meses(desde, hasta):
+    mes = desde.replace(day=1)
+    while mes <= hasta:
+        yield mes.strftime('%Y-%m')
+        mes = (mes + datetime.timedelta(days=32)).replace(day=1)
+
+
+def _claves_version(empresa_id, desde, hasta):
+    claves = [f'{PREFIJO}:gen', f'{PREFIJO}:gen:{empresa_id}']
+    claves += [f'{PREFIJO}:v:{empresa_id}:{mes}' for mes in _meses(desde, hasta)]
+    return claves
+
+
+def clave_resultado(empresa, reporte, formato, fecha_inicio, fecha_fin):
+    """
+    Los reportes salen de rollups diarios, así que el rango se normaliza a días
+    locales: dos peticiones del mismo día comparten entrada aunque la hora cambie.
+    """
+    empresa_id = getattr(empresa, 'id', empresa)
+    desde, hasta = rollups.rango_dias(fecha_inicio, fecha_fin)
+    claves_version = _claves_version(empresa_id, desde, hasta)
+    versiones = _cache().get_many(claves_version)
+    base = json.dumps([
+        empresa_id, reporte, formato, desde.isoformat(), hasta.isoformat(),
+        condicional.version(empresa_id),
+        [versiones.get(clave, 0) for clave in claves_version],
+    ])
+    return f'{PREFIJO}:r:' + hashlib.sha256(base.encode('utf-8')).hexdigest()
+
+
+def obtener(clave):
+    return _cache().get(clave)
+
+
+def guardar(clave, valor, tamano=0):
+    if tamano > getattr(settings, 'REPORTES_CACHE_MAX_BYTES', 5 * 1024 * 1024):
+        return
+    _cache().set(clave, valor, _ttl())
+
+
+def _subir_version(clave):
+    cache = _cache()
+    cache.add(clave, 0, None)
+    try:
+        cache.incr(clave)
+    except ValueError:
+        # La clave expiró/desalojó entre add() e incr()
+        cache.set(clave, 1, None)
+
+
+def invalidar(empresa_id=rollups.TODAS, desde=None, hasta=None):
+    """
+    Invalida los resultados de una empresa en los meses [desde, hasta].
+    Sin rango invalida toda la empresa; sin empresa, todo.
+    """
+    if empresa_id is rollups.TODAS:
+        _subir_version(f'{PREFIJO}:gen')
+    elif desde is None or hasta is None:
+        _subir_version(f'{PREFIJO}:gen:{empresa_id}')
+    else:
+        for mes in _meses(desde, hasta):
+            _subir_version(f'{PREFIJO}:v:{empresa_id}:{mes}')
@@ -0,0 +1,108 @@
+# reports/columnar.py
+# Exportación columnar (Parquet y Arrow IPC) para los consumidores de BI.
+#
+# A diferencia de excel/csv, los tipos se conservan: los Decimal de la BD van
+# como decimal128 (no como texto), las fechas como date32/timestamp y los
+# conteos como int64. El esquema sale de los campos del queryset, no de los
+# valores, así no depende de la primera fila ni cambia entre lotes.
+# Las filas se convierten por lotes (RecordBatch) a medida que llegan del cursor.
+
+from decimal import Decimal
+from io import BytesIO
+from itertools import islice
+
+from django.conf import settings
+from django.db import models
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow es opcional: sin él no se ofrecen estos formatos
+    pa = None
+    pq = None
+
+FORMATOS = ('parquet', 'arrow')
+
+TAMANO_LOTE = 2000
+
+
+def disponible():
+    return pa is not None
+
+
+def _campo(queryset, nombre):
+    """Campo de Django detrás de una columna de values() (anotación o ruta 'a__b')."""
+    anotacion = queryset.query.annotations.get(nombre)
+    if anotacion is not None:
+        return anotacion.output_field
+    modelo, campo = queryset.model, None
+    for parte in nombre.split('__'):
+        campo = modelo._meta.get_field(parte)
+        modelo = campo.related_model
+    return campo
+
+
+def _tipo(campo):
+    if isinstance(campo, models.DecimalField):
+        # Precisión máxima: las sumas pueden pasar de max_digits; la escala se respeta
+        return pa.decimal128(38, campo.decimal_places)
+    if isinstance(campo, models.BooleanField):
+        return pa.bool_()
+    if isinstance(campo, (models.IntegerField, models.AutoField)):
+        return pa.int64()
+    if isinstance(campo, models.FloatField):
+        return pa.float64()
+    if isinstance(campo, models.DateTimeField):
+        return pa.timestamp('us', tz=settings.TIME_ZONE if settings.USE_TZ else None)
+    if isinstance(campo, models.DateField):
+        return pa.date32()
+    return pa.string()
+
+
+def esquema(queryset, columnas):
+    """
+    Esquema Arrow para 'columnas' ({campo de values(): nombre de columna}),
+    en el mismo orden y con los mismos encabezados que csv/excel.
+    """
+    return pa.schema([
+        pa.field(nombre, _tipo(_campo(queryset, campo)))
+        for campo, nombre in columnas.items()
+    ])
+
+
+def _columna(valores, tipo):
+    if pa.types.is_decimal(tipo):
+        # SQLite suma los decimales como float (988786.439999999): se redondean
+        # a la escala del campo, como haría un NUMERIC de PostgreSQL
+        escala = Decimal(1).scaleb(-tipo.scale)
+        valores = [v.quantize(escala) if isinstance(v, Decimal) else v for v in valores]
+    return pa.array(valores, type=tipo)
+
+
+def _lotes(filas, campos, schema):
+    filas = iter(filas)
+    while True:
+        lote = list(islice(filas, TAMANO_LOTE))
+        if not lote:
+            break
+        yield pa.record_batch(
+            [
+                _columna([fila[campo] for fila in lote], tipo)
+                for campo, tipo in zip(campos, schema.types)
+            ],
+            schema=schema,
+        )
+
+
+def escribir(formato, filas, queryset, columnas):
+    """Devuelve los bytes del archivo Parquet o Arrow IPC (formato 'file')."""
+    schema = esquema(queryset, columnas)
+    output = BytesIO()
+    if formato == 'parquet':
+        writer = pq.ParquetWriter(output, schema, compression='zstd')
+    else:
+        writer = pa.ipc.new_file(output, schema)
+    with writer:
+        for lote in _lotes(filas, list(columnas), schema):
+            writer.write_batch(lote)
+    return output.getvalue()
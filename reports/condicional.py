@@ -0,0 +1,99 @@
+# reports/condicional.py
+# GET condicional (ETag / Last-Modified) para los reportes JSON.
+#
+# El frontend consulta los reportes una y otra vez aunque no haya ventas
+# nuevas. Cada empresa tiene una marca de "último cambio" (CambioVentas) que
+# rollups.reconstruir sube en la misma transacción en que recalcula los
+# rollups, que es de donde leen todos los reportes. El ETag resume esa
+# versión, la empresa, la URL y el rango en días: si el cliente manda el mismo
+# en If-None-Match (o un If-Modified-Since posterior al cambio), se responde
+# 304 sin leer ni agregar nada. Cuesta una consulta por clave primaria.
+#
+# Sin fecha_inicio/fecha_fin el rango por defecto ("últimos 30 días") cambia
+# cada día aunque no haya ventas nuevas: su Last-Modified es como mínimo el
+# inicio del día de hoy, así un If-Modified-Since de ayer ya no da 304.
+
+import hashlib
+
+from django.db.models import F
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from . import rollups
+from .models import CambioVentas
+
+
+def registrar_cambio(empresa_id=rollups.TODAS):
+    """Sube la versión de la empresa (o de todas). La llama rollups.reconstruir."""
+    ahora = timezone.now()
+    if empresa_id is rollups.TODAS:
+        CambioVentas.objects.update(version=F('version') + 1, cambiado_en=ahora)
+        return
+    if empresa_id is None:
+        return
+    actualizadas = CambioVentas.objects.filter(empresa_id=empresa_id).update(
+        version=F('version') + 1, cambiado_en=ahora
+    )
+    if not actualizadas:
+        CambioVentas.objects.get_or_create(empresa_id=empresa_id, defaults={'version': 1, 'cambiado_en': ahora})
+
+
+def marca(empresa):
+    """(version, cambiado_en) de la empresa; se crea la primera vez que se pide."""
+    cambio, _ = CambioVentas.objects.get_or_create(
+        empresa=empresa, defaults={'cambiado_en': timezone.now()}
+    )
+    return cambio.version, cambio.cambiado_en
+
+
+def version(empresa_id):
+    """Versión actual de la empresa (0 si aún no hay marca). La usa también reports/cache.py."""
+    return CambioVentas.objects.filter(empresa_id=empresa_id).values_list('version', flat=True).first() or 0
+
+
+def validador(request, fecha_inicio=None, fecha_fin=None):
+    """
+    (etag, ultima_modificacion) de la respuesta, o None si el usuario no tiene
+    empresa. Se calcula ANTES de leer los datos: si entra una venta mientras
+    se agrega, la próxima consulta ya no coincide y se vuelve a calcular.
+    """
+    empresa = getattr(request.user, 'empresa', None)
+    if empresa is None:
+        return None
+    version, cambiado_en = marca(empresa)
+    partes = [str(empresa.id), str(version), request.get_full_path()]
+    if fecha_inicio is not None and fecha_fin is not None:
+        # El rango por defecto ("últimos 30 días") se mueve con el reloj
+        partes += [dia.isoformat() for dia in rollups.rango_dias(fecha_inicio, fecha_fin)]
+    etag = 'W/"%s"' % hashlib.sha256('|'.join(partes).encode('utf-8')).hexdigest()[:32]
+    # Mismo criterio que views.obtener_fechas para usar el rango por defecto
+    if not request.GET.get('fecha_inicio') or not request.GET.get('fecha_fin'):
+        hoy = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+        cambiado_en = max(cambiado_en, hoy)
+    return etag, cambiado_en
+
+
+def no_modificado(request, validador_respuesta):
+    """HttpResponseNotModified (304) si el cliente ya tiene esta versión, si no None."""
+    if validador_respuesta is None or request.method not in ('GET', 'HEAD'):
+        return None
+    etag, cambiado_en = validador_respuesta
+    respuesta = get_conditional_response(request, etag=etag, last_modified=int(cambiado_en.timestamp()))
+    if respuesta is not None:
+        _encabezados(respuesta, etag, cambiado_en)
+    return respuesta
+
+
+def marcar(response, validador_respuesta):
+    """Agrega ETag, Last-Modified y Cache-Control a una respuesta 200."""
+    if validador_respuesta is not None and response.status_code == 200:
+        _encabezados(response, *validador_respuesta)
+    return response
+
+
+def _encabezados(response, etag, cambiado_en):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(cambiado_en.timestamp())
+    # Privada (depende del usuario) y siempre revalidada con el servidor
+    response['Cache-Control'] = 'private, no-cache'
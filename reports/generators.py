@@ -1,296 +1,273 @@
 # reports/generators.py
 # ¡Aquí es donde vive la lógica pesada!
+#
+# Cada reporte se describe en REPORTES (consulta, columnas, hoja, plantilla) y
+# tiene dos funciones:
+#   - construir_reporte_*(empresa, ...) -> (contenido, content_type, nombre_archivo)
+#     No depende del 'request', así la puede usar el worker de trabajos (reports/jobs.py).
+#     Con stream=True el CSV se devuelve como un iterador de bloques de texto.
+#   - generar_reporte_*(request, ...) -> HttpResponse
+#     La que usan las vistas.
 
-from django.http import HttpResponse
-from django.template.loader import render_to_string
-from django.db.models import Sum, Count
-from django.utils import timezone
-from io import BytesIO
+from django.http import HttpResponse, StreamingHttpResponse
+from itertools import chain
 import pandas as pd
-from weasyprint import HTML
 
-from ventas.models import DetalleVenta, Venta, Pago
+from . import cache as cache_reportes
+from . import columnar, particiones, pdf, prerender, rollups, streaming
+
+CONTENT_TYPES = {
+    'pdf': 'application/pdf',
+    'excel': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'csv': 'text/csv',
+    'parquet': 'application/vnd.apache.parquet',
+    'arrow': 'application/vnd.apache.arrow.file',
+}
+EXTENSIONES = {'pdf': 'pdf', 'excel': 'xlsx', 'csv': 'csv', 'parquet': 'parquet', 'arrow': 'arrow'}
+
+
+class ReporteError(Exception):
+    """
+    Error "esperado" de un reporte (sin datos, formato no soportado).
+    Lleva el mensaje y el código HTTP que debe devolver la vista.
+    """
+    def __init__(self, mensaje, status=400):
+        super().__init__(mensaje)
+        self.mensaje = mensaje
+        self.status = status
+
+
+def _leer(datos_reporte, formato, stream=False, rango=None):
+    """
+    Ejecuta la consulta del reporte UNA sola vez (sin exists() previo).
+    Devuelve (filas, primera_fila); primera_fila es None si no hay datos.
+    CSV en streaming, Excel y los formatos columnares leen del cursor
+    (iterador); el resto, una lista. Los rangos largos ('rango') se agregan
+    por particiones de meses en paralelo (reports/particiones.py).
+    """
+    if formato in columnar.FORMATOS and not columnar.disponible():
+        raise ReporteError(f"El formato '{formato}' requiere pyarrow instalado.", status=400)
+    if rango and particiones.aplica(*rango):
+        filas = particiones.leer(datos_reporte, *rango)
+        return filas, (filas[0] if filas else None)
+    if (stream and formato == 'csv') or formato == 'excel' or formato in columnar.FORMATOS:
+        iterador = datos_reporte.iterator(chunk_size=streaming.TAMANO_LOTE)
+        primera = next(iterador, None)
+        if primera is None:
+            return iter(()), None
+        return chain([primera], iterador), primera
+    filas = list(datos_reporte)
+    return filas, (filas[0] if filas else None)
+
+
+def _archivo(formato, filas, filename_base, plantilla, context, columnas, hoja, stream=False, consulta=None):
+    """
+    Genera los bytes del reporte en el formato pedido.
+    'consulta' es el queryset de origen: de sus campos salen los tipos de parquet/arrow.
+    """
+    if formato == 'csv' and stream:
+        # Sin DataFrame: las filas van del cursor de la BD directo a la respuesta
+        contenido = streaming.lineas_csv(
+            list(columnas.values()),
+            streaming.filas_de_registros(filas, list(columnas)),
+        )
+
+    elif formato in columnar.FORMATOS:
+        contenido = columnar.escribir(formato, filas, consulta, columnas)
+
+    elif formato == 'pdf':
+        # Pool de procesos con fuentes y CSS ya cargados (reports/pdf.py)
+        contenido = pdf.renderizar(plantilla, context)
+
+    elif formato == 'excel':
+        # Modo write-only: las filas van del cursor a la hoja sin DataFrame
+        contenido = streaming.libro_excel(
+            hoja,
+            list(columnas.values()),
+            streaming.filas_de_registros(filas, list(columnas)),
+        )
+
+    elif formato == 'csv':
+        # Solo las columnas del reporte (las filas pueden traer totales de ventana)
+        df = pd.DataFrame(list(filas), columns=list(columnas))
+        df.rename(columns=columnas, inplace=True)
+        contenido = df.to_csv(index=False, encoding='utf-8').encode('utf-8')
+
+    else:
+        raise ReporteError(f"Formato '{formato}' no soportado.", status=400)
+
+    return contenido, CONTENT_TYPES[formato], f"{filename_base}.{EXTENSIONES[formato]}"
+
+
+def generar_archivo(reporte, formato, filas, primera, consulta, fecha_inicio, fecha_fin, stream=False):
+    """
+    Arma el archivo de un reporte a partir de filas ya leídas (lista o
+    iterador) y de su primera fila. Lo usan los constructores y los paquetes
+    de reportes (reports/paquetes.py), que leen cada consulta una sola vez.
+    """
+    definicion = REPORTES[reporte]
 
-# --- FUNCIÓN 1: REPORTE DE PRODUCTO ---
-def generar_reporte_producto(request, formato, fecha_inicio, fecha_fin):
-    
     # Preparamos las fechas para el nombre del archivo
     fecha_inicio_str = fecha_inicio.strftime('%Y-%m-%d')
     fecha_fin_str = fecha_fin.strftime('%Y-%m-%d')
 
-    # 1. Consulta Base
-    base_query = Venta.objects.filter(
-        estado='Completado',
-        empresa=request.user.empresa
-    )
-    ventas_filtradas = base_query.filter(
-        fecha__range=[fecha_inicio, fecha_fin]
+    context = {
+        'datos': filas,
+        'datos_reporte': filas,
+        'fecha_inicio_str': fecha_inicio_str, 'fecha_fin_str': fecha_fin_str,
+    }
+    if definicion.get('totales'):
+        # Los totales generales vienen en cada fila (función de ventana)
+        context['total_general'] = {campo: primera[campo] for campo in definicion['totales']}
+
+    return _archivo(
+        formato, filas,
+        f"{definicion['archivo']}_DESDE_{fecha_inicio_str}_HASTA_{fecha_fin_str}",
+        definicion['plantilla'], context,
+        columnas=definicion['columnas'],
+        hoja=definicion['hoja'], stream=stream, consulta=consulta,
     )
-    
-    if not ventas_filtradas.exists():
-        return HttpResponse("No se encontraron ventas para este rango.", status=404)
-
-    # 2. Consulta Específica del Reporte
-    ventas_ids = ventas_filtradas.values_list('id', flat=True)
-    datos_reporte = DetalleVenta.objects.filter(
-        venta__id__in=ventas_ids
-    ).values(
-        'producto__nombre', 'producto__sku'
-    ).annotate(
-        cantidad_total=Sum('cantidad'),
-        ingresos_totales=Sum('subtotal')
-    ).order_by('-ingresos_totales')
-
-    if not datos_reporte:
-        return HttpResponse("Sin datos de detalle de venta.", status=404)
-        
-    filename_base = f"reporte_producto_DESDE_{fecha_inicio_str}_HASTA_{fecha_fin_str}"
-
-    # 3. Generación de Archivo
-    if formato == 'pdf':
-        total_general = datos_reporte.aggregate(
-            total_cantidad=Sum('cantidad_total'),
-            total_ingresos=Sum('ingresos_totales')
+
+
+def _construir(reporte, empresa, formato, fecha_inicio, fecha_fin, stream=False):
+    # Consulta sobre el rollup diario (no re-escanea Venta/DetalleVenta/Pago)
+    consulta = REPORTES[reporte]['consulta'](empresa, fecha_inicio, fecha_fin)
+    filas, primera = _leer(consulta, formato, stream, rango=(fecha_inicio, fecha_fin))
+
+    if primera is None:
+        raise ReporteError(REPORTES[reporte]['sin_datos'], status=404)
+
+    return generar_archivo(reporte, formato, filas, primera, consulta, fecha_inicio, fecha_fin, stream)
+
+
+def construir_reporte(reporte, empresa, formato, fecha_inicio, fecha_fin, stream=False):
+    """
+    Punto de entrada común (vistas y trabajos): pasa por la caché de reportes.
+    Los CSV en streaming no se cachean, justamente para no tenerlos en memoria.
+    """
+    clave = cache_reportes.clave_resultado(empresa, reporte, formato, fecha_inicio, fecha_fin)
+    en_cache = cache_reportes.obtener(clave)
+    if en_cache is not None:
+        return en_cache
+
+    resultado = _construir(reporte, empresa, formato, fecha_inicio, fecha_fin, stream=stream)
+    if isinstance(resultado[0], bytes):
+        cache_reportes.guardar(clave, resultado, tamano=len(resultado[0]))
+    return resultado
+
+
+def _responder(reporte, request, formato, fecha_inicio, fecha_fin):
+    # Rangos estándar: si el comando nocturno ya lo generó con los mismos datos, se sirve tal cual
+    encontrado = prerender.buscar(reporte, request.user.empresa, formato, fecha_inicio, fecha_fin)
+    if encontrado is not None:
+        return prerender.responder(request, *encontrado)
+
+    try:
+        contenido, content_type, nombre_archivo = construir_reporte(
+            reporte, request.user.empresa, formato, fecha_inicio, fecha_fin, stream=True
         )
-        context = {
-            'datos': datos_reporte, 'total_general': total_general,
-            'fecha_inicio_str': fecha_inicio_str, 'fecha_fin_str': fecha_fin_str,
-        }
-        html_string = render_to_string('reports/ventas_por_producto.html', context)
-        pdf_file = HTML(string=html_string).write_pdf()
-        response = HttpResponse(pdf_file, content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="{filename_base}.pdf"'
-        return response
-
-    elif formato == 'excel' or formato == 'csv':
-        df = pd.DataFrame(list(datos_reporte))
-        df.rename(columns={
-            'producto__nombre': 'Producto', 'producto__sku': 'SKU',
-            'cantidad_total': 'Cantidad Vendida', 'ingresos_totales': 'Ingresos Totales (Bs.)'
-        }, inplace=True)
-        
-        if formato == 'excel':
-            output = BytesIO()
-            with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                df.to_excel(writer, sheet_name='Ventas_por_Producto', index=False)
-            output.seek(0)
-            response = HttpResponse(output, content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-            response['Content-Disposition'] = f'attachment; filename="{filename_base}.xlsx"'
-            return response
-        
-        elif formato == 'csv':
-            csv_data = df.to_csv(index=False, encoding='utf-8')
-            response = HttpResponse(csv_data, content_type='text/csv')
-            response['Content-Disposition'] = f'attachment; filename="{filename_base}.csv"'
-            return response
-            
-    return HttpResponse(f"Formato '{formato}' no soportado.", status=400)
+    except ReporteError as e:
+        return HttpResponse(e.mensaje, status=e.status)
 
+    if isinstance(contenido, bytes):
+        response = HttpResponse(contenido, content_type=content_type)
+    else:
+        response = StreamingHttpResponse(contenido, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{nombre_archivo}"'
+    return response
 
-# --- FUNCIÓN 2: REPORTE DE SUCURSAL ---
-def generar_reporte_sucursal(request, formato, fecha_inicio, fecha_fin):
-    
-    fecha_inicio_str = fecha_inicio.strftime('%Y-%m-%d')
-    fecha_fin_str = fecha_fin.strftime('%Y-%m-%d')
 
-    # 1. Consulta Base
-    base_query = Venta.objects.filter(
-        estado='Completado',
-        empresa=request.user.empresa
-    )
-    ventas_filtradas = base_query.filter(
-        fecha__range=[fecha_inicio, fecha_fin]
-    )
-    
-    if not ventas_filtradas.exists():
-        return HttpResponse("No se encontraron ventas para este rango.", status=404)
-
-    # 2. Consulta Específica del Reporte
-    datos_reporte = ventas_filtradas.values(
-        'sucursal__nombre'
-    ).annotate(
-        numero_ventas=Count('id'),
-        ingresos_totales=Sum('total')
-    ).order_by('-ingresos_totales')
-
-    if not datos_reporte:
-        return HttpResponse("Sin datos para el reporte.", status=404)
-        
-    filename_base = f"reporte_sucursal_DESDE_{fecha_inicio_str}_HASTA_{fecha_fin_str}"
-
-    # 3. Generación de Archivo
-    if formato == 'pdf':
-        context = {
-            'datos_reporte': datos_reporte, # Tu plantilla usa 'datos_reporte' o 'datos'?
-            'datos': datos_reporte, # Añadimos ambos por si acaso
-            'fecha_inicio_str': fecha_inicio_str, 'fecha_fin_str': fecha_fin_str,
-        }
-        html_string = render_to_string('reports/ventas_por_sucursal.html', context)
-        pdf_file = HTML(string=html_string).write_pdf()
-        response = HttpResponse(pdf_file, content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="{filename_base}.pdf"'
-        return response
-
-    elif formato == 'excel' or formato == 'csv':
-        df = pd.DataFrame(list(datos_reporte))
-        df.rename(columns={
+# --- DEFINICIÓN DE LOS REPORTES ---
+# Mismos nombres que 'reporte_a_generar' del NLP (reports/nlp_utils.py)
+REPORTES = {
+    # La consulta de producto trae también los totales generales (ventana)
+    'ventas_producto': {
+        'consulta': rollups.ventas_por_producto,
+        'sin_datos': "No se encontraron ventas para este rango.",
+        'archivo': 'reporte_producto',
+        'plantilla': 'reports/ventas_por_producto.html',
+        'columnas': {
+            'producto__nombre': 'Producto', 'producto__sku': 'SKU',
+            'cantidad_total': 'Cantidad Vendida', 'ingresos_totales': 'Ingresos Totales (Bs.)'
+        },
+        'hoja': 'Ventas_por_Producto',
+        'totales': ('total_cantidad', 'total_ingresos'),
+    },
+    'ventas_sucursal': {
+        'consulta': rollups.ventas_por_sucursal,
+        'sin_datos': "No se encontraron ventas para este rango.",
+        'archivo': 'reporte_sucursal',
+        'plantilla': 'reports/ventas_por_sucursal.html',
+        'columnas': {
             'sucursal__nombre': 'Sucursal',
             'numero_ventas': 'Cantidad de Ventas',
             'ingresos_totales': 'Ingresos Totales (Bs.)'
-        }, inplace=True)
-        
-        if formato == 'excel':
-            output = BytesIO()
-            with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                df.to_excel(writer, sheet_name='Ventas_por_Sucursal', index=False)
-            output.seek(0)
-            response = HttpResponse(output, content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-            response['Content-Disposition'] = f'attachment; filename="{filename_base}.xlsx"'
-            return response
-        
-        elif formato == 'csv':
-            csv_data = df.to_csv(index=False, encoding='utf-8')
-            response = HttpResponse(csv_data, content_type='text/csv')
-            response['Content-Disposition'] = f'attachment; filename="{filename_base}.csv"'
-            return response
-            
-    return HttpResponse(f"Formato '{formato}' no soportado.", status=400)
+        },
+        'hoja': 'Ventas_por_Sucursal',
+    },
+    # canal='POS' (el default de la consulta) es el filtro clave de este reporte
+    'ventas_vendedor': {
+        'consulta': rollups.ventas_por_vendedor,
+        'sin_datos': "No se encontraron ventas de VENDEDOR (POS) para este rango.",
+        'archivo': 'reporte_vendedor',
+        'plantilla': 'reports/ventas_por_vendedor.html',
+        'columnas': {
+            'usuario__email': 'Email Vendedor', 'usuario__nombre': 'Nombre',
+            'usuario__apellido': 'Apellido', 'numero_ventas': 'Cantidad de Ventas',
+            'ingresos_totales': 'Ingresos Totales (Bs.)'
+        },
+        'hoja': 'Ventas_por_Vendedor',
+    },
+    'ingresos_metodo_pago': {
+        'consulta': rollups.ingresos_por_metodo_pago,
+        'sin_datos': "No se encontraron pagos para este rango.",
+        'archivo': 'reporte_metodo_pago',
+        'plantilla': 'reports/ingresos_por_metodo.html',
+        'columnas': {
+            'metodo__nombre': 'Método de Pago',
+            'numero_pagos': 'Cantidad de Pagos',
+            'monto_total': 'Monto Total (Bs.)'
+        },
+        'hoja': 'Ingresos_por_Metodo',
+    },
+}
+
+
+# --- FUNCIÓN 1: REPORTE DE PRODUCTO ---
+def construir_reporte_producto(empresa, formato, fecha_inicio, fecha_fin, stream=False):
+    return _construir('ventas_producto', empresa, formato, fecha_inicio, fecha_fin, stream)
+
+def generar_reporte_producto(request, formato, fecha_inicio, fecha_fin):
+    return _responder('ventas_producto', request, formato, fecha_inicio, fecha_fin)
+
+
+# --- FUNCIÓN 2: REPORTE DE SUCURSAL ---
+def construir_reporte_sucursal(empresa, formato, fecha_inicio, fecha_fin, stream=False):
+    return _construir('ventas_sucursal', empresa, formato, fecha_inicio, fecha_fin, stream)
+
+def generar_reporte_sucursal(request, formato, fecha_inicio, fecha_fin):
+    return _responder('ventas_sucursal', request, formato, fecha_inicio, fecha_fin)
 
 
 # --- FUNCIÓN 3: REPORTE DE VENDEDOR ---
-def generar_reporte_vendedor(request, formato, fecha_inicio, fecha_fin):
-    
-    fecha_inicio_str = fecha_inicio.strftime('%Y-%m-%d')
-    fecha_fin_str = fecha_fin.strftime('%Y-%m-%d')
+def construir_reporte_vendedor(empresa, formato, fecha_inicio, fecha_fin, stream=False):
+    return _construir('ventas_vendedor', empresa, formato, fecha_inicio, fecha_fin, stream)
 
-    # 1. Consulta Base
-    base_query = Venta.objects.filter(
-        estado='Completado',
-        empresa=request.user.empresa,
-        canal='POS' # El filtro clave de este reporte
-    )
-    ventas_filtradas = base_query.filter(
-        fecha__range=[fecha_inicio, fecha_fin]
-    )
-    
-    if not ventas_filtradas.exists():
-        return HttpResponse("No se encontraron ventas de VENDEDOR (POS) para este rango.", status=404)
-
-    # 2. Consulta Específica del Reporte
-    datos_reporte = ventas_filtradas.values(
-        'usuario__email', 'usuario__nombre', 'usuario__apellido',
-    ).annotate(
-        numero_ventas=Count('id'),
-        ingresos_totales=Sum('total')
-    ).order_by('-ingresos_totales')
-
-    if not datos_reporte:
-        return HttpResponse("Sin datos para el reporte.", status=404)
-        
-    filename_base = f"reporte_vendedor_DESDE_{fecha_inicio_str}_HASTA_{fecha_fin_str}"
-
-    # 3. Generación de Archivo
-    if formato == 'pdf':
-        context = {
-            'datos_reporte': datos_reporte,
-            'fecha_inicio_str': fecha_inicio_str, 'fecha_fin_str': fecha_fin_str,
-        }
-        html_string = render_to_string('reports/ventas_por_vendedor.html', context)
-        pdf_file = HTML(string=html_string).write_pdf()
-        response = HttpResponse(pdf_file, content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="{filename_base}.pdf"'
-        return response
-
-    elif formato == 'excel' or formato == 'csv':
-        df = pd.DataFrame(list(datos_reporte))
-        df.rename(columns={
-            'usuario__email': 'Email Vendedor', 'usuario__nombre': 'Nombre',
-            'usuario__apellido': 'Apellido', 'numero_ventas': 'Cantidad de Ventas',
-            'ingresos_totales': 'Ingresos Totales (Bs.)'
-        }, inplace=True)
-        
-        if formato == 'excel':
-            output = BytesIO()
-            with pd.ExcelWriter(output, engine='openpyl') as writer:
-                df.to_excel(writer, sheet_name='Ventas_por_Vendedor', index=False)
-            output.seek(0)
-            response = HttpResponse(output, content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-            response['Content-Disposition'] = f'attachment; filename="{filename_base}.xlsx"'
-            return response
-        
-        elif formato == 'csv':
-            csv_data = df.to_csv(index=False, encoding='utf-8')
-            response = HttpResponse(csv_data, content_type='text/csv')
-            response['Content-Disposition'] = f'attachment; filename="{filename_base}.csv"'
-            return response
-            
-    return HttpResponse(f"Formato '{formato}' no soportado.", status=400)
+def generar_reporte_vendedor(request, formato, fecha_inicio, fecha_fin):
+    return _responder('ventas_vendedor', request, formato, fecha_inicio, fecha_fin)
 
 
 # --- FUNCIÓN 4: REPORTE DE MÉTODO DE PAGO ---
+def construir_reporte_metodo_pago(empresa, formato, fecha_inicio, fecha_fin, stream=False):
+    return _construir('ingresos_metodo_pago', empresa, formato, fecha_inicio, fecha_fin, stream)
+
 def generar_reporte_metodo_pago(request, formato, fecha_inicio, fecha_fin):
-    
-    fecha_inicio_str = fecha_inicio.strftime('%Y-%m-%d')
-    fecha_fin_str = fecha_fin.strftime('%Y-%m-%d')
+    return _responder('ingresos_metodo_pago', request, formato, fecha_inicio, fecha_fin)
 
-    # 1. Consulta Base
-    base_query = Pago.objects.filter(
-        estado='completado',
-        empresa=request.user.empresa
-    )
-    pagos_filtrados = base_query.filter(
-        fecha__range=[fecha_inicio, fecha_fin]
-    )
-    
-    if not pagos_filtrados.exists():
-        return HttpResponse("No se encontraron pagos para este rango.", status=404)
-
-    # 2. Consulta Específica del Reporte
-    datos_reporte = pagos_filtrados.values(
-        'metodo__nombre'
-    ).annotate(
-        numero_pagos=Count('id'),
-        monto_total=Sum('monto')
-    ).order_by('-monto_total')
-
-    if not datos_reporte:
-        return HttpResponse("Sin datos para el reporte.", status=404)
-        
-    filename_base = f"reporte_metodo_pago_DESDE_{fecha_inicio_str}_HASTA_{fecha_fin_str}"
-
-    # 3. Generación de Archivo
-    if formato == 'pdf':
-        context = {
-            'datos_reporte': datos_reporte,
-            'fecha_inicio_str': fecha_inicio_str, 'fecha_fin_str': fecha_fin_str,
-        }
-        html_string = render_to_string('reports/ingresos_por_metodo.html', context)
-        pdf_file = HTML(string=html_string).write_pdf()
-        response = HttpResponse(pdf_file, content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="{filename_base}.pdf"'
-        return response
-
-    elif formato == 'excel' or formato == 'csv':
-        df = pd.DataFrame(list(datos_reporte))
-        df.rename(columns={
-            'metodo__nombre': 'Método de Pago',
-            'numero_pagos': 'Cantidad de Pagos',
-            'monto_total': 'Monto Total (Bs.)'
-        }, inplace=True)
-        
-        if formato == 'excel':
-            output = BytesIO()
-            with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                df.to_excel(writer, sheet_name='Ingresos_por_Metodo', index=False)
-            output.seek(0)
-            response = HttpResponse(output, content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-            response['Content-Disposition'] = f'attachment; filename="{filename_base}.xlsx"'
-            return response
-        
-        elif formato == 'csv':
-            csv_data = df.to_csv(index=False, encoding='utf-8')
-            response = HttpResponse(csv_data, content_type='text/csv')
-            response['Content-Disposition'] = f'attachment; filename="{filename_base}.csv"'
-            return response
-            
-    return HttpResponse(f"Formato '{formato}' no soportado.", status=400)
\ No newline at end of file
+
+CONSTRUCTORES = {
+    'ventas_producto': construir_reporte_producto,
+    'ventas_sucursal': construir_reporte_sucursal,
+    'ventas_vendedor': construir_reporte_vendedor,
+    'ingresos_metodo_pago': construir_reporte_metodo_pago,
+}
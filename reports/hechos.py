@@ -0,0 +1,120 @@
+# reports/hechos.py
+# Lectura y refresco de la vista materializada de hechos de venta (mv_hechos_venta).
+#
+# La vista (migración 0005, solo PostgreSQL) ya trae unidas venta, detalle,
+# producto, subcategoría, sucursal, vendedor, pago y método de pago: las
+# consultas analíticas la leen con el modelo no gestionado HechoVenta en vez de
+# hacer los JOIN en cada petición.
+#
+# Los datos tienen la antigüedad del último refresco ('refrescar_hechos', p. ej.
+# desde cron). Si la vista no existe (otra base de datos), nunca se refrescó o
+# es más vieja que REPORTES_HECHOS_MAX_ANTIGUEDAD, se usan las tablas de siempre.
+
+import logging
+import time
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import HechoVenta, RefrescoVista
+
+logger = logging.getLogger(__name__)
+
+VISTA = HechoVenta._meta.db_table
+
+# Columnas de la exportación de líneas de venta leídas desde la vista
+COLUMNAS_LINEAS = {
+    'numero_nota': 'Nota de Venta',
+    'fecha': 'Fecha',
+    'sucursal_nombre': 'Sucursal',
+    'vendedor_email': 'Vendedor',
+    'canal': 'Canal',
+    'producto_sku': 'SKU',
+    'producto_nombre': 'Producto',
+    'cantidad': 'Cantidad',
+    'precio_unitario': 'Precio Unitario (Bs.)',
+    'subtotal': 'Subtotal (Bs.)',
+}
+
+
+def soportada():
+    return connection.vendor == 'postgresql'
+
+
+def _poblada():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT ispopulated FROM pg_matviews WHERE matviewname = %s", [VISTA])
+        fila = cursor.fetchone()
+    return bool(fila and fila[0])
+
+
+def refrescar(concurrente=True):
+    """
+    REFRESH MATERIALIZED VIEW [CONCURRENTLY]. CONCURRENTLY no bloquea las
+    lecturas (usa el índice único sobre 'id'), pero exige que la vista ya
+    tenga datos: la primera vez se refresca de forma normal.
+    Devuelve el RefrescoVista actualizado.
+    """
+    if not soportada():
+        raise RuntimeError("Las vistas materializadas solo existen en PostgreSQL.")
+
+    concurrente = concurrente and _poblada()
+    inicio = time.perf_counter()
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"REFRESH MATERIALIZED VIEW {'CONCURRENTLY ' if concurrente else ''}{connection.ops.quote_name(VISTA)}"
+            )
+        duracion_ms = int((time.perf_counter() - inicio) * 1000)
+        refresco, _ = RefrescoVista.objects.update_or_create(
+            vista=VISTA,
+            defaults={'refrescada_en': timezone.now(), 'duracion_ms': duracion_ms},
+        )
+    logger.info("Vista %s refrescada (%s) en %d ms", VISTA, 'concurrente' if concurrente else 'completa', duracion_ms)
+    return refresco
+
+
+def actualizada_en():
+    """Momento del último refresco, o None si la vista no está disponible."""
+    if not soportada():
+        return None
+    return RefrescoVista.objects.filter(vista=VISTA).values_list('refrescada_en', flat=True).first()
+
+
+def vigente():
+    """
+    Devuelve la fecha del último refresco si la vista se puede usar para
+    reportes (activada y no más vieja que REPORTES_HECHOS_MAX_ANTIGUEDAD), o None.
+    """
+    if not getattr(settings, 'REPORTES_USAR_VISTA_HECHOS', True):
+        return None
+    refrescada = actualizada_en()
+    if refrescada is None:
+        return None
+    antiguedad = (timezone.now() - refrescada).total_seconds()
+    if antiguedad > getattr(settings, 'REPORTES_HECHOS_MAX_ANTIGUEDAD', 60 * 60):
+        return None
+    return refrescada
+
+
+def lineas(empresa, fecha_inicio, fecha_fin):
+    """Líneas de venta completadas del rango, con las mismas columnas que la exportación."""
+    return HechoVenta.objects.filter(
+        estado='Completado',
+        empresa=empresa,
+        fecha__range=[fecha_inicio, fecha_fin],
+    ).order_by(
+        'fecha', 'venta_id', 'id'
+    ).values(*COLUMNAS_LINEAS)
+
+
+def marcar_antiguedad(response, refrescada):
+    """
+    Indicador de frescura en la respuesta: cuándo se refrescaron los datos y
+    cuántos segundos tienen. Sin vista (datos en vivo) no se agrega nada.
+    """
+    if refrescada is not None:
+        response['X-Datos-Actualizados-En'] = refrescada.isoformat()
+        response['X-Datos-Antiguedad-Segundos'] = str(int((timezone.now() - refrescada).total_seconds()))
+    return response
@@ -0,0 +1,144 @@
+# reports/jobs.py
+# Trabajos de exportación asíncronos.
+#
+# Las vistas crean un ReportRun y devuelven su id al instante; un pool de
+# hilos local (por proceso) genera el archivo con generators.construir_reporte y lo
+# guarda en ReportRun.archivo. Así un PDF pesado no bloquea un worker de gunicorn.
+
+import datetime
+import hashlib
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import IntegrityError, close_old_connections, connection, transaction
+from django.utils import timezone
+
+from . import generators
+from .models import ReportDefinition, ReportRun
+
+logger = logging.getLogger(__name__)
+
+EN_CURSO = ('PENDING', 'RUNNING')
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'REPORTES_WORKERS', 2),
+                thread_name_prefix='reportes',
+            )
+        return _executor
+
+
+def calcular_clave(empresa_id, reporte, formato, fecha_inicio, fecha_fin):
+    base = json.dumps(
+        [empresa_id, reporte, formato, fecha_inicio.isoformat(), fecha_fin.isoformat()]
+    )
+    return hashlib.sha256(base.encode('utf-8')).hexdigest()
+
+
+def _definicion(reporte):
+    definicion, _ = ReportDefinition.objects.get_or_create(
+        slug=reporte,
+        defaults={'nombre': reporte.replace('_', ' ').capitalize(), 'tipo': 'ventas'},
+    )
+    return definicion
+
+
+def _expirar_colgados():
+    """
+    Los trabajos viven en memoria del proceso: si se reinicia, los que
+    quedaron PENDING/RUNNING nunca terminan. Los marcamos como FAILED para
+    que no bloqueen la deduplicación.
+    """
+    limite = timezone.now() - datetime.timedelta(
+        seconds=getattr(settings, 'REPORTES_JOB_TIMEOUT', 15 * 60)
+    )
+    ReportRun.objects.filter(estado__in=EN_CURSO, created_at__lt=limite).update(
+        estado='FAILED', error='Trabajo expirado.', finished_at=timezone.now()
+    )
+
+
+def encolar(empresa, usuario, reporte, formato, fecha_inicio, fecha_fin):
+    """
+    Crea (o reutiliza) el trabajo para esos parámetros.
+    Devuelve (report_run, creado). Si ya hay uno idéntico en curso, lo devuelve
+    con creado=False en vez de generar el archivo dos veces.
+    """
+    if reporte not in generators.REPORTES:
+        raise generators.ReporteError(f"El reporte '{reporte}' no es un tipo de reporte válido.")
+    if formato not in generators.EXTENSIONES:
+        raise generators.ReporteError(f"Formato '{formato}' no soportado.")
+
+    empresa_id = getattr(empresa, 'id', None)
+    clave = calcular_clave(empresa_id, reporte, formato, fecha_inicio, fecha_fin)
+    _expirar_colgados()
+
+    existente = ReportRun.objects.filter(clave=clave, estado__in=EN_CURSO).first()
+    if existente:
+        return existente, False
+
+    try:
+        with transaction.atomic():
+            run = ReportRun.objects.create(
+                report=_definicion(reporte),
+                empresa=empresa,
+                solicitado_por=usuario,
+                formato=formato,
+                filtros={
+                    'fecha_inicio': fecha_inicio.isoformat(),
+                    'fecha_fin': fecha_fin.isoformat(),
+                },
+                clave=clave,
+            )
+    except IntegrityError:
+        # Otra petición idéntica ganó la carrera (constraint report_run_clave_en_curso)
+        return ReportRun.objects.get(clave=clave, estado__in=EN_CURSO), False
+
+    transaction.on_commit(lambda: _get_executor().submit(ejecutar, run.id))
+    return run, True
+
+
+def ejecutar(run_id):
+    """Genera el archivo de un trabajo. Corre en un hilo del pool."""
+    close_old_connections()
+    try:
+        run = ReportRun.objects.select_related('report', 'empresa').get(pk=run_id)
+        if run.estado != 'PENDING':
+            return
+        run.estado = 'RUNNING'
+        run.started_at = timezone.now()
+        run.save(update_fields=['estado', 'started_at'])
+
+        try:
+            contenido, _, nombre_archivo = generators.construir_reporte(
+                run.report.slug, run.empresa, run.formato,
+                datetime.datetime.fromisoformat(run.filtros['fecha_inicio']),
+                datetime.datetime.fromisoformat(run.filtros['fecha_fin']),
+            )
+            run.archivo.save(nombre_archivo, ContentFile(contenido), save=False)
+            run.estado = 'DONE'
+        except generators.ReporteError as e:
+            run.estado = 'FAILED'
+            run.error = e.mensaje
+        except Exception as e:
+            logger.exception("Falló el trabajo de reporte %s", run_id)
+            run.estado = 'FAILED'
+            run.error = f"{type(e).__name__}: {e}"
+
+        run.finished_at = timezone.now()
+        run.save(update_fields=['estado', 'archivo', 'error', 'finished_at'])
+    except Exception:
+        logger.exception("No se pudo procesar el trabajo de reporte %s", run_id)
+    finally:
+        # Cada hilo del pool abre su propia conexión: la cerramos al terminar
+        connection.close()
@@ -0,0 +1,112 @@
+import datetime
+import multiprocessing
+import random
+import resource
+import time
+from decimal import Decimal
+from io import BytesIO
+
+import pandas as pd
+from django.core.management.base import BaseCommand
+
+from reports import streaming
+
+COLUMNAS = {
+    'numero_nota': 'Nota de Venta',
+    'fecha': 'Fecha',
+    'sucursal': 'Sucursal',
+    'vendedor': 'Vendedor',
+    'canal': 'Canal',
+    'sku': 'SKU',
+    'producto': 'Producto',
+    'cantidad': 'Cantidad',
+    'precio_unitario': 'Precio Unitario (Bs.)',
+    'subtotal': 'Subtotal (Bs.)',
+}
+
+
+def _lineas(total, semilla=1):
+    """Líneas de venta sintéticas (mismas columnas que /exportar/lineas-venta/)."""
+    aleatorio = random.Random(semilla)
+    inicio = datetime.datetime(2025, 1, 1)
+    for i in range(total):
+        cantidad = aleatorio.randint(1, 5)
+        precio = Decimal(aleatorio.randint(500, 500000)) / 100
+        yield {
+            'numero_nota': f'N-{i // 3}',
+            'fecha': inicio + datetime.timedelta(minutes=i),
+            'sucursal': f'Sucursal {aleatorio.randint(1, 5)}',
+            'vendedor': f'vendedor{aleatorio.randint(1, 20)}@smartsales.com',
+            'canal': aleatorio.choice(['POS', 'WEB']),
+            'sku': f'SKU-{aleatorio.randint(1, 500):04d}',
+            'producto': f'Producto {aleatorio.randint(1, 500)}',
+            'cantidad': cantidad,
+            'precio_unitario': precio,
+            'subtotal': precio * cantidad,
+        }
+
+
+def _anterior(registros):
+    """El camino anterior: DataFrame completo + pd.ExcelWriter(openpyxl) normal."""
+    df = pd.DataFrame(list(registros))
+    df.rename(columns=COLUMNAS, inplace=True)
+    output = BytesIO()
+    with pd.ExcelWriter(output, engine='openpyxl') as writer:
+        df.to_excel(writer, sheet_name='Lineas_de_Venta', index=False)
+    return output.getvalue()
+
+
+def _write_only(registros):
+    """El camino actual: openpyxl write-only, fila a fila desde el iterador."""
+    return streaming.libro_excel(
+        'Lineas_de_Venta',
+        list(COLUMNAS.values()),
+        streaming.filas_de_registros(registros, list(COLUMNAS)),
+    )
+
+
+VARIANTES = {
+    'anterior': _anterior,
+    'write_only': _write_only,
+}
+
+
+def _medir(nombre, total, resultados):
+    """
+    Corre en un proceso hijo (fork) para que el pico de RSS de una variante
+    no contamine a la otra. Devuelve (segundos, MB de RSS pico añadidos, bytes).
+    """
+    rss_inicial = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    inicio = time.perf_counter()
+    # Las filas se generan de forma perezosa, como al leer del cursor de la BD
+    contenido = VARIANTES[nombre](_lineas(total))
+    segundos = time.perf_counter() - inicio
+    rss_pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    resultados.put((segundos, (rss_pico - rss_inicial) / 1024, len(contenido)))
+
+
+class Command(BaseCommand):
+    help = "⏱️ Compara memoria y latencia al generar un Excel grande (DataFrame + ExcelWriter vs. write-only)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--filas', type=int, default=200000, help='Líneas de venta sintéticas a exportar.')
+
+    def handle(self, *args, **options):
+        total = options['filas']
+        self.stdout.write(self.style.HTTP_INFO(f"⏳ Generando Excel de {total} líneas con cada variante..."))
+
+        contexto = multiprocessing.get_context('fork')
+        for nombre in VARIANTES:
+            resultados = contexto.Queue()
+            proceso = contexto.Process(target=_medir, args=(nombre, total, resultados))
+            proceso.start()
+            segundos, rss_mb, tamano = resultados.get()
+            proceso.join()
+
+            self.stdout.write(
+                f"  {nombre:<11} tiempo={segundos:8.2f} s  "
+                f"RSS pico +{rss_mb:8.1f} MB  "
+                f"archivo={tamano / 1024 / 1024:6.1f} MB"
+            )
+
+        self.stdout.write(self.style.SUCCESS("🎉 Benchmark terminado."))
@@ -0,0 +1,191 @@
+import datetime
+import os
+import random
+import statistics
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import override_settings
+
+from products.models import Producto
+from reports import generators, particiones
+from reports.models import PagoDiarioMetodo, VentaDiariaProducto, VentaDiariaSucursal, VentaDiariaVendedor
+from sucursales.models import Sucursal
+from tenants.models import Empresa
+from users.models import User
+from ventas.models import Metodo_pago
+
+# Fin fijo del rango: los resultados son comparables entre commits
+HASTA = datetime.date(2025, 12, 31)
+LOTE = 5000
+
+
+# --- ROLLUPS SINTÉTICOS ---
+# Lo que se reparte por particiones es la agregación sobre los rollups diarios:
+# el dataset se escribe directamente en ellos (años de ventas sin las tablas fuente).
+
+def _empresa(semilla):
+    empresa, _ = Empresa.objects.get_or_create(
+        nit=f'BENCH-PART-{semilla}', defaults={'nombre': f'Benchmark particiones {semilla}'}
+    )
+    return empresa
+
+
+def _borrar_rollups(empresa):
+    for modelo in (VentaDiariaProducto, VentaDiariaSucursal, VentaDiariaVendedor, PagoDiarioMetodo):
+        modelo.objects.filter(empresa=empresa).delete()
+
+
+def generar_rollups(empresa, semilla, desde, productos, sucursales, densidad, escribir):
+    """Filas diarias reproducibles (misma semilla = mismos datos) por cada dimensión."""
+    aleatorio = random.Random(semilla)
+
+    lista_sucursales = [
+        Sucursal.objects.get_or_create(empresa=empresa, nombre=f'Sucursal {i + 1:02d}')[0]
+        for i in range(sucursales)
+    ]
+    lista_metodos = [
+        Metodo_pago.objects.get_or_create(empresa=empresa, nombre=nombre)[0]
+        for nombre in ('Efectivo', 'QR', 'Tarjeta', 'Stripe')
+    ]
+    lista_vendedores = [
+        User.objects.get_or_create(
+            email=f'vendedor{i + 1}.part{semilla}@smartsales.local',
+            defaults={'empresa': empresa, 'nombre': f'Vendedor {i + 1}'},
+        )[0]
+        for i in range(20)
+    ]
+    existentes = Producto.objects.filter(empresa=empresa).count()
+    Producto.objects.bulk_create([
+        Producto(
+            empresa=empresa, nombre=f'Producto {i + 1}', sku=f'PART-{i + 1:05d}',
+            precio_venta=Decimal(aleatorio.randint(500, 500000)) / 100,
+        )
+        for i in range(existentes, productos)
+    ])
+    lista_productos = list(Producto.objects.filter(empresa=empresa).order_by('id')[:productos])
+
+    dias = (HASTA - desde).days + 1
+    filas = 0
+    for inicio in range(0, dias, 31):
+        with transaction.atomic():
+            bloque = [desde + datetime.timedelta(days=d) for d in range(inicio, min(inicio + 31, dias))]
+            por_producto = [
+                VentaDiariaProducto(
+                    empresa=empresa, fecha=dia, producto=producto, cantidad=cantidad,
+                    ingresos=producto.precio_venta * cantidad,
+                )
+                for dia in bloque
+                for producto in lista_productos if aleatorio.random() < densidad
+                for cantidad in (aleatorio.randint(1, 20),)
+            ]
+            VentaDiariaProducto.objects.bulk_create(por_producto, batch_size=LOTE)
+            VentaDiariaSucursal.objects.bulk_create([
+                VentaDiariaSucursal(
+                    empresa=empresa, fecha=dia, sucursal=sucursal, numero_ventas=aleatorio.randint(1, 200),
+                    unidades=aleatorio.randint(1, 800), ingresos=Decimal(aleatorio.randint(1000, 5000000)) / 100,
+                )
+                for dia in bloque for sucursal in lista_sucursales
+            ], batch_size=LOTE)
+            VentaDiariaVendedor.objects.bulk_create([
+                VentaDiariaVendedor(
+                    empresa=empresa, fecha=dia, usuario=vendedor, canal='POS',
+                    numero_ventas=aleatorio.randint(1, 60), ingresos=Decimal(aleatorio.randint(1000, 2000000)) / 100,
+                )
+                for dia in bloque for vendedor in lista_vendedores
+            ], batch_size=LOTE)
+            PagoDiarioMetodo.objects.bulk_create([
+                PagoDiarioMetodo(
+                    empresa=empresa, fecha=dia, metodo=metodo, numero_pagos=aleatorio.randint(1, 300),
+                    monto=Decimal(aleatorio.randint(1000, 8000000)) / 100,
+                )
+                for dia in bloque for metodo in lista_metodos
+            ], batch_size=LOTE)
+        filas += len(por_producto)
+        escribir(f"  {bloque[-1]}: {filas} filas de producto")
+    return filas
+
+
+def _resumen(filas, reporte):
+    """Filas por clave con sus métricas redondeadas, para comparar ambos caminos."""
+    columnas = list(generators.REPORTES[reporte]['columnas'])
+    return [
+        tuple(round(v, 2) if isinstance(v, (Decimal, float)) else v for v in (fila[c] for c in columnas))
+        for fila in filas
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        "⏱️ Mide los reportes sobre un rango de varios años con una sola consulta "
+        "vs. particiones de meses en paralelo (reports/particiones.py)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--semilla', type=int, default=7)
+        parser.add_argument('--anios', type=int, default=3, help='Años hacia atrás desde 2025-12-31.')
+        parser.add_argument('--productos', type=int, default=1000)
+        parser.add_argument('--sucursales', type=int, default=20)
+        parser.add_argument('--densidad', type=float, default=0.3, help='Fracción de productos vendidos cada día.')
+        parser.add_argument('--regenerar', action='store_true', help='Borra y vuelve a crear los rollups.')
+        parser.add_argument(
+            '--workers', default=f'1,2,4,{os.cpu_count() or 1}',
+            help='Hilos a probar, separados por coma (1 = una sola consulta).',
+        )
+        parser.add_argument('--meses', type=int, default=1, help='Meses por partición.')
+        parser.add_argument('--repeticiones', type=int, default=3)
+
+    def handle(self, *args, **options):
+        try:
+            lista_workers = sorted({max(1, int(w)) for w in options['workers'].split(',')})
+        except ValueError:
+            raise CommandError("--workers debe ser una lista de enteros, p. ej. 1,2,4,8.")
+        repeticiones = max(options['repeticiones'], 1)
+        desde = HASTA.replace(year=HASTA.year - options['anios']) + datetime.timedelta(days=1)
+
+        empresa = _empresa(options['semilla'])
+        if options['regenerar']:
+            _borrar_rollups(empresa)
+        if not VentaDiariaProducto.objects.filter(empresa=empresa).exists():
+            self.stdout.write(self.style.HTTP_INFO(f"⏳ Generando rollups de {desde} a {HASTA}..."))
+            generar_rollups(
+                empresa, options['semilla'], desde, options['productos'], options['sucursales'],
+                options['densidad'], self.stdout.write,
+            )
+
+        filas = VentaDiariaProducto.objects.filter(empresa=empresa, fecha__range=[desde, HASTA]).count()
+        self.stdout.write(self.style.HTTP_INFO(
+            f"⏳ Empresa {empresa.id} ({connection.vendor}, {os.cpu_count()} CPU): {filas} filas diarias de producto, "
+            f"{len(particiones.particiones(desde, HASTA, options['meses']))} particiones de {options['meses']} mes(es)"
+        ))
+
+        for reporte, definicion in generators.REPORTES.items():
+            base = None
+            referencia = None
+            for workers in lista_workers:
+                particiones.reiniciar()
+                with override_settings(
+                    REPORTES_PARTICION_WORKERS=workers,
+                    REPORTES_PARTICION_MESES=options['meses'],
+                    REPORTES_PARTICION_MINIMO=1,
+                ):
+                    tiempos = []
+                    # Calentamiento (hilos y conexiones) y una medición por repetición
+                    for _ in range(repeticiones + 1):
+                        inicio = time.perf_counter()
+                        resultado = particiones.leer(definicion['consulta'](empresa, desde, HASTA), desde, HASTA)
+                        tiempos.append((time.perf_counter() - inicio) * 1000)
+                mediana = statistics.median(tiempos[1:])
+
+                resumen = _resumen(resultado, reporte)
+                if referencia is None:
+                    base, referencia = mediana, resumen
+                coincide = "✅" if resumen == referencia else "❌ distinto a una sola consulta"
+                self.stdout.write(
+                    f"  {reporte:<20} workers={workers:<2} mediana={mediana:9.2f} ms  "
+                    f"x{base / mediana:5.2f}  filas={len(resultado)} {coincide}"
+                )
+        particiones.reiniciar()
+        self.stdout.write(self.style.SUCCESS("🎉 Benchmark terminado."))
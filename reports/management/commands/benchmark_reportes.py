@@ -0,0 +1,136 @@
+import datetime
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Sum, Window
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from reports import rollups
+from tenants.models import Empresa
+from ventas.models import DetalleVenta, Venta
+
+
+# --- VARIANTES DE LA CONSULTA DEL REPORTE DE PRODUCTO ---
+# Todas devuelven (filas, total_general) igual que el PDF del reporte.
+
+def _anterior(empresa, fecha_inicio, fecha_fin):
+    """El patrón original: exists() + venta__id__in=ventas_ids + aggregate() aparte."""
+    ventas_filtradas = Venta.objects.filter(
+        estado='Completado', empresa=empresa, fecha__range=[fecha_inicio, fecha_fin]
+    )
+    if not ventas_filtradas.exists():
+        return [], None
+    ventas_ids = ventas_filtradas.values_list('id', flat=True)
+    datos = DetalleVenta.objects.filter(
+        venta__id__in=ventas_ids
+    ).values(
+        'producto__nombre', 'producto__sku'
+    ).annotate(
+        cantidad_total=Sum('cantidad'),
+        ingresos_totales=Sum('subtotal')
+    ).order_by('-ingresos_totales')
+    if not datos:
+        return [], None
+    total_general = datos.aggregate(
+        total_cantidad=Sum('cantidad_total'),
+        total_ingresos=Sum('ingresos_totales')
+    )
+    return list(datos), total_general
+
+
+def _unida(empresa, fecha_inicio, fecha_fin):
+    """Un solo JOIN agrupado sobre las tablas fuente, con los totales por ventana."""
+    filas = list(DetalleVenta.objects.filter(
+        venta__estado='Completado',
+        venta__empresa=empresa,
+        venta__fecha__range=[fecha_inicio, fecha_fin],
+    ).values(
+        'producto__nombre', 'producto__sku'
+    ).annotate(
+        cantidad_total=Sum('cantidad'),
+        ingresos_totales=Sum('subtotal'),
+        total_cantidad=Window(rollups.SumaTotal(Sum('cantidad'))),
+        total_ingresos=Window(rollups.SumaTotal(Sum('subtotal'))),
+    ).order_by('-ingresos_totales'))
+    return filas, _totales(filas)
+
+
+def _rollup(empresa, fecha_inicio, fecha_fin):
+    """Lo que usan hoy los reportes: una consulta sobre el rollup diario."""
+    filas = list(rollups.ventas_por_producto(empresa, fecha_inicio, fecha_fin))
+    return filas, _totales(filas)
+
+
+def _totales(filas):
+    if not filas:
+        return None
+    return {'total_cantidad': filas[0]['total_cantidad'], 'total_ingresos': filas[0]['total_ingresos']}
+
+
+VARIANTES = {
+    'anterior': _anterior,
+    'unida': _unida,
+    'rollup': _rollup,
+}
+
+
+class Command(BaseCommand):
+    help = "⏱️ Compara consultas y latencia del reporte de ventas por producto (patrón anterior vs. consulta única)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--empresa', type=int, help='ID de la empresa (por defecto: la primera).')
+        parser.add_argument('--desde', help='Inicio del rango (YYYY-MM-DD). Por defecto: toda la historia.')
+        parser.add_argument('--hasta', help='Fin del rango (YYYY-MM-DD). Por defecto: hoy.')
+        parser.add_argument('--repeticiones', type=int, default=5, help='Ejecuciones por variante.')
+
+    def _parse_fecha(self, valor, defecto):
+        if not valor:
+            return defecto
+        try:
+            return timezone.make_aware(datetime.datetime.strptime(valor, '%Y-%m-%d'))
+        except ValueError:
+            raise CommandError(f"Fecha inválida '{valor}', usa el formato YYYY-MM-DD.")
+
+    def handle(self, *args, **options):
+        empresas = Empresa.objects.order_by('id')
+        if options['empresa'] is not None:
+            empresas = empresas.filter(pk=options['empresa'])
+        empresa = empresas.first()
+        if empresa is None:
+            raise CommandError("No hay empresa para medir.")
+
+        fecha_inicio = self._parse_fecha(options['desde'], timezone.make_aware(datetime.datetime(2000, 1, 1)))
+        fecha_fin = self._parse_fecha(options['hasta'], timezone.now())
+        repeticiones = max(options['repeticiones'], 1)
+
+        lineas = DetalleVenta.objects.filter(venta__empresa=empresa).count()
+        self.stdout.write(self.style.HTTP_INFO(
+            f"⏳ Empresa {empresa.id}: {lineas} líneas de venta, {repeticiones} repeticiones por variante..."
+        ))
+
+        referencia = None
+        for nombre, variante in VARIANTES.items():
+            tiempos = []
+            for _ in range(repeticiones):
+                with CaptureQueriesContext(connection) as consultas:
+                    inicio = time.perf_counter()
+                    filas, total_general = variante(empresa, fecha_inicio, fecha_fin)
+                    tiempos.append((time.perf_counter() - inicio) * 1000)
+
+            resumen = (len(filas), total_general and (
+                total_general['total_cantidad'], total_general['total_ingresos']
+            ))
+            if referencia is None:
+                referencia = resumen
+            coincide = "✅" if resumen == referencia else "❌ distinto al anterior"
+
+            self.stdout.write(
+                f"  {nombre:<9} consultas={len(consultas.captured_queries):<2} "
+                f"mediana={statistics.median(tiempos):8.2f} ms  "
+                f"mín={min(tiempos):8.2f} ms  filas={len(filas)} {coincide}"
+            )
+
+        self.stdout.write(self.style.SUCCESS("🎉 Benchmark terminado."))
@@ -0,0 +1,364 @@
+import datetime
+import json
+import multiprocessing
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import time
+from decimal import Decimal
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from products.models import Producto
+from reports import generators, paquetes, particiones, pdf, rollups
+from sucursales.models import Sucursal
+from tenants.models import Empresa
+from users.models import User
+from ventas.models import DetalleVenta, Metodo_pago, Pago, Venta
+
+# Rango fijo del dataset: los resultados son comparables entre commits
+DESDE = datetime.date(2025, 1, 1)
+HASTA = datetime.date(2025, 12, 31)
+LOTE = 5000
+
+
+# --- DATASET SINTÉTICO ---
+
+def _empresa(semilla):
+    empresa, _ = Empresa.objects.get_or_create(
+        nit=f'BENCH-{semilla}', defaults={'nombre': f'Benchmark {semilla}'}
+    )
+    return empresa
+
+
+def _admin(empresa, semilla):
+    usuario, _ = User.objects.get_or_create(
+        email=f'benchmark{semilla}@smartsales.local',
+        defaults={'empresa': empresa, 'nombre': 'Benchmark', 'is_staff': True},
+    )
+    return usuario
+
+
+def _borrar_datos(empresa):
+    DetalleVenta.objects.filter(empresa=empresa).delete()
+    Venta.objects.filter(empresa=empresa).delete()
+    Pago.objects.filter(empresa=empresa).delete()
+
+
+def generar_dataset(empresa, semilla, ventas, detalles_por_venta, sucursales, productos, escribir):
+    """
+    Crea el dataset de forma reproducible (misma semilla = mismos datos) con
+    bulk_create por lotes. Los rollups se reconstruyen al final.
+    """
+    aleatorio = random.Random(semilla)
+
+    lista_sucursales = [
+        Sucursal.objects.get_or_create(empresa=empresa, nombre=f'Sucursal {i + 1:02d}')[0]
+        for i in range(sucursales)
+    ]
+    lista_metodos = [
+        Metodo_pago.objects.get_or_create(empresa=empresa, nombre=nombre)[0]
+        for nombre in ('Efectivo', 'QR', 'Tarjeta', 'Stripe')
+    ]
+    lista_vendedores = [
+        User.objects.get_or_create(
+            email=f'vendedor{i + 1}.bench{semilla}@smartsales.local',
+            defaults={'empresa': empresa, 'nombre': f'Vendedor {i + 1}'},
+        )[0]
+        for i in range(20)
+    ]
+    existentes = Producto.objects.filter(empresa=empresa).count()
+    Producto.objects.bulk_create([
+        Producto(
+            empresa=empresa, nombre=f'Producto {i + 1}', sku=f'BENCH-{i + 1:05d}',
+            precio_venta=Decimal(aleatorio.randint(500, 500000)) / 100,
+        )
+        for i in range(existentes, productos)
+    ])
+    lista_productos = list(Producto.objects.filter(empresa=empresa).order_by('id')[:productos])
+
+    segundos_rango = int((HASTA - DESDE).days + 1) * 86400
+    inicio = timezone.make_aware(datetime.datetime.combine(DESDE, datetime.time.min))
+    maximo_detalles = min(2 * detalles_por_venta - 1, len(lista_productos))
+
+    for desde in range(0, ventas, LOTE):
+        hasta = min(desde + LOTE, ventas)
+        with transaction.atomic():
+            fechas = [inicio + datetime.timedelta(seconds=aleatorio.randrange(segundos_rango)) for _ in range(desde, hasta)]
+            pagos = Pago.objects.bulk_create([
+                Pago(empresa=empresa, metodo=aleatorio.choice(lista_metodos), monto=0, estado='completado', fecha=fecha)
+                for fecha in fechas
+            ])
+
+            lineas_por_venta = []
+            nuevas_ventas = []
+            for i, (fecha, pago) in enumerate(zip(fechas, pagos), start=desde):
+                lineas = [
+                    (producto, aleatorio.randint(1, 5))
+                    for producto in aleatorio.sample(lista_productos, aleatorio.randint(1, maximo_detalles))
+                ]
+                total = sum(producto.precio_venta * cantidad for producto, cantidad in lineas)
+                pago.monto = total
+                lineas_por_venta.append(lineas)
+                nuevas_ventas.append(Venta(
+                    empresa=empresa, numero_nota=f'B{semilla}-{i:08d}',
+                    usuario=aleatorio.choice(lista_vendedores), sucursal=aleatorio.choice(lista_sucursales),
+                    pago=pago, fecha=fecha, total=total,
+                    estado='Completado' if aleatorio.random() < 0.85 else 'pendiente',
+                    canal=aleatorio.choice(['POS', 'POS', 'WEB']),
+                ))
+            Pago.objects.bulk_update(pagos, ['monto'])
+            nuevas_ventas = Venta.objects.bulk_create(nuevas_ventas)
+
+            DetalleVenta.objects.bulk_create([
+                DetalleVenta(
+                    empresa=empresa, venta=venta, producto=producto, cantidad=cantidad,
+                    precio_unitario=producto.precio_venta, subtotal=producto.precio_venta * cantidad,
+                )
+                for venta, lineas in zip(nuevas_ventas, lineas_por_venta)
+                for producto, cantidad in lineas
+            ], batch_size=LOTE)
+        escribir(f"  ventas {hasta}/{ventas}")
+
+    return rollups.reconstruir(empresa.id)
+
+
+# --- CASOS ---
+
+def casos(con_lineas=True):
+    """(nombre, ruta, parámetros) de cada reporte en cada formato."""
+    rango = {'fecha_inicio': DESDE.isoformat(), 'fecha_fin': HASTA.isoformat()}
+    archivos = list(generators.EXTENSIONES)
+    lista = []
+    for reporte, ruta, formatos in (
+        ('ventas_producto', 'reporte-filtrado-ventas-producto', ['json'] + archivos),
+        ('ventas_sucursal', 'reporte-filtrado-ventas-sucursal', ['json'] + archivos),
+        ('ventas_vendedor', 'reporte-filtrado-ventas-vendedor', archivos),
+        ('ingresos_metodo_pago', 'reporte-filtrado-metodo-pago', archivos),
+    ):
+        for formato in formatos:
+            lista.append((f'{reporte}.{formato}', ruta, dict(rango, formato=formato)))
+    for granularidad in rollups.TRUNCADORES:
+        lista.append((
+            f'serie_temporal.{granularidad}', 'reporte-filtrado-serie-temporal',
+            dict(rango, granularidad=granularidad, comparar='true'),
+        ))
+    for formato in paquetes.FORMATOS:
+        lista.append((f'paquete.{formato}', 'paquete-reportes', dict(rango, formato=formato)))
+    if con_lineas:
+        for formato in ('csv', 'excel', 'parquet', 'arrow'):
+            lista.append((f'lineas_venta.{formato}', 'exportar-lineas-venta', dict(rango, formato=formato)))
+    return lista
+
+
+def _peticion(fabrica, usuario, ruta, parametros):
+    """Llama a la vista como lo haría la API y devuelve (status, bytes de la respuesta)."""
+    url = reverse(ruta)
+    request = fabrica.get(url, parametros)
+    force_authenticate(request, user=usuario)
+    response = resolve(url).func(request)
+    if response.streaming:
+        tamano = sum(len(bloque) for bloque in response.streaming_content)
+    else:
+        if hasattr(response, 'render'):
+            response.render()
+        tamano = len(response.content)
+    return response.status_code, tamano
+
+
+def _medir(usuario_id, caso, repeticiones, resultados):
+    """
+    Corre en un proceso hijo (fork) por caso, para que el pico de RSS de un
+    reporte no contamine al siguiente. La primera ejecución es de calentamiento
+    (conexión, pool de PDF) y no se cuenta en los tiempos.
+    """
+    nombre, ruta, parametros = caso
+    rss_inicial = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    usuario = User.objects.select_related('empresa').get(pk=usuario_id)
+    fabrica = APIRequestFactory()
+    tiempos = []
+    # Consultas de los hilos de reports/particiones.py (otras conexiones)
+    consultas_pool = []
+
+    def contar_pool(execute, sql, params, many, context):
+        consultas_pool.append(sql)
+        return execute(sql, params, many, context)
+
+    try:
+        # TTL 0: cada ejecución recorre el camino completo, sin la caché de reportes
+        with override_settings(REPORTES_CACHE_TTL=0):
+            _peticion(fabrica, usuario, ruta, parametros)
+            for _ in range(repeticiones):
+                del consultas_pool[:]
+                with CaptureQueriesContext(connection) as consultas, particiones.observar(contar_pool):
+                    inicio = time.perf_counter()
+                    status, tamano = _peticion(fabrica, usuario, ruta, parametros)
+                    tiempos.append((time.perf_counter() - inicio) * 1000)
+    finally:
+        pdf._descartar_pool()
+
+    rss_pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    resultados.put({
+        'caso': nombre,
+        'status': status,
+        'ms_mediana': round(statistics.median(tiempos), 2),
+        'ms_min': round(min(tiempos), 2),
+        'ms_max': round(max(tiempos), 2),
+        # Todas las conexiones: la del proceso y las de los hilos de particiones
+        'consultas': len(consultas) + len(consultas_pool),
+        'consultas_particiones': len(consultas_pool),
+        'rss_pico_mb': round((rss_pico - rss_inicial) / 1024, 1),
+        'bytes': tamano,
+    })
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "⏱️ Corre todos los reportes en todos los formatos sobre un dataset sintético "
+        "reproducible y guarda tiempo, consultas SQL, memoria pico y tamaño en un JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--semilla', type=int, default=42, help='Semilla del dataset (misma semilla = mismos datos).')
+        parser.add_argument('--ventas', type=int, default=200000)
+        parser.add_argument('--detalles-por-venta', type=int, default=5, help='Promedio de líneas por venta.')
+        parser.add_argument('--sucursales', type=int, default=50)
+        parser.add_argument('--productos', type=int, default=2000)
+        parser.add_argument('--regenerar', action='store_true', help='Borra y vuelve a crear el dataset.')
+        parser.add_argument('--repeticiones', type=int, default=3)
+        parser.add_argument('--casos', help='Solo los casos que empiecen por estos prefijos (separados por coma).')
+        parser.add_argument('--sin-lineas', action='store_true', help='Omite la exportación de líneas de venta.')
+        parser.add_argument('--salida', default='benchmark_resultados.json', help='Archivo JSON de resultados.')
+        parser.add_argument('--comparar', help='JSON de una corrida anterior para mostrar la diferencia.')
+
+    def handle(self, *args, **options):
+        if options['repeticiones'] < 1:
+            raise CommandError("--repeticiones debe ser al menos 1.")
+
+        semilla = options['semilla']
+        empresa = _empresa(semilla)
+        usuario = _admin(empresa, semilla)
+        dataset = {
+            'semilla': semilla,
+            'ventas': options['ventas'],
+            'detalles_por_venta': options['detalles_por_venta'],
+            'sucursales': options['sucursales'],
+            'productos': options['productos'],
+        }
+
+        existentes = Venta.objects.filter(empresa=empresa).count()
+        if options['regenerar'] or existentes != options['ventas']:
+            if existentes:
+                self.stdout.write(self.style.WARNING(f"🧹 Borrando {existentes} ventas del dataset anterior..."))
+                _borrar_datos(empresa)
+            self.stdout.write(self.style.HTTP_INFO(f"⏳ Generando dataset (semilla {semilla})..."))
+            inicio = time.perf_counter()
+            generar_dataset(
+                empresa, semilla, options['ventas'], options['detalles_por_venta'],
+                options['sucursales'], options['productos'], self.stdout.write,
+            )
+            self.stdout.write(self.style.SUCCESS(f"✅ Dataset listo en {time.perf_counter() - inicio:.0f} s."))
+        else:
+            self.stdout.write(self.style.HTTP_INFO(f"♻️  Reutilizando el dataset de la semilla {semilla}."))
+        dataset['detalles'] = DetalleVenta.objects.filter(empresa=empresa).count()
+
+        lista = casos(con_lineas=not options['sin_lineas'])
+        if options['casos']:
+            prefijos = tuple(p.strip() for p in options['casos'].split(',') if p.strip())
+            lista = [caso for caso in lista if caso[0].startswith(prefijos)]
+
+        self.stdout.write(self.style.HTTP_INFO(
+            f"⏱️ {len(lista)} casos x {options['repeticiones']} repeticiones "
+            f"({dataset['ventas']} ventas, {dataset['detalles']} líneas)"
+        ))
+        contexto = multiprocessing.get_context('fork')
+        resultados = []
+        for caso in lista:
+            # El hijo abre su propia conexión: no comparte el socket del padre
+            connections.close_all()
+            cola = contexto.Queue()
+            proceso = contexto.Process(target=_medir, args=(usuario.pk, caso, options['repeticiones'], cola))
+            proceso.start()
+            proceso.join()
+            if proceso.exitcode != 0 or cola.empty():
+                self.stdout.write(self.style.ERROR(f"  ❌ {caso[0]}: el proceso terminó con código {proceso.exitcode}"))
+                resultados.append({'caso': caso[0], 'error': f'exitcode {proceso.exitcode}'})
+                continue
+            resultado = cola.get()
+            resultados.append(resultado)
+            self.stdout.write(
+                f"  {resultado['caso']:<30} {resultado['status']}  "
+                f"mediana={resultado['ms_mediana']:9.1f} ms  consultas={resultado['consultas']:3d}  "
+                f"RSS pico +{resultado['rss_pico_mb']:7.1f} MB  tamaño={resultado['bytes'] / 1024:9.1f} KB"
+            )
+
+        salida = {
+            'version': 1,
+            'commit': _commit(),
+            'fecha': timezone.now().isoformat(),
+            'entorno': {
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'bd': connection.vendor,
+                'pdf_workers': getattr(settings, 'REPORTES_PDF_WORKERS', 2),
+                # Modo de agregación del rango (reports/particiones.py)
+                'particiones': {
+                    'workers': getattr(settings, 'REPORTES_PARTICION_WORKERS', 4),
+                    'meses': getattr(settings, 'REPORTES_PARTICION_MESES', 1),
+                    'minimo': getattr(settings, 'REPORTES_PARTICION_MINIMO', 12),
+                    'activas': particiones.aplica(DESDE, HASTA),
+                },
+            },
+            'dataset': dataset,
+            'rango': {'fecha_inicio': DESDE.isoformat(), 'fecha_fin': HASTA.isoformat()},
+            'repeticiones': options['repeticiones'],
+            'resultados': resultados,
+        }
+        with open(options['salida'], 'w', encoding='utf-8') as f:
+            json.dump(salida, f, indent=2, ensure_ascii=False)
+        self.stdout.write(self.style.SUCCESS(f"🎉 Resultados guardados en {options['salida']}"))
+
+        if options['comparar']:
+            self._comparar(options['comparar'], resultados)
+
+    def _comparar(self, archivo, resultados):
+        with open(archivo, encoding='utf-8') as f:
+            anterior = json.load(f)
+        previos = {r['caso']: r for r in anterior.get('resultados', []) if 'error' not in r}
+        self.stdout.write(self.style.HTTP_INFO(f"📊 Comparación con {archivo} (commit {anterior.get('commit')}):"))
+
+        def delta(actual, previo):
+            if not previo:
+                return '     n/a'
+            return f"{(actual - previo) / previo * 100:+7.1f}%"
+
+        for resultado in resultados:
+            previo = previos.get(resultado['caso'])
+            if previo is None or 'error' in resultado:
+                continue
+            self.stdout.write(
+                f"  {resultado['caso']:<30} tiempo {delta(resultado['ms_mediana'], previo['ms_mediana'])}  "
+                f"consultas {previo['consultas']}→{resultado['consultas']}  "
+                f"RSS {delta(resultado['rss_pico_mb'], previo['rss_pico_mb'])}  "
+                f"tamaño {delta(resultado['bytes'], previo['bytes'])}"
+            )
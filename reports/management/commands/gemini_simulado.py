@@ -0,0 +1,79 @@
+# reports/management/commands/gemini_simulado.py
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+
+def _handler(latencia, tasa_error, respuesta):
+    class GeminiSimulado(BaseHTTPRequestHandler):
+        """Responde como POST /v1beta/models/<modelo>:generateContent de la API REST."""
+
+        def do_POST(self):
+            largo = int(self.headers.get('Content-Length') or 0)
+            self.rfile.read(largo)
+            if ':generateContent' not in self.path:
+                return self._json(404, {'error': {'code': 404, 'message': 'Ruta no simulada', 'status': 'NOT_FOUND'}})
+
+            time.sleep(latencia)
+            if random.random() < tasa_error:
+                return self._json(503, {'error': {'code': 503, 'message': 'Error simulado', 'status': 'UNAVAILABLE'}})
+            self._json(200, {
+                'candidates': [{
+                    'content': {'role': 'model', 'parts': [{'text': respuesta}]},
+                    'finishReason': 'STOP',
+                    'index': 0,
+                }],
+            })
+
+        def _json(self, status, cuerpo):
+            datos = json.dumps(cuerpo).encode('utf-8')
+            try:
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(datos)))
+                self.end_headers()
+                self.wfile.write(datos)
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # El cliente ya cortó por timeout
+
+        def log_message(self, format, *args):
+            pass
+
+    return GeminiSimulado
+
+
+class Command(BaseCommand):
+    help = (
+        "Servidor local que imita la API REST de Gemini (generateContent), para probar "
+        "utils/gemini.py sin red: GEMINI_API_ENDPOINT=http://127.0.0.1:<puerto>"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--puerto', type=int, default=8765)
+        parser.add_argument('--latencia', type=float, default=0.0, help="Segundos de espera por respuesta")
+        parser.add_argument('--tasa-error', type=float, default=0.0, help="Fracción de respuestas 503 (0 a 1)")
+        parser.add_argument(
+            '--respuesta',
+            default='{"reporte_a_generar": "ventas_producto", "formato": "pdf", "fecha_inicio": "", "fecha_fin": ""}',
+            help="Texto que devuelve el modelo",
+        )
+
+    def handle(self, *args, **options):
+        servidor = ThreadingHTTPServer(
+            ('127.0.0.1', options['puerto']),
+            _handler(options['latencia'], options['tasa_error'], options['respuesta']),
+        )
+        self.stdout.write(self.style.HTTP_INFO(
+            f"🤖 Gemini simulado en http://127.0.0.1:{options['puerto']} "
+            f"(latencia {options['latencia']}s, errores {options['tasa_error']:.0%})"
+        ))
+        try:
+            servidor.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            servidor.server_close()
+            self.stdout.write(self.style.SUCCESS("✅ Servidor detenido."))
@@ -0,0 +1,81 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from reports import columnar, generators, prerender
+from tenants.models import Empresa
+
+
+class Command(BaseCommand):
+    help = (
+        "🌙 Pre-renderiza los reportes de los rangos estándar (últimos 30 días, mes anterior) "
+        "para cada empresa activa y formato. Pensado para correr de noche (cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--empresa', type=int, help='ID de la empresa (por defecto: todas las activas).')
+        parser.add_argument('--reportes', help=f"Separados por coma (por defecto: {', '.join(generators.REPORTES)}).")
+        parser.add_argument('--formatos', help=f"Separados por coma (por defecto: {', '.join(generators.EXTENSIONES)}).")
+        parser.add_argument('--rangos', help=f"Separados por coma (por defecto: {', '.join(prerender.RANGOS)}).")
+
+    def _lista(self, valor, validos, nombre):
+        if not valor:
+            return list(validos)
+        elegidos = [v.strip() for v in valor.split(',') if v.strip()]
+        invalidos = [v for v in elegidos if v not in validos]
+        if invalidos:
+            raise CommandError(f"{nombre} no válidos: {', '.join(invalidos)}.")
+        return elegidos
+
+    def handle(self, *args, **options):
+        reportes = self._lista(options['reportes'], generators.REPORTES, 'Reportes')
+        formatos = self._lista(options['formatos'], generators.EXTENSIONES, 'Formatos')
+        if not columnar.disponible():
+            formatos = [f for f in formatos if f not in columnar.FORMATOS]
+        rangos = {
+            nombre: rango for nombre, rango in prerender.rangos().items()
+            if nombre in self._lista(options['rangos'], prerender.RANGOS, 'Rangos')
+        }
+
+        empresas = Empresa.objects.filter(esta_activo=True)
+        if options['empresa'] is not None:
+            empresas = empresas.filter(pk=options['empresa'])
+
+        borrados = prerender.descartar_vencidos()
+        if borrados:
+            self.stdout.write(f"🧹 {borrados} artefactos de rangos anteriores borrados.")
+
+        inicio = time.perf_counter()
+        generados = omitidos = fallidos = 0
+        for empresa in empresas.order_by('id'):
+            for rango, (desde, hasta) in rangos.items():
+                self.stdout.write(self.style.HTTP_INFO(f"⏳ {empresa} · {rango} ({desde} → {hasta})"))
+                # La huella se toma antes de generar: si entra una venta mientras
+                # tanto, el artefacto ya nace desactualizado y no se sirve
+                huella = prerender.huella(empresa, desde, hasta)
+                for reporte in reportes:
+                    for formato in formatos:
+                        try:
+                            resultado = generators.CONSTRUCTORES[reporte](empresa, formato, desde, hasta)
+                        except generators.ReporteError:
+                            # Sin ventas en el rango: no se guarda nada (y se borra lo viejo)
+                            prerender.descartar(prerender.ArtefactoReporte.objects.filter(
+                                empresa=empresa, reporte=reporte, formato=formato, desde=desde, hasta=hasta
+                            ))
+                            omitidos += 1
+                            continue
+                        except Exception as e:
+                            self.stdout.write(self.style.ERROR(f"  ❌ {reporte}.{formato}: {type(e).__name__}: {e}"))
+                            fallidos += 1
+                            continue
+                        artefacto = prerender.guardar(empresa, reporte, formato, rango, desde, hasta, huella, resultado)
+                        generados += 1
+                        comprimido = (
+                            f" (gzip {artefacto.archivo.size / 1024:.1f} KB)" if artefacto.codificacion else ''
+                        )
+                        self.stdout.write(f"  {f'{reporte}.{formato}':<30} {artefacto.tamano / 1024:8.1f} KB{comprimido}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"🎉 {generados} artefactos generados, {omitidos} sin datos, {fallidos} con error "
+            f"en {time.perf_counter() - inicio:.1f} s."
+        ))
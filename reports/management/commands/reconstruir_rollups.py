@@ -0,0 +1,35 @@
+import datetime
+from django.core.management.base import BaseCommand, CommandError
+
+from reports import rollups
+
+
+class Command(BaseCommand):
+    help = "📊 Reconstruye los rollups diarios de reportes desde Venta/DetalleVenta/Pago."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--empresa', type=int, help='ID de la empresa (por defecto: todas).')
+        parser.add_argument('--desde', help='Primer día a reconstruir (YYYY-MM-DD).')
+        parser.add_argument('--hasta', help='Último día a reconstruir (YYYY-MM-DD).')
+
+    def _parse_fecha(self, valor):
+        if not valor:
+            return None
+        try:
+            return datetime.datetime.strptime(valor, '%Y-%m-%d').date()
+        except ValueError:
+            raise CommandError(f"Fecha inválida '{valor}', usa el formato YYYY-MM-DD.")
+
+    def handle(self, *args, **options):
+        desde = self._parse_fecha(options['desde'])
+        hasta = self._parse_fecha(options['hasta'])
+        empresa_id = options['empresa'] if options['empresa'] is not None else rollups.TODAS
+
+        alcance = f"empresa {options['empresa']}" if options['empresa'] is not None else "todas las empresas"
+        self.stdout.write(self.style.HTTP_INFO(
+            f"⏳ Reconstruyendo rollups para {alcance} ({desde or 'inicio'} → {hasta or 'hoy'})..."
+        ))
+
+        creadas = rollups.reconstruir(empresa_id, desde, hasta)
+
+        self.stdout.write(self.style.SUCCESS(f"🎉 Rollups reconstruidos: {creadas} filas."))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from reports import hechos
+
+
+class Command(BaseCommand):
+    help = "🔄 Refresca la vista materializada de hechos de venta (REFRESH MATERIALIZED VIEW CONCURRENTLY)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--completo', action='store_true',
+            help='Refresco sin CONCURRENTLY (más rápido, pero bloquea las lecturas mientras dura).',
+        )
+
+    def handle(self, *args, **options):
+        if not hechos.soportada():
+            raise CommandError("La vista materializada solo existe en PostgreSQL.")
+
+        self.stdout.write(self.style.HTTP_INFO(f"⏳ Refrescando {hechos.VISTA}..."))
+        refresco = hechos.refrescar(concurrente=not options['completo'])
+        self.stdout.write(self.style.SUCCESS(
+            f"🎉 {hechos.VISTA} refrescada en {refresco.duracion_ms} ms ({refresco.refrescada_en:%Y-%m-%d %H:%M:%S})."
+        ))
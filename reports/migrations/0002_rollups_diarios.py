@@ -0,0 +1,81 @@
+# Generated by Django 5.2.5 on 2026-10-18 14:54
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_initial'),
+        ('reports', '0001_initial'),
+        ('sucursales', '0002_initial'),
+        ('tenants', '0001_initial'),
+        ('ventas', '0005_alter_pago_fecha'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PagoDiarioMetodo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('numero_pagos', models.PositiveIntegerField(default=0)),
+                ('monto', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('empresa', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='tenants.empresa')),
+                ('metodo', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='ventas.metodo_pago')),
+            ],
+            options={
+                'db_table': 'rollup_pago_metodo',
+                'unique_together': {('empresa', 'fecha', 'metodo')},
+            },
+        ),
+        migrations.CreateModel(
+            name='VentaDiariaProducto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('cantidad', models.PositiveIntegerField(default=0)),
+                ('ingresos', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('empresa', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='tenants.empresa')),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='products.producto')),
+            ],
+            options={
+                'db_table': 'rollup_venta_producto',
+                'unique_together': {('empresa', 'fecha', 'producto')},
+            },
+        ),
+        migrations.CreateModel(
+            name='VentaDiariaSucursal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('numero_ventas', models.PositiveIntegerField(default=0)),
+                ('ingresos', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('empresa', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='tenants.empresa')),
+                ('sucursal', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='sucursales.sucursal')),
+            ],
+            options={
+                'db_table': 'rollup_venta_sucursal',
+                'unique_together': {('empresa', 'fecha', 'sucursal')},
+            },
+        ),
+        migrations.CreateModel(
+            name='VentaDiariaVendedor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('canal', models.CharField(blank=True, max_length=10, null=True)),
+                ('numero_ventas', models.PositiveIntegerField(default=0)),
+                ('ingresos', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('empresa', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='tenants.empresa')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'rollup_venta_vendedor',
+                'unique_together': {('empresa', 'fecha', 'usuario', 'canal')},
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.5 on 2026-10-18 14:56
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0002_rollups_diarios'),
+        ('tenants', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reportrun',
+            name='clave',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='reportrun',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='reportrun',
+            constraint=models.UniqueConstraint(condition=models.Q(('estado__in', ['PENDING', 'RUNNING']), models.Q(('clave', ''), _negated=True)), fields=('clave',), name='report_run_clave_en_curso'),
+        ),
+    ]
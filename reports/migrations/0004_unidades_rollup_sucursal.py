@@ -0,0 +1,45 @@
+# Generated by Django 5.2.5 on 2026-10-18 15:14
+
+from django.db import migrations, models
+from django.db.models import Sum
+from django.db.models.functions import TruncDate
+
+
+def calcular_unidades(apps, schema_editor):
+    """Rellena 'unidades' en los rollups que ya existían (mismo agrupamiento que reports/rollups.py)."""
+    DetalleVenta = apps.get_model('ventas', 'DetalleVenta')
+    VentaDiariaSucursal = apps.get_model('reports', 'VentaDiariaSucursal')
+
+    filas = DetalleVenta.objects.filter(
+        venta__estado='Completado'
+    ).annotate(
+        dia=TruncDate('venta__fecha')
+    ).values(
+        'dia', 'venta__empresa', 'venta__sucursal'
+    ).annotate(
+        unidades=Sum('cantidad')
+    ).order_by()
+
+    for fila in filas.iterator(chunk_size=2000):
+        VentaDiariaSucursal.objects.filter(
+            empresa_id=fila['venta__empresa'],
+            fecha=fila['dia'],
+            sucursal_id=fila['venta__sucursal'],
+        ).update(unidades=fila['unidades'] or 0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0003_trabajos_reporte'),
+        ('ventas', '0005_alter_pago_fecha'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ventadiariasucursal',
+            name='unidades',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(calcular_unidades, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,119 @@
+# Generated by Django 5.2.5 on 2026-10-18 15:22
+
+from django.conf import settings
+from django.db import migrations, models
+
+# Una fila por línea de venta con sus dimensiones ya unidas. El índice único
+# sobre 'id' es obligatorio para REFRESH MATERIALIZED VIEW CONCURRENTLY; los
+# demás cubren los filtros de los reportes (empresa + rango de fechas).
+SQL_CREAR = """
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_hechos_venta AS
+SELECT
+    dv.id,
+    dv.empresa_id,
+    v.id AS venta_id,
+    v.numero_nota,
+    v.fecha,
+    (v.fecha AT TIME ZONE '{tz}')::date AS dia,
+    v.estado,
+    v.canal,
+    v.sucursal_id,
+    s.nombre AS sucursal_nombre,
+    v.usuario_id,
+    u.email AS vendedor_email,
+    dv.producto_id,
+    p.nombre AS producto_nombre,
+    p.sku AS producto_sku,
+    p.subcategoria_id,
+    sc.nombre AS subcategoria_nombre,
+    sc.categoria_id,
+    v.pago_id,
+    pg.metodo_id AS metodo_pago_id,
+    mp.nombre AS metodo_pago_nombre,
+    dv.cantidad,
+    dv.precio_unitario,
+    dv.subtotal
+FROM detalle_venta dv
+JOIN venta v ON v.id = dv.venta_id
+JOIN producto p ON p.id = dv.producto_id
+LEFT JOIN subcategoria sc ON sc.id = p.subcategoria_id
+LEFT JOIN sucursal s ON s.id = v.sucursal_id
+LEFT JOIN "user" u ON u.id = v.usuario_id
+LEFT JOIN pago pg ON pg.id = v.pago_id
+LEFT JOIN metodo_pago mp ON mp.id = pg.metodo_id
+WITH DATA
+"""
+
+SQL_INDICES = """
+CREATE UNIQUE INDEX IF NOT EXISTS mv_hechos_venta_id ON mv_hechos_venta (id);
+CREATE INDEX IF NOT EXISTS mv_hechos_venta_empresa_fecha ON mv_hechos_venta (empresa_id, fecha);
+CREATE INDEX IF NOT EXISTS mv_hechos_venta_empresa_dia_producto ON mv_hechos_venta (empresa_id, dia, producto_id);
+CREATE INDEX IF NOT EXISTS mv_hechos_venta_fecha_brin ON mv_hechos_venta USING brin (fecha);
+"""
+
+SQL_BORRAR = "DROP MATERIALIZED VIEW IF EXISTS mv_hechos_venta;"
+
+
+def crear_vista(apps, schema_editor):
+    # Las vistas materializadas son de PostgreSQL: en otras bases (SQLite en
+    # desarrollo) no se crea y los reportes usan las tablas de siempre.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(SQL_CREAR.format(tz=settings.TIME_ZONE.replace("'", "''")))
+    for sentencia in SQL_INDICES.strip().split(';'):
+        if sentencia.strip():
+            schema_editor.execute(sentencia)
+
+
+def borrar_vista(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(SQL_BORRAR)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0004_unidades_rollup_sucursal'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HechoVenta',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('numero_nota', models.CharField(max_length=20)),
+                ('fecha', models.DateTimeField()),
+                ('dia', models.DateField()),
+                ('estado', models.CharField(max_length=50)),
+                ('canal', models.CharField(max_length=10, null=True)),
+                ('sucursal_nombre', models.CharField(max_length=100, null=True)),
+                ('vendedor_email', models.EmailField(max_length=254, null=True)),
+                ('producto_nombre', models.CharField(max_length=200)),
+                ('producto_sku', models.CharField(max_length=100, null=True)),
+                ('subcategoria_nombre', models.CharField(max_length=100, null=True)),
+                ('categoria_id', models.BigIntegerField(null=True)),
+                ('metodo_pago_nombre', models.CharField(max_length=100, null=True)),
+                ('cantidad', models.PositiveIntegerField()),
+                ('precio_unitario', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('subtotal', models.DecimalField(decimal_places=2, max_digits=10)),
+            ],
+            options={
+                'db_table': 'mv_hechos_venta',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='RefrescoVista',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('vista', models.CharField(max_length=100, unique=True)),
+                ('refrescada_en', models.DateTimeField()),
+                ('duracion_ms', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'refresco_vista',
+            },
+        ),
+        migrations.RunPython(crear_vista, borrar_vista),
+    ]
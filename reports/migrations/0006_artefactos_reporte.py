@@ -0,0 +1,38 @@
+# Generated by Django 5.2.5 on 2026-10-18 15:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0005_hechos_venta'),
+        ('tenants', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArtefactoReporte',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reporte', models.CharField(max_length=50)),
+                ('formato', models.CharField(max_length=10)),
+                ('rango', models.CharField(max_length=30)),
+                ('desde', models.DateField()),
+                ('hasta', models.DateField()),
+                ('huella', models.CharField(max_length=64)),
+                ('archivo', models.FileField(upload_to='reports/prerender/')),
+                ('codificacion', models.CharField(blank=True, default='', max_length=10)),
+                ('content_type', models.CharField(max_length=100)),
+                ('nombre_archivo', models.CharField(max_length=200)),
+                ('tamano', models.PositiveIntegerField(default=0)),
+                ('generado_en', models.DateTimeField()),
+                ('empresa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='tenants.empresa')),
+            ],
+            options={
+                'db_table': 'artefacto_reporte',
+                'unique_together': {('empresa', 'reporte', 'formato', 'desde', 'hasta')},
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.5 on 2026-10-18 15:32
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def construir_resumenes(apps, schema_editor):
+    """Resúmenes top-k de toda la historia desde los rollups de producto ya existentes."""
+    from reports import rollups, topk
+
+    topk._reconstruir(
+        apps.get_model('reports', 'ResumenTopProductos'),
+        apps.get_model('reports', 'VentaDiariaProducto'),
+        rollups.TODAS, None, None,
+        getattr(settings, 'REPORTES_TOPK_CAPACIDAD', 200),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0006_artefactos_reporte'),
+        ('tenants', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenTopProductos',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularidad', models.CharField(choices=[('dia', 'Día'), ('mes', 'Mes')], max_length=3)),
+                ('fecha', models.DateField()),
+                ('resumen', models.JSONField()),
+                ('empresa', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='tenants.empresa')),
+            ],
+            options={
+                'db_table': 'rollup_top_productos',
+                'unique_together': {('empresa', 'granularidad', 'fecha')},
+            },
+        ),
+        migrations.RunPython(construir_resumenes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.5 on 2026-10-18 15:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0007_resumenes_top_productos'),
+        ('tenants', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CambioVentas',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('cambiado_en', models.DateTimeField()),
+                ('empresa', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='tenants.empresa')),
+            ],
+            options={
+                'db_table': 'cambio_ventas',
+            },
+        ),
+    ]
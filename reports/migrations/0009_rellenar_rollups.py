@@ -0,0 +1,19 @@
+from django.db import migrations
+
+
+# 0002 creó los rollups vacíos; en una BD con ventas hay que llenarlos con
+# 'python manage.py reconstruir_rollups' (el Dockerfile lo corre después de
+# migrate). No se hace aquí: rollups.reconstruir usa los modelos actuales
+# (ventas, rollups, top-k, CambioVentas) y la invalidación de la caché, y un
+# 'migrate' desde cero fallaría en cuanto una migración posterior les agregue
+# un campo. La migración queda sin operaciones para las BD que ya la aplicaron.
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0008_cambio_ventas'),
+        ('ventas', '0006_indice_venta_empresa_fecha'),
+    ]
+
+    operations = []
@@ -26,7 +26,168 @@ class ReportRun(models.Model):
     error = models.TextField(null=True, blank=True)
     started_at = models.DateTimeField(null=True, blank=True)
     finished_at = models.DateTimeField(null=True, blank=True)
+    # Hash de (empresa, reporte, formato, filtros): deduplica trabajos en curso
+    clave = models.CharField(max_length=64, blank=True, default='', db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True, null=True)
 
     class Meta:
         db_table = "report_run"
-# Create your models here.
+        constraints = [
+            # Solo puede haber un trabajo PENDING/RUNNING por clave
+            models.UniqueConstraint(
+                fields=['clave'],
+                condition=models.Q(estado__in=['PENDING', 'RUNNING']) & ~models.Q(clave=''),
+                name='report_run_clave_en_curso',
+            ),
+        ]
+
+
+# --- ROLLUPS DIARIOS ---
+# Agregados por empresa y día (fecha local) que alimentan los reportes.
+# Se recalculan por día desde Venta/DetalleVenta/Pago (ver reports/rollups.py),
+# así un reporte de un año lee ~365 filas por dimensión en vez de todas las ventas.
+
+class VentaDiariaProducto(models.Model):
+    empresa = models.ForeignKey('tenants.Empresa', on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    fecha = models.DateField()
+    producto = models.ForeignKey('products.Producto', on_delete=models.CASCADE, related_name='+')
+    cantidad = models.PositiveIntegerField(default=0)
+    ingresos = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        db_table = "rollup_venta_producto"
+        unique_together = ('empresa', 'fecha', 'producto')
+
+class VentaDiariaSucursal(models.Model):
+    empresa = models.ForeignKey('tenants.Empresa', on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    fecha = models.DateField()
+    sucursal = models.ForeignKey('sucursales.Sucursal', on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    numero_ventas = models.PositiveIntegerField(default=0)
+    unidades = models.PositiveIntegerField(default=0)  # suma de DetalleVenta.cantidad
+    ingresos = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        db_table = "rollup_venta_sucursal"
+        unique_together = ('empresa', 'fecha', 'sucursal')
+
+class VentaDiariaVendedor(models.Model):
+    empresa = models.ForeignKey('tenants.Empresa', on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    fecha = models.DateField()
+    usuario = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    canal = models.CharField(max_length=10, null=True, blank=True)
+    numero_ventas = models.PositiveIntegerField(default=0)
+    ingresos = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        db_table = "rollup_venta_vendedor"
+        unique_together = ('empresa', 'fecha', 'usuario', 'canal')
+
+class PagoDiarioMetodo(models.Model):
+    empresa = models.ForeignKey('tenants.Empresa', on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    fecha = models.DateField()
+    metodo = models.ForeignKey('ventas.Metodo_pago', on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    numero_pagos = models.PositiveIntegerField(default=0)
+    monto = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        db_table = "rollup_pago_metodo"
+        unique_together = ('empresa', 'fecha', 'metodo')
+
+
+class ResumenTopProductos(models.Model):
+    """
+    Resumen top-k de productos por ingresos de un día o de un mes (reports/topk.py).
+    'resumen' = {'capacidad', 'contadores': [[producto_id, estimado, error]], 'minimo', 'total'} en centavos.
+    """
+    GRANULARIDADES = [('dia', 'Día'), ('mes', 'Mes')]
+
+    empresa = models.ForeignKey('tenants.Empresa', on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    granularidad = models.CharField(max_length=3, choices=GRANULARIDADES)
+    fecha = models.DateField()  # el día, o el primer día del mes
+    resumen = models.JSONField()
+
+    class Meta:
+        db_table = "rollup_top_productos"
+        unique_together = ('empresa', 'granularidad', 'fecha')
+
+class CambioVentas(models.Model):
+    """
+    Marca barata de "último cambio en las ventas" de cada empresa: rollups.reconstruir
+    sube 'version' cada vez que recalcula sus rollups. De aquí salen el ETag y el
+    Last-Modified de los reportes JSON (reports/condicional.py).
+    """
+    empresa = models.OneToOneField('tenants.Empresa', on_delete=models.CASCADE, related_name='+')
+    version = models.PositiveBigIntegerField(default=0)
+    cambiado_en = models.DateTimeField()
+
+    class Meta:
+        db_table = "cambio_ventas"
+
+
+# --- VISTA MATERIALIZADA DE HECHOS (solo PostgreSQL) ---
+# mv_hechos_venta: una fila por DetalleVenta con venta, producto, subcategoría,
+# sucursal, vendedor, pago y método de pago ya unidos. La crea la migración
+# 0005 y se refresca con 'python manage.py refrescar_hechos' (ver reports/hechos.py).
+
+class HechoVenta(models.Model):
+    id = models.BigIntegerField(primary_key=True)  # = detalle_venta.id
+    empresa = models.ForeignKey('tenants.Empresa', on_delete=models.DO_NOTHING, null=True, db_constraint=False, related_name='+')
+    venta = models.ForeignKey('ventas.Venta', on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    numero_nota = models.CharField(max_length=20)
+    fecha = models.DateTimeField()
+    dia = models.DateField()  # fecha local (TIME_ZONE)
+    estado = models.CharField(max_length=50)
+    canal = models.CharField(max_length=10, null=True)
+    sucursal = models.ForeignKey('sucursales.Sucursal', on_delete=models.DO_NOTHING, null=True, db_constraint=False, related_name='+')
+    sucursal_nombre = models.CharField(max_length=100, null=True)
+    usuario = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    vendedor_email = models.EmailField(null=True)
+    producto = models.ForeignKey('products.Producto', on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    producto_nombre = models.CharField(max_length=200)
+    producto_sku = models.CharField(max_length=100, null=True)
+    subcategoria = models.ForeignKey('products.SubCategoria', on_delete=models.DO_NOTHING, null=True, db_constraint=False, related_name='+')
+    subcategoria_nombre = models.CharField(max_length=100, null=True)
+    categoria_id = models.BigIntegerField(null=True)
+    pago = models.ForeignKey('ventas.Pago', on_delete=models.DO_NOTHING, null=True, db_constraint=False, related_name='+')
+    metodo_pago = models.ForeignKey('ventas.Metodo_pago', on_delete=models.DO_NOTHING, null=True, db_constraint=False, related_name='+')
+    metodo_pago_nombre = models.CharField(max_length=100, null=True)
+    cantidad = models.PositiveIntegerField()
+    precio_unitario = models.DecimalField(max_digits=10, decimal_places=2)
+    subtotal = models.DecimalField(max_digits=10, decimal_places=2)
+
+    class Meta:
+        managed = False
+        db_table = "mv_hechos_venta"
+
+class RefrescoVista(models.Model):
+    """Último refresco de cada vista materializada: de aquí sale la antigüedad de los datos."""
+    vista = models.CharField(max_length=100, unique=True)
+    refrescada_en = models.DateTimeField()
+    duracion_ms = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = "refresco_vista"
+
+class ArtefactoReporte(models.Model):
+    """
+    Reporte pre-renderizado por el comando nocturno 'prerenderizar_reportes'
+    para un rango estándar (ver reports/prerender.py). 'huella' identifica los
+    datos con los que se generó: si los rollups cambian, deja de servirse.
+    """
+    empresa = models.ForeignKey('tenants.Empresa', on_delete=models.CASCADE, related_name='+')
+    reporte = models.CharField(max_length=50)
+    formato = models.CharField(max_length=10)
+    rango = models.CharField(max_length=30)  # 'ultimos_30_dias', 'mes_anterior'
+    desde = models.DateField()
+    hasta = models.DateField()
+    huella = models.CharField(max_length=64)
+    archivo = models.FileField(upload_to='reports/prerender/')
+    codificacion = models.CharField(max_length=10, blank=True, default='')  # '' o 'gzip'
+    content_type = models.CharField(max_length=100)
+    nombre_archivo = models.CharField(max_length=200)
+    tamano = models.PositiveIntegerField(default=0)  # bytes sin comprimir
+    generado_en = models.DateTimeField()
+
+    class Meta:
+        db_table = "artefacto_reporte"
+        unique_together = ('empresa', 'reporte', 'formato', 'desde', 'hasta')
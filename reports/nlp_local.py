@@ -0,0 +1,161 @@
+# reports/nlp_local.py
+# Intérprete local (por reglas) de peticiones de reportes.
+#
+# Resuelve sin red las peticiones comunes ("reporte de vendedores en excel",
+# "ventas por producto del mes pasado") y devuelve el mismo JSON que pide
+# PROMPT_PLANTILLA en reports/nlp_utils.py. Si la petición es ambigua o trae
+# expresiones de fecha que no entiende, devuelve None y se consulta a Gemini.
+
+import calendar
+import datetime
+import re
+import unicodedata
+
+# Palabras (ya normalizadas) que identifican cada reporte
+REPORTES = {
+    'ventas_producto': ('producto', 'productos', 'articulo', 'articulos'),
+    'ventas_sucursal': ('sucursal', 'sucursales', 'tienda', 'tiendas'),
+    'ventas_vendedor': ('vendedor', 'vendedores', 'vendedora', 'vendedoras', 'cajero', 'cajeros'),
+    'ingresos_metodo_pago': (
+        'metodo de pago', 'metodos de pago', 'forma de pago', 'formas de pago',
+        'medio de pago', 'medios de pago',
+    ),
+}
+
+FORMATOS = {
+    'pdf': ('pdf',),
+    'excel': ('excel', 'xlsx', 'hoja de calculo'),
+    'csv': ('csv',),
+    'parquet': ('parquet',),
+    'arrow': ('arrow',),
+}
+
+MESES = {
+    'enero': 1, 'febrero': 2, 'marzo': 3, 'abril': 4, 'mayo': 5, 'junio': 6, 'julio': 7,
+    'agosto': 8, 'septiembre': 9, 'setiembre': 9, 'octubre': 10, 'noviembre': 11, 'diciembre': 12,
+}
+
+# Expresiones de fecha que este intérprete no resuelve: mejor preguntarle a Gemini
+NO_SOPORTADAS = (
+    'desde', 'hasta', 'entre', 'trimestre', 'semestre', 'quincena', 'bimestre',
+    'anteayer', 'antier', 'pasado manana', 'fin de semana', 'navidad',
+)
+
+
+def normalizar(texto):
+    """Minúsculas, sin tildes, sin puntuación y con espacios simples."""
+    texto = unicodedata.normalize('NFKD', texto.lower())
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    texto = re.sub(r'[^a-z0-9ñ ]+', ' ', texto)
+    return ' '.join(texto.split())
+
+
+def _contiene(texto, frase):
+    # El texto ya está normalizado (solo letras, dígitos y espacios simples):
+    # rodear de espacios equivale a buscar la frase como palabras completas
+    return f' {frase} ' in f' {texto} '
+
+
+def _unico(texto, opciones):
+    """La clave cuyo sinónimo aparece en el texto; None si ninguna; False si varias."""
+    encontradas = [clave for clave, frases in opciones.items() if any(_contiene(texto, f) for f in frases)]
+    if len(encontradas) > 1:
+        return False
+    return encontradas[0] if encontradas else None
+
+
+def _mes(anio, mes):
+    return datetime.date(anio, mes, 1), datetime.date(anio, mes, calendar.monthrange(anio, mes)[1])
+
+
+def _fechas(texto, hoy):
+    """
+    Devuelve (inicio, fin) como 'date', ('', '') si no se menciona ninguna
+    fecha, o None si hay una expresión que no sabemos resolver.
+    """
+    if any(_contiene(texto, palabra) for palabra in NO_SOPORTADAS):
+        return None
+
+    meses = [MESES[m] for m in re.findall(r'\b(' + '|'.join(MESES) + r')\b', texto)]
+    anios = [int(a) for a in re.findall(r'\b(20\d\d)\b', texto)]
+    ultimos = re.search(r'\bultim[oa]s (\d+) (dias|semanas|meses)\b', texto)
+    # Cualquier otro número (días sueltos, "15/03") no lo interpretamos aquí
+    numeros = re.findall(r'\b\d+\b', texto)
+    if len(numeros) > len(anios) + (1 if ultimos else 0):
+        return None
+    if len(meses) > 1 or len(anios) > 1:
+        return None
+
+    relativas = []
+    if _contiene(texto, 'hoy'):
+        relativas.append((hoy, hoy))
+    if _contiene(texto, 'ayer'):
+        ayer = hoy - datetime.timedelta(days=1)
+        relativas.append((ayer, ayer))
+    if _contiene(texto, 'esta semana') or _contiene(texto, 'semana actual'):
+        relativas.append((hoy - datetime.timedelta(days=hoy.weekday()), hoy))
+    if _contiene(texto, 'semana pasada') or _contiene(texto, 'semana anterior'):
+        lunes = hoy - datetime.timedelta(days=hoy.weekday() + 7)
+        relativas.append((lunes, lunes + datetime.timedelta(days=6)))
+    if _contiene(texto, 'este mes') or _contiene(texto, 'mes actual'):
+        relativas.append((hoy.replace(day=1), hoy))
+    if _contiene(texto, 'mes pasado') or _contiene(texto, 'mes anterior'):
+        fin = hoy.replace(day=1) - datetime.timedelta(days=1)
+        relativas.append((fin.replace(day=1), fin))
+    if _contiene(texto, 'este ano') or _contiene(texto, 'ano actual'):
+        relativas.append((hoy.replace(month=1, day=1), hoy))
+    if _contiene(texto, 'ano pasado') or _contiene(texto, 'ano anterior'):
+        relativas.append((datetime.date(hoy.year - 1, 1, 1), datetime.date(hoy.year - 1, 12, 31)))
+    if ultimos:
+        cantidad, unidad = int(ultimos.group(1)), ultimos.group(2)
+        if cantidad < 1:
+            # "últimos 0 días" daría un rango invertido
+            return None
+        dias = {'dias': 1, 'semanas': 7, 'meses': 30}[unidad] * cantidad
+        relativas.append((hoy - datetime.timedelta(days=dias - 1), hoy))
+
+    absolutas = bool(meses or anios)
+    if len(relativas) + absolutas > 1:
+        return None
+    if relativas:
+        return relativas[0]
+
+    if meses:
+        mes = meses[0]
+        # Sin año: la última vez que pasó ese mes (no uno futuro)
+        anio = anios[0] if anios else (hoy.year if mes <= hoy.month else hoy.year - 1)
+        return _mes(anio, mes)
+    if anios:
+        return datetime.date(anios[0], 1, 1), datetime.date(anios[0], 12, 31)
+
+    # Palabras de tiempo sueltas que no encajaron en ninguna regla
+    if any(_contiene(texto, p) for p in ('dia', 'dias', 'semana', 'mes', 'meses', 'ano', 'anos', 'pasado', 'ultimo', 'ultimos')):
+        return None
+    return '', ''
+
+
+def interpretar(texto, hoy):
+    """
+    Devuelve el dict {reporte_a_generar, formato, fecha_inicio, fecha_fin}
+    o None si la petición no es lo bastante clara para resolverla aquí.
+    """
+    texto = normalizar(texto)
+
+    reporte = _unico(texto, REPORTES)
+    if not reporte:
+        return None
+    formato = _unico(texto, FORMATOS)
+    if formato is False:
+        return None
+
+    fechas = _fechas(texto, hoy)
+    if fechas is None:
+        return None
+    inicio, fin = fechas
+
+    return {
+        'reporte_a_generar': reporte,
+        'formato': formato or 'pdf',
+        'fecha_inicio': inicio.isoformat() if inicio else '',
+        'fecha_fin': fin.isoformat() if fin else '',
+    }
@@ -1,8 +1,13 @@
+import hashlib
 import json
-from decouple import config
-import google.generativeai as genai
+from django.conf import settings
+from django.core.cache import cache
 from django.utils import timezone # Para saber la fecha de "hoy"
 
+from utils import gemini
+
+from . import nlp_local
+
 # reports/nlp_utils.py
 # ... (importaciones) ...
 
@@ -28,7 +33,7 @@ Reglas:
 
 Parámetros JSON (¡DEBES USAR ESTOS NOMBRES EXACTOS!):
 - reporte_a_generar: (string, uno de: "ventas_producto", "ventas_sucursal", "ventas_vendedor", "ingresos_metodo_pago")
-- formato: (string, uno de: "pdf", "excel", "csv")
+- formato: (string, uno de: "pdf", "excel", "csv", "parquet", "arrow")
 - fecha_inicio: (string, "YYYY-MM-DD" o "")
 - fecha_fin: (string, "YYYY-MM-DD" o "")
 
@@ -66,24 +71,40 @@ Devuelve SOLAMENTE el objeto JSON.
 # ----------------------------------------------------
 
 def parse_natural_query(texto_usuario: str) -> dict:
-    
-    api_key = config('API_GEMINI', default=config('GOOGLE_API_KEY', default=''))
-    if not api_key:
-        print("ERROR: Clave API_GEMINI no configurada.")
-        return {"error": "API Key no configurada"}
+    """
+    Interpreta la petición de reporte. Orden: caché -> intérprete local por
+    reglas (reports/nlp_local.py) -> Gemini, solo si el local no está seguro.
+    La caché usa el texto normalizado y la fecha de hoy (las fechas relativas
+    como "mes pasado" cambian de un día a otro).
+    """
+    hoy = timezone.localdate()
+    base = f"{hoy.isoformat()}|{nlp_local.normalizar(texto_usuario)}"
+    clave = 'reportes:nlp:' + hashlib.sha256(base.encode('utf-8')).hexdigest()
+
+    parsed_json = cache.get(clave)
+    if parsed_json is not None:
+        return parsed_json
+
+    parsed_json = nlp_local.interpretar(texto_usuario, hoy)
+    if parsed_json is None:
+        parsed_json = _parse_con_gemini(texto_usuario)
+
+    if "error" not in parsed_json:
+        cache.set(clave, parsed_json, getattr(settings, 'REPORTES_NLP_CACHE_TTL', 24 * 60 * 60))
+    return parsed_json
+
+
+def _parse_con_gemini(texto_usuario: str) -> dict:
     
     try:
-        genai.configure(api_key=api_key)
-        # ¡Usamos 'gemini-pro' que sí existe en la API v1beta!
-        model = genai.GenerativeModel('gemini-2.5-flash')
         fecha_hoy_str = timezone.now().strftime('%Y-%m-%d')
         prompt_final = PROMPT_PLANTILLA.format(
             texto_usuario=texto_usuario,
             fecha_hoy=fecha_hoy_str  # <-- Esta es la variable que causaba el KeyError
         )
 
-        response = model.generate_content(prompt_final)
-        raw_text = response.text.strip()
+        # Cliente compartido (utils/gemini.py): timeout, cupo y circuit breaker
+        raw_text = gemini.generar(prompt_final).strip()
         
         # (Limpieza de JSON...)
         if raw_text.startswith("```json"):
@@ -94,6 +115,10 @@ def parse_natural_query(texto_usuario: str) -> dict:
         parsed_json = json.loads(raw_text)
         return parsed_json
 
+    except gemini.GeminiNoConfigurado:
+        print("ERROR: Clave API_GEMINI no configurada.")
+        return {"error": "API Key no configurada"}
+
     except json.JSONDecodeError as e:
         print(f"Error JSON Decode: No se pudo parsear. Texto crudo: '{raw_text}'")
         return {"error": "Respuesta de IA no es un JSON válido"} 
@@ -106,17 +131,8 @@ def analyze_data_with_gemini(datos_json: str, prompt_analista: str) -> dict:
     """
     Toma un string JSON de datos y un prompt, y le pide a Gemini que los analice.
     """
-    
-    api_key = config('API_GEMINI', default=config('GOOGLE_API_KEY', default=''))
-    if not api_key:
-        print("ERROR: Clave API_GEMINI no configurada.")
-        return {"error": "API Key no configurada"}
 
     try:
-        genai.configure(api_key=api_key)
-        # Usamos el modelo que SÍ te funciona
-        model = genai.GenerativeModel('gemini-2.5-flash') 
-
         # ¡Este es el prompt del Analista!
         # Combina el prompt de instrucciones con los datos.
         prompt_final = f"""
@@ -126,10 +142,14 @@ def analyze_data_with_gemini(datos_json: str, prompt_analista: str) -> dict:
         {datos_json}
         """
 
-        response = model.generate_content(prompt_final)
+        texto = gemini.generar(prompt_final)
         
         # Para el análisis, solo devolvemos el texto crudo.
-        return {"analisis": response.text.strip()}
+        return {"analisis": texto.strip()}
+
+    except gemini.GeminiNoConfigurado:
+        print("ERROR: Clave API_GEMINI no configurada.")
+        return {"error": "API Key no configurada"}
 
     except Exception as e:
         print(f"Error FATAL en Gemini API (Analisis): {type(e).__name__}: {e}")
@@ -0,0 +1,112 @@
+# reports/paquetes.py
+# Paquete de reportes: varios desgloses del mismo rango en una sola descarga.
+#
+# Cada desglose se lee UNA sola vez de los rollups diarios (el extracto del
+# rango ya agregado por día: no se vuelve a filtrar Venta por cada reporte) y
+# de esas mismas filas salen todas las salidas: un Excel con una hoja por
+# reporte, un ZIP con un archivo por reporte o un JSON combinado.
+
+import zipfile
+from io import BytesIO
+
+from . import cache as cache_reportes
+from . import columnar, generators, particiones, streaming
+
+FORMATOS = ('excel', 'zip', 'json')
+
+
+def extraer(empresa, reportes, fecha_inicio, fecha_fin):
+    """Devuelve {reporte: (consulta, filas)}: una consulta por desglose."""
+    extracto = {}
+    for reporte in reportes:
+        consulta = generators.REPORTES[reporte]['consulta'](empresa, fecha_inicio, fecha_fin)
+        extracto[reporte] = (consulta, particiones.leer(consulta, fecha_inicio, fecha_fin))
+    return extracto
+
+
+def _validar(reportes, formato, formato_archivos):
+    invalidos = [r for r in reportes if r not in generators.REPORTES]
+    if invalidos:
+        raise generators.ReporteError(f"Reportes no válidos: {', '.join(invalidos)}.")
+    if formato not in FORMATOS:
+        raise generators.ReporteError(f"Formato de paquete '{formato}' no soportado.")
+    if formato == 'zip':
+        if formato_archivos not in generators.EXTENSIONES:
+            raise generators.ReporteError(f"Formato '{formato_archivos}' no soportado.")
+        if formato_archivos in columnar.FORMATOS and not columnar.disponible():
+            raise generators.ReporteError(f"El formato '{formato_archivos}' requiere pyarrow instalado.")
+
+
+def _excel(extracto):
+    hojas = []
+    for reporte, (_, filas) in extracto.items():
+        definicion = generators.REPORTES[reporte]
+        hojas.append((
+            definicion['hoja'],
+            list(definicion['columnas'].values()),
+            streaming.filas_de_registros(filas, list(definicion['columnas'])),
+        ))
+    return streaming.libro_excel_hojas(hojas)
+
+
+def _zip(extracto, formato_archivos, fecha_inicio, fecha_fin):
+    output = BytesIO()
+    with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as archivo_zip:
+        for reporte, (consulta, filas) in extracto.items():
+            if not filas:
+                continue
+            contenido, _, nombre_archivo = generators.generar_archivo(
+                reporte, formato_archivos, filas, filas[0], consulta, fecha_inicio, fecha_fin
+            )
+            archivo_zip.writestr(nombre_archivo, contenido)
+    return output.getvalue()
+
+
+def _json(extracto):
+    return {
+        reporte: [
+            {campo: fila[campo] for campo in generators.REPORTES[reporte]['columnas']}
+            for fila in filas
+        ]
+        for reporte, (_, filas) in extracto.items()
+    }
+
+
+def construir_paquete(empresa, reportes, formato, fecha_inicio, fecha_fin, formato_archivos='csv'):
+    """
+    formato='excel' | 'zip' -> (contenido, content_type, nombre_archivo)
+    formato='json'          -> {reporte: [filas]}
+    En 'zip', 'formato_archivos' es el formato de cada archivo (csv, excel, pdf...).
+    """
+    _validar(reportes, formato, formato_archivos)
+
+    variante = f'{formato}:{formato_archivos}' if formato == 'zip' else formato
+    clave = cache_reportes.clave_resultado(
+        empresa, 'paquete:' + ','.join(reportes), variante, fecha_inicio, fecha_fin
+    )
+    en_cache = cache_reportes.obtener(clave)
+    if en_cache is not None:
+        return en_cache
+
+    extracto = extraer(empresa, reportes, fecha_inicio, fecha_fin)
+    if not any(filas for _, filas in extracto.values()):
+        raise generators.ReporteError("No se encontraron ventas para este rango.", status=404)
+
+    if formato == 'json':
+        resultado = _json(extracto)
+        cache_reportes.guardar(clave, resultado)
+        return resultado
+
+    nombre_base = (
+        f"paquete_reportes_DESDE_{fecha_inicio.strftime('%Y-%m-%d')}"
+        f"_HASTA_{fecha_fin.strftime('%Y-%m-%d')}"
+    )
+    if formato == 'excel':
+        resultado = (_excel(extracto), generators.CONTENT_TYPES['excel'], f"{nombre_base}.xlsx")
+    else:
+        resultado = (
+            _zip(extracto, formato_archivos, fecha_inicio, fecha_fin),
+            'application/zip', f"{nombre_base}.zip",
+        )
+    cache_reportes.guardar(clave, resultado, tamano=len(resultado[0]))
+    return resultado
@@ -0,0 +1,192 @@
+# reports/particiones.py
+# Agregación en paralelo por particiones de meses para rangos largos.
+#
+# Un reporte de tres años sobre los rollups es un único GROUP BY secuencial.
+# Aquí el rango se corta en particiones de REPORTES_PARTICION_MESES meses
+# calendario; cada partición corre la MISMA consulta del reporte (con un filtro
+# de fecha más) en un hilo del pool, cada hilo con su propia conexión a la BD,
+# y los resultados parciales se combinan en Python:
+#   - las métricas (Sum/Count) se suman por las claves de values(),
+#   - los totales por ventana (SUM(SUM(x)) OVER ()) se recalculan sobre el total,
+#   - el orden es el order_by() de la consulta.
+# Con REPORTES_PARTICION_WORKERS <= 1, o si el rango tiene menos de
+# REPORTES_PARTICION_MINIMO particiones, se ejecuta la consulta de siempre.
+
+import datetime
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.db.models import Count, Sum
+
+from . import rollups
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+# execute_wrapper extra para las conexiones de los hilos del pool (ver observar)
+_observadores = []
+
+
+def _workers():
+    return getattr(settings, 'REPORTES_PARTICION_WORKERS', 4)
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=_workers(), thread_name_prefix='particiones')
+        return _executor
+
+
+def reiniciar():
+    """Descarta el pool (p. ej. tras cambiar REPORTES_PARTICION_WORKERS)."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+        _executor = None
+
+
+def _sumar_meses(dia, meses):
+    mes = dia.month - 1 + meses
+    return datetime.date(dia.year + mes // 12, mes % 12 + 1, 1)
+
+
+def particiones(desde, hasta, meses=None):
+    """
+    [(desde, hasta), ...] del rango cortado en bloques de 'meses' meses
+    calendario (la primera y la última partición pueden ser parciales).
+    """
+    meses = max(1, meses or getattr(settings, 'REPORTES_PARTICION_MESES', 1))
+    lista = []
+    inicio = desde
+    while inicio <= hasta:
+        fin = min(_sumar_meses(inicio.replace(day=1), meses) - datetime.timedelta(days=1), hasta)
+        lista.append((inicio, fin))
+        inicio = fin + datetime.timedelta(days=1)
+    return lista
+
+
+def aplica(fecha_inicio, fecha_fin):
+    """True si el rango se agrega por particiones en paralelo."""
+    if _workers() <= 1:
+        return False
+    # Los hilos usan otras conexiones: dentro de una transacción no verían sus cambios
+    if connection.in_atomic_block:
+        return False
+    desde, hasta = rollups.rango_dias(fecha_inicio, fecha_fin)
+    return len(particiones(desde, hasta)) >= getattr(settings, 'REPORTES_PARTICION_MINIMO', 12)
+
+
+def _parcial(consulta):
+    """Evalúa la consulta de una partición. Corre en un hilo del pool."""
+    # Cada hilo conserva su conexión entre particiones (como un worker entre
+    # peticiones): solo se cierra si superó CONN_MAX_AGE o quedó inutilizable
+    close_old_connections()
+    try:
+        with ExitStack() as pila:
+            for observador in list(_observadores):
+                pila.enter_context(connection.execute_wrapper(observador))
+            return list(consulta)
+    finally:
+        close_old_connections()
+
+
+@contextmanager
+def observar(observador):
+    """
+    Instala 'observador' (un execute_wrapper de Django) en las conexiones de
+    los hilos del pool mientras dure el bloque. CaptureQueriesContext solo ve
+    la conexión del hilo que lo abre; benchmark_suite lo usa para contar
+    también las consultas de las particiones.
+    """
+    _observadores.append(observador)
+    try:
+        yield
+    finally:
+        _observadores.remove(observador)
+
+
+def _estructura(consulta):
+    """(claves, métricas, {ventana: métrica}) de una consulta values().annotate()."""
+    anotaciones = consulta.query.annotation_select
+    claves = list(consulta.query.values_select)
+    metricas = []
+    for nombre, expresion in anotaciones.items():
+        if expresion.contains_over_clause:
+            continue
+        if not isinstance(expresion, (Sum, Count)):
+            raise ValueError(f"La métrica '{nombre}' no se puede combinar por particiones.")
+        metricas.append(nombre)
+
+    ventanas = {}
+    for nombre, expresion in anotaciones.items():
+        if not expresion.contains_over_clause:
+            continue
+        # Window(SumaTotal(Sum('x'))): el total de la métrica que es Sum('x')
+        interna = expresion.source_expression.get_source_expressions()[0]
+        metrica = next((m for m in metricas if anotaciones[m] == interna), None)
+        if metrica is None:
+            raise ValueError(f"La ventana '{nombre}' no se puede combinar por particiones.")
+        ventanas[nombre] = metrica
+    return claves, metricas, ventanas
+
+
+def _ordenar(filas, orden):
+    # Ordenamientos estables del último criterio al primero
+    for criterio in reversed(orden):
+        campo = criterio.lstrip('-')
+        filas.sort(
+            key=lambda fila: (fila[campo] is None, fila[campo] if fila[campo] is not None else 0),
+            reverse=criterio.startswith('-'),
+        )
+    return filas
+
+
+def combinar(consulta, parciales):
+    """Une las filas de cada partición como si vinieran de una sola consulta."""
+    claves, metricas, ventanas = _estructura(consulta)
+    combinadas = {}
+    for filas in parciales:
+        for fila in filas:
+            clave = tuple(fila[c] for c in claves)
+            acumulada = combinadas.get(clave)
+            if acumulada is None:
+                combinadas[clave] = {c: fila[c] for c in claves}
+                combinadas[clave].update({m: fila[m] for m in metricas})
+                continue
+            for m in metricas:
+                if fila[m] is not None:
+                    acumulada[m] = fila[m] if acumulada[m] is None else acumulada[m] + fila[m]
+
+    filas = list(combinadas.values())
+    for ventana, metrica in ventanas.items():
+        total = sum(fila[metrica] for fila in filas if fila[metrica] is not None)
+        for fila in filas:
+            fila[ventana] = total
+    return _ordenar(filas, consulta.query.order_by)
+
+
+def leer(consulta, fecha_inicio, fecha_fin):
+    """
+    Lista de filas de una consulta de rollups ('fecha' en días locales).
+    Rangos largos: una consulta por partición en paralelo y combinación en
+    Python; el resto, la consulta tal cual.
+    """
+    if not aplica(fecha_inicio, fecha_fin):
+        return list(consulta)
+    desde, hasta = rollups.rango_dias(fecha_inicio, fecha_fin)
+    tramos = particiones(desde, hasta)
+    parciales = _get_executor().map(
+        _parcial, [consulta.filter(fecha__range=[inicio, fin]) for inicio, fin in tramos]
+    )
+    filas = combinar(consulta, parciales)
+    logger.debug("Consulta combinada de %d particiones (%d filas)", len(tramos), len(filas))
+    return filas
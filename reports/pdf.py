@@ -0,0 +1,188 @@
+# reports/pdf.py
+# Render de PDF en un pool de procesos de larga vida.
+#
+# Cada proceso del pool inicializa UNA sola vez WeasyPrint, fontconfig
+# (FontConfiguration) y las hojas de estilo de reports/templates/reports/*.html
+# ya parseadas; después solo recibe HTML por la cola del pool y devuelve bytes.
+# El proceso web únicamente renderiza la plantilla de Django.
+#
+# Los reportes grandes se parten en bloques de filas que se renderizan en
+# paralelo y se unen con pypdf. Cada render deja sus tiempos en el log.
+
+import logging
+import multiprocessing
+import os
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+
+from django.conf import settings
+from django.template.loader import render_to_string
+
+try:
+    from pypdf import PdfWriter
+except ImportError:  # Sin pypdf no se puede unir bloques: se renderiza de una vez
+    PdfWriter = None
+
+logger = logging.getLogger(__name__)
+
+CARPETA_PLANTILLAS = os.path.join(os.path.dirname(__file__), 'templates', 'reports')
+_RE_ESTILO = re.compile(r'<style[^>]*>(.*?)</style>', re.S | re.I)
+
+# Claves del contexto que pueden traer las filas de la tabla
+CLAVES_FILAS = ('datos', 'datos_reporte')
+
+
+# --- LADO DEL PROCESO RENDERIZADOR ---
+
+_fuentes = None
+_estilos = {}
+_calentar_lock = threading.Lock()
+
+
+def _calentar():
+    """
+    Initializer de cada proceso del pool: carga fontconfig y parsea el CSS de
+    cada plantilla una sola vez. También se usa si el render corre en el
+    propio proceso web (REPORTES_PDF_WORKERS = 0).
+    """
+    global _fuentes
+    from weasyprint import CSS, HTML
+    from weasyprint.text.fonts import FontConfiguration
+
+    with _calentar_lock:
+        if _fuentes is not None:
+            return
+        fuentes = FontConfiguration()
+        for nombre in sorted(os.listdir(CARPETA_PLANTILLAS)):
+            if not nombre.endswith('.html'):
+                continue
+            with open(os.path.join(CARPETA_PLANTILLAS, nombre), encoding='utf-8') as f:
+                css = '\n'.join(_RE_ESTILO.findall(f.read()))
+            _estilos[f'reports/{nombre}'] = CSS(string=css, font_config=fuentes)
+
+        # Un documento mínimo: resuelve las fuentes del sistema antes del primer reporte
+        HTML(string='<p>SmartSales</p>').write_pdf(font_config=fuentes)
+        _fuentes = fuentes
+
+
+def _render(plantilla, html):
+    """Corre en el pool. Devuelve (bytes del PDF, milisegundos)."""
+    from weasyprint import HTML
+
+    if _fuentes is None:
+        _calentar()
+    inicio = time.perf_counter()
+    estilo = _estilos.get(plantilla)
+    if estilo is not None:
+        # La hoja de estilo ya está parseada: no la volvemos a leer del HTML
+        pdf = HTML(string=_RE_ESTILO.sub('', html)).write_pdf(
+            stylesheets=[estilo], font_config=_fuentes
+        )
+    else:
+        pdf = HTML(string=html).write_pdf(font_config=_fuentes)
+    return pdf, (time.perf_counter() - inicio) * 1000
+
+
+# --- LADO DEL PROCESO WEB ---
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _workers():
+    return getattr(settings, 'REPORTES_PDF_WORKERS', 2)
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # 'spawn': los procesos no heredan las conexiones a la BD del worker web
+            _pool = ProcessPoolExecutor(
+                max_workers=_workers(),
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_calentar,
+            )
+        return _pool
+
+
+def _descartar_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _ejecutar(trabajos):
+    """'trabajos' es una lista de (plantilla, html); devuelve [(pdf, ms)] en el mismo orden."""
+    if _workers() <= 0:
+        return [_render(*trabajo) for trabajo in trabajos]
+    try:
+        pool = _get_pool()
+        futuros = [pool.submit(_render, *trabajo) for trabajo in trabajos]
+        return [futuro.result() for futuro in futuros]
+    except BrokenProcessPool:
+        # Un proceso murió (OOM, señal): se recrea en el próximo render
+        logger.exception("El pool de PDF se rompió; se renderiza en este proceso")
+        _descartar_pool()
+        return [_render(*trabajo) for trabajo in trabajos]
+
+
+def _contextos(context):
+    """
+    Parte el contexto en bloques de REPORTES_PDF_FILAS_POR_BLOQUE filas.
+    El encabezado va solo en el primero ('continuacion') y los totales solo
+    en el último.
+    """
+    clave = next((c for c in CLAVES_FILAS if isinstance(context.get(c), list)), None)
+    tamano = getattr(settings, 'REPORTES_PDF_FILAS_POR_BLOQUE', 500)
+    if PdfWriter is None or clave is None or tamano <= 0 or len(context[clave]) <= tamano:
+        return [context]
+
+    filas = context[clave]
+    bloques = []
+    for inicio in range(0, len(filas), tamano):
+        bloque = dict(context, continuacion=inicio > 0)
+        for c in CLAVES_FILAS:
+            if c in context:
+                bloque[c] = filas[inicio:inicio + tamano]
+        if inicio + tamano < len(filas):
+            bloque.pop('total_general', None)
+        bloques.append(bloque)
+    return bloques
+
+
+def _unir(pdfs):
+    writer = PdfWriter()
+    for pdf in pdfs:
+        writer.append(BytesIO(pdf))
+    output = BytesIO()
+    writer.write(output)
+    return output.getvalue()
+
+
+def renderizar(plantilla, context):
+    """Renderiza la plantilla de reporte a PDF (bytes) usando el pool."""
+    inicio = time.perf_counter()
+    htmls = [(plantilla, render_to_string(plantilla, bloque)) for bloque in _contextos(context)]
+    ms_html = (time.perf_counter() - inicio) * 1000
+
+    resultados = _ejecutar(htmls)
+    ms_render = (time.perf_counter() - inicio) * 1000 - ms_html
+
+    pdfs = [pdf for pdf, _ in resultados]
+    contenido = pdfs[0] if len(pdfs) == 1 else _unir(pdfs)
+    ms_total = (time.perf_counter() - inicio) * 1000
+
+    logger.info(
+        "PDF %s: %d bloque(s) | html %.0f ms | render %.0f ms (por bloque: %s) | unión %.0f ms | total %.0f ms",
+        plantilla, len(pdfs), ms_html, ms_render,
+        ', '.join(f'{ms:.0f}' for _, ms in resultados),
+        ms_total - ms_html - ms_render, ms_total,
+    )
+    return contenido
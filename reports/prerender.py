@@ -0,0 +1,173 @@
+# reports/prerender.py
+# Reportes pre-renderizados para los rangos más pedidos.
+#
+# El comando nocturno 'prerenderizar_reportes' genera, para cada empresa
+# activa, cada reporte en cada formato de los rangos de RANGOS ("últimos 30
+# días", "mes anterior") y guarda el archivo (comprimido con gzip cuando
+# conviene) en ArtefactoReporte. Cuando llega una petición con ese mismo rango,
+# generators._responder sirve el artefacto sin consultar ni renderizar nada.
+#
+# Un artefacto solo se sirve si los datos no cambiaron desde que se generó:
+# la 'huella' resume los rollups del rango (cada venta nueva los recalcula y
+# cambia la huella). Con REPORTES_PRERENDER_MAX_DESFASE > 0 se acepta un
+# artefacto desactualizado de hasta esos segundos, indicándolo en la respuesta.
+
+import datetime
+import gzip
+import hashlib
+import json
+import logging
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db.models import Count, Max
+from django.http import HttpResponse
+from django.utils import timezone
+
+from . import rollups
+from .models import ArtefactoReporte, PagoDiarioMetodo, VentaDiariaSucursal
+
+logger = logging.getLogger(__name__)
+
+
+def _ultimos_30_dias(hoy):
+    # Igual que el rango por defecto de obtener_fechas (ahora - 30 días .. ahora)
+    return hoy - datetime.timedelta(days=30), hoy
+
+
+def _mes_anterior(hoy):
+    fin = hoy.replace(day=1) - datetime.timedelta(days=1)
+    return fin.replace(day=1), fin
+
+
+RANGOS = {
+    'ultimos_30_dias': _ultimos_30_dias,
+    'mes_anterior': _mes_anterior,
+}
+
+
+def rangos(hoy=None):
+    """{nombre: (desde, hasta)} de los rangos estándar para el día local 'hoy'."""
+    hoy = hoy or timezone.localdate()
+    return {nombre: calcular(hoy) for nombre, calcular in RANGOS.items()}
+
+
+def huella(empresa, desde, hasta):
+    """
+    Resume los rollups del rango. Los rollups de un día se borran y se vuelven a
+    crear cada vez que cambia una venta o un pago de ese día, así que el máximo
+    id y el número de filas cambian con cualquier cambio en los datos.
+    """
+    partes = [empresa.id if hasattr(empresa, 'id') else empresa, desde.isoformat(), hasta.isoformat()]
+    for modelo in (VentaDiariaSucursal, PagoDiarioMetodo):
+        partes.append(modelo.objects.filter(
+            empresa=empresa, fecha__range=[desde, hasta]
+        ).aggregate(filas=Count('id'), ultimo=Max('id')))
+    return hashlib.sha256(json.dumps(partes, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+# --- GENERACIÓN (comando nocturno) ---
+
+def _comprimir(contenido):
+    comprimido = gzip.compress(contenido, compresslevel=6, mtime=0)
+    # pdf/xlsx/parquet ya vienen comprimidos: solo se guarda en gzip si ahorra algo
+    if len(comprimido) < len(contenido) * 0.9:
+        return comprimido, 'gzip'
+    return contenido, ''
+
+
+def guardar(empresa, reporte, formato, rango, desde, hasta, huella_datos, resultado):
+    contenido, content_type, nombre_archivo = resultado
+    datos, codificacion = _comprimir(contenido)
+
+    artefacto = ArtefactoReporte.objects.filter(
+        empresa=empresa, reporte=reporte, formato=formato, desde=desde, hasta=hasta
+    ).first() or ArtefactoReporte(
+        empresa=empresa, reporte=reporte, formato=formato, desde=desde, hasta=hasta
+    )
+    if artefacto.archivo:
+        artefacto.archivo.delete(save=False)
+    artefacto.rango = rango
+    artefacto.huella = huella_datos
+    artefacto.codificacion = codificacion
+    artefacto.content_type = content_type
+    artefacto.nombre_archivo = nombre_archivo
+    artefacto.tamano = len(contenido)
+    artefacto.generado_en = timezone.now()
+    sufijo = '.gz' if codificacion == 'gzip' else ''
+    artefacto.archivo.save(f'{empresa.id}_{nombre_archivo}{sufijo}', ContentFile(datos), save=False)
+    artefacto.save()
+    return artefacto
+
+
+def descartar(artefactos):
+    """Borra artefactos y sus archivos."""
+    borrados = 0
+    for artefacto in artefactos:
+        if artefacto.archivo:
+            artefacto.archivo.delete(save=False)
+        artefacto.delete()
+        borrados += 1
+    return borrados
+
+
+def descartar_vencidos(hoy=None):
+    """Borra los artefactos de rangos que ya no son los estándar de hoy."""
+    vigentes = set(rangos(hoy).values())
+    vencidos = [
+        artefacto for artefacto in ArtefactoReporte.objects.all()
+        if (artefacto.desde, artefacto.hasta) not in vigentes
+    ]
+    return descartar(vencidos)
+
+
+# --- LECTURA (endpoints) ---
+
+def buscar(reporte, empresa, formato, fecha_inicio, fecha_fin):
+    """
+    Devuelve (artefacto, desactualizado) si hay uno que sirva para la petición,
+    o None. Solo consulta la BD si el rango pedido es uno de los estándar.
+    """
+    if not getattr(settings, 'REPORTES_PRERENDER_ACTIVO', True):
+        return None
+    desde, hasta = rollups.rango_dias(fecha_inicio, fecha_fin)
+    if (desde, hasta) not in rangos().values():
+        return None
+
+    artefacto = ArtefactoReporte.objects.filter(
+        empresa=empresa, reporte=reporte, formato=formato, desde=desde, hasta=hasta
+    ).first()
+    if artefacto is None:
+        return None
+    if artefacto.huella == huella(empresa, desde, hasta):
+        return artefacto, False
+
+    desfase = getattr(settings, 'REPORTES_PRERENDER_MAX_DESFASE', 0)
+    if desfase and (timezone.now() - artefacto.generado_en).total_seconds() <= desfase:
+        return artefacto, True
+    return None
+
+
+def responder(request, artefacto, desactualizado=False):
+    """
+    HttpResponse con el archivo. Si el cliente acepta gzip, el artefacto
+    comprimido se envía tal cual (Content-Encoding: gzip), sin descomprimir.
+    """
+    with artefacto.archivo.open('rb') as f:
+        datos = f.read()
+    acepta_gzip = 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', '')
+
+    if artefacto.codificacion == 'gzip' and not acepta_gzip:
+        datos = gzip.decompress(datos)
+    response = HttpResponse(datos, content_type=artefacto.content_type)
+    if artefacto.codificacion == 'gzip' and acepta_gzip:
+        response['Content-Encoding'] = 'gzip'
+    response['Vary'] = 'Accept-Encoding'
+    response['Content-Disposition'] = f'attachment; filename="{artefacto.nombre_archivo}"'
+    response['X-Reporte-Prerenderizado'] = artefacto.generado_en.isoformat()
+    if desactualizado:
+        response['X-Datos-Actualizados-En'] = artefacto.generado_en.isoformat()
+        response['X-Datos-Antiguedad-Segundos'] = str(
+            int((timezone.now() - artefacto.generado_en).total_seconds())
+        )
+    return response
@@ -0,0 +1,361 @@
+# reports/rollups.py
+# Mantenimiento y lectura de los rollups diarios (modelos en reports/models.py).
+#
+# La unidad de actualización es (empresa, día): cada vez que se guarda o borra una
+# Venta, DetalleVenta o Pago (reports/signals.py) se recalculan desde las tablas
+# fuente solo los días que ese cambio toca.
+# Recalcular el día completo (en vez de sumar deltas) hace que la operación sea
+# idempotente y que también absorba cambios de estado o ventas borradas.
+
+import datetime
+import logging
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import (
+    Case, Count, DateField, ExpressionWrapper, F, Func, IntegerField, OuterRef, Q,
+    Subquery, Sum, When, Window,
+)
+from django.db.models.functions import Coalesce, TruncDate, TruncDay, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from tenants.models import Empresa
+from ventas.models import Venta, DetalleVenta, Pago
+from .models import (
+    VentaDiariaProducto,
+    VentaDiariaSucursal,
+    VentaDiariaVendedor,
+    PagoDiarioMetodo,
+)
+
+logger = logging.getLogger(__name__)
+
+TAMANO_LOTE = 2000
+
+# Marca "todas las empresas" (None ya significa "ventas sin empresa")
+TODAS = object()
+
+
+# --- FECHAS ---
+
+def a_fecha_local(valor):
+    """
+    Convierte un 'datetime' (consciente o ingenuo) o un 'date' al día local
+    de la zona horaria del proyecto, que es como se agrupan los rollups.
+    """
+    if isinstance(valor, datetime.datetime):
+        if timezone.is_naive(valor):
+            valor = timezone.make_aware(valor)
+        return timezone.localdate(valor)
+    return valor
+
+
+def rango_dias(fecha_inicio, fecha_fin):
+    return a_fecha_local(fecha_inicio), a_fecha_local(fecha_fin)
+
+
+def _inicio_dia(dia):
+    return timezone.make_aware(datetime.datetime.combine(dia, datetime.time.min))
+
+
+# --- DEFINICIÓN DE LOS ROLLUPS ---
+# 'claves' mapea el campo de la consulta fuente -> campo del rollup.
+# 'metricas' mapea el campo del rollup -> agregado sobre la fuente.
+
+def _unidades_por_venta():
+    return DetalleVenta.objects.filter(
+        venta=OuterRef('pk')
+    ).order_by().values('venta').annotate(total=Sum('cantidad')).values('total')
+
+
+def _fuentes():
+    return [
+        {
+            'modelo': VentaDiariaProducto,
+            'origen': DetalleVenta.objects.filter(venta__estado='Completado'),
+            'fecha': 'venta__fecha',
+            'claves': {'venta__empresa': 'empresa_id', 'producto': 'producto_id'},
+            'metricas': {'cantidad': Sum('cantidad'), 'ingresos': Sum('subtotal')},
+        },
+        {
+            'modelo': VentaDiariaSucursal,
+            'origen': Venta.objects.filter(estado='Completado'),
+            'fecha': 'fecha',
+            'claves': {'empresa': 'empresa_id', 'sucursal': 'sucursal_id'},
+            'metricas': {
+                'numero_ventas': Count('id'),
+                'ingresos': Sum('total'),
+                # Subconsulta por venta: un JOIN con DetalleVenta duplicaría Sum('total')
+                'unidades': Sum(Coalesce(Subquery(_unidades_por_venta(), output_field=IntegerField()), 0)),
+            },
+        },
+        {
+            'modelo': VentaDiariaVendedor,
+            'origen': Venta.objects.filter(estado='Completado'),
+            'fecha': 'fecha',
+            'claves': {'empresa': 'empresa_id', 'usuario': 'usuario_id', 'canal': 'canal'},
+            'metricas': {'numero_ventas': Count('id'), 'ingresos': Sum('total')},
+        },
+        {
+            'modelo': PagoDiarioMetodo,
+            'origen': Pago.objects.filter(estado='completado'),
+            'fecha': 'fecha',
+            'claves': {'empresa': 'empresa_id', 'metodo': 'metodo_id'},
+            'metricas': {'numero_pagos': Count('id'), 'monto': Sum('monto')},
+        },
+    ]
+
+
+def _reconstruir_fuente(fuente, empresa_id, desde, hasta):
+    modelo = fuente['modelo']
+    campo_empresa = next(iter(fuente['claves']))
+    destino = modelo.objects.all()
+    origen = fuente['origen']
+
+    if empresa_id is not TODAS:
+        destino = destino.filter(empresa_id=empresa_id)
+        origen = origen.filter(**{campo_empresa: empresa_id})
+    if desde:
+        destino = destino.filter(fecha__gte=desde)
+        origen = origen.filter(**{f"{fuente['fecha']}__gte": _inicio_dia(desde)})
+    if hasta:
+        destino = destino.filter(fecha__lte=hasta)
+        origen = origen.filter(
+            **{f"{fuente['fecha']}__lt": _inicio_dia(hasta + datetime.timedelta(days=1))}
+        )
+
+    # order_by() vacío: el 'ordering' del Meta (ej: '-fecha') rompería el GROUP BY
+    filas = origen.annotate(
+        rollup_dia=TruncDate(fuente['fecha'])
+    ).values(
+        'rollup_dia', *fuente['claves']
+    ).annotate(
+        **{f'rollup_{campo}': agregado for campo, agregado in fuente['metricas'].items()}
+    ).order_by()
+
+    destino.delete()
+
+    nuevos = (
+        modelo(
+            fecha=fila['rollup_dia'],
+            **{campo: fila[clave] for clave, campo in fuente['claves'].items()},
+            **{campo: fila[f'rollup_{campo}'] or 0 for campo in fuente['metricas']},
+        )
+        for fila in filas.iterator(chunk_size=TAMANO_LOTE)
+    )
+    creadas = 0
+    while True:
+        lote = list(islice(nuevos, TAMANO_LOTE))
+        if not lote:
+            break
+        modelo.objects.bulk_create(lote)
+        creadas += len(lote)
+    return creadas
+
+
+def reconstruir(empresa_id=TODAS, desde=None, hasta=None):
+    """
+    Recalcula los rollups de una empresa (o de todas) en el rango de días dado.
+    Sin 'desde'/'hasta' recalcula toda la historia.
+    Devuelve el número de filas de rollup creadas.
+    """
+    creadas = 0
+    with transaction.atomic():
+        if empresa_id is not TODAS and empresa_id is not None:
+            # Serializa las actualizaciones concurrentes de una misma empresa
+            list(Empresa.objects.select_for_update().filter(pk=empresa_id).values_list('pk', flat=True))
+        for fuente in _fuentes():
+            creadas += _reconstruir_fuente(fuente, empresa_id, desde, hasta)
+        # Los resúmenes top-k de esos días (y sus meses) salen del rollup de producto
+        from . import topk
+        topk.reconstruir(empresa_id, desde, hasta)
+        # Nueva versión de los datos: los ETag de los reportes JSON dejan de coincidir
+        from . import condicional
+        condicional.registrar_cambio(empresa_id)
+
+    # Los resultados cacheados de esa empresa y esos días ya no valen
+    from . import cache as cache_reportes
+    transaction.on_commit(lambda: cache_reportes.invalidar(empresa_id, desde, hasta))
+    return creadas
+
+
+def actualizar_dias(pares):
+    """
+    Actualización incremental: recalcula los (empresa_id, día) dados. Por
+    empresa, si los días están juntos se recalcula el rango en una pasada
+    (ej: seed_ml en una sola transacción); si no, día por día.
+    Un fallo aquí no debe tumbar la escritura que lo originó: se registra y
+    el comando 'reconstruir_rollups' lo corrige.
+    """
+    por_empresa = {}
+    for empresa_id, dia in pares:
+        if dia is not None:
+            por_empresa.setdefault(empresa_id, set()).add(dia)
+    for empresa_id, dias in por_empresa.items():
+        try:
+            desde, hasta = min(dias), max(dias)
+            if (hasta - desde).days + 1 <= 2 * len(dias):
+                reconstruir(empresa_id, desde, hasta)
+            else:
+                for dia in sorted(dias):
+                    reconstruir(empresa_id, dia, dia)
+        except Exception:
+            logger.exception("No se pudieron actualizar los rollups de la empresa %s", empresa_id)
+
+
+def dias_de_venta(venta):
+    """(empresa_id, día) que toca una venta: el de su fecha y el de su pago."""
+    dias = set()
+    if venta.fecha:
+        dias.add((venta.empresa_id, a_fecha_local(venta.fecha)))
+    if venta.pago_id and venta.pago and venta.pago.fecha:
+        dias.add((venta.pago.empresa_id, a_fecha_local(venta.pago.fecha)))
+    return dias
+
+
+def actualizar_por_venta(venta_id):
+    """Recalcula los días que toca la venta (y su pago)."""
+    try:
+        venta = Venta.objects.select_related('pago').get(pk=venta_id)
+    except Venta.DoesNotExist:
+        return
+    actualizar_dias(dias_de_venta(venta))
+
+
+# --- LECTURA (usada por reports/views.py y reports/generators.py) ---
+# Los nombres de las columnas son los mismos que usaban las consultas sobre
+# Venta/DetalleVenta/Pago, así las plantillas y los 'rename' no cambian.
+
+class SumaTotal(Func):
+    """
+    SUM() para usar dentro de Window sobre un agregado ya agrupado:
+    Window(SumaTotal(Sum('x'))) -> SUM(SUM(x)) OVER ().
+    (Sum() de Django no acepta otro agregado como argumento.)
+    """
+    function = 'SUM'
+    window_compatible = True
+
+
+def ventas_por_producto(empresa, fecha_inicio, fecha_fin, con_totales=True):
+    """
+    Una sola consulta: filas por producto y, con 'con_totales', el total
+    general repetido en cada fila (total_cantidad, total_ingresos) vía
+    función de ventana, en vez de un exists() + aggregate() aparte.
+    """
+    desde, hasta = rango_dias(fecha_inicio, fecha_fin)
+    datos = VentaDiariaProducto.objects.filter(
+        empresa=empresa,
+        fecha__range=[desde, hasta]
+    ).values(
+        'producto__nombre', 'producto__sku'
+    ).annotate(
+        cantidad_total=Sum('cantidad'),
+        ingresos_totales=Sum('ingresos')
+    )
+    if con_totales:
+        datos = datos.annotate(
+            total_cantidad=Window(SumaTotal(Sum('cantidad'))),
+            total_ingresos=Window(SumaTotal(Sum('ingresos'))),
+        )
+    return datos.order_by('-ingresos_totales')
+
+
+def ventas_por_sucursal(empresa, fecha_inicio, fecha_fin):
+    desde, hasta = rango_dias(fecha_inicio, fecha_fin)
+    return VentaDiariaSucursal.objects.filter(
+        empresa=empresa,
+        fecha__range=[desde, hasta]
+    ).values(
+        'sucursal__nombre'
+    ).annotate(
+        numero_ventas=Sum('numero_ventas'),
+        ingresos_totales=Sum('ingresos')
+    ).order_by('-ingresos_totales')
+
+
+def ventas_por_vendedor(empresa, fecha_inicio, fecha_fin, canal='POS'):
+    desde, hasta = rango_dias(fecha_inicio, fecha_fin)
+    return VentaDiariaVendedor.objects.filter(
+        empresa=empresa,
+        canal=canal,
+        fecha__range=[desde, hasta]
+    ).values(
+        'usuario__email', 'usuario__nombre', 'usuario__apellido',
+    ).annotate(
+        numero_ventas=Sum('numero_ventas'),
+        ingresos_totales=Sum('ingresos')
+    ).order_by('-ingresos_totales')
+
+
+def ingresos_por_metodo_pago(empresa, fecha_inicio, fecha_fin):
+    desde, hasta = rango_dias(fecha_inicio, fecha_fin)
+    return PagoDiarioMetodo.objects.filter(
+        empresa=empresa,
+        fecha__range=[desde, hasta]
+    ).values(
+        'metodo__nombre'
+    ).annotate(
+        numero_pagos=Sum('numero_pagos'),
+        monto_total=Sum('monto')
+    ).order_by('-monto_total')
+
+
+# --- SERIE TEMPORAL ---
+
+TRUNCADORES = {'dia': TruncDay, 'semana': TruncWeek, 'mes': TruncMonth}
+METRICAS_SERIE = {'ingresos': 'ingresos', 'tickets': 'numero_ventas', 'unidades': 'unidades'}
+
+
+def periodo_anterior(fecha_inicio, fecha_fin):
+    """El rango de la misma duración inmediatamente anterior: (desde, hasta) en días locales."""
+    desde, hasta = rango_dias(fecha_inicio, fecha_fin)
+    duracion = hasta - desde + datetime.timedelta(days=1)
+    return desde - duracion, desde - datetime.timedelta(days=1)
+
+
+def columnas_serie(comparar=False):
+    columnas = [f'{nombre}_actual' for nombre in METRICAS_SERIE]
+    if comparar:
+        columnas += [f'{nombre}_anterior' for nombre in METRICAS_SERIE]
+    return columnas
+
+
+def serie_temporal(empresa, fecha_inicio, fecha_fin, granularidad='dia', comparar=False):
+    """
+    Ingresos, tickets y unidades por día/semana/mes (el truncado lo hace la BD).
+    Con 'comparar', la MISMA consulta lee también el periodo anterior: sus días
+    se corren hacia adelante una duración completa, así caen en los mismos
+    buckets, y se suman aparte con agregados filtrados (*_actual / *_anterior).
+    """
+    desde, hasta = rango_dias(fecha_inicio, fecha_fin)
+    en_rango = Q(fecha__gte=desde)
+    fecha = F('fecha')
+    desde_consulta = desde
+
+    if comparar:
+        desde_consulta, _ = periodo_anterior(desde, hasta)
+        corrimiento = desde - desde_consulta
+        fecha = Case(
+            When(fecha__lt=desde, then=ExpressionWrapper(F('fecha') + corrimiento, output_field=DateField())),
+            default=F('fecha'),
+            output_field=DateField(),
+        )
+
+    metricas = {
+        f'{nombre}_actual': Sum(campo, filter=en_rango) for nombre, campo in METRICAS_SERIE.items()
+    }
+    if comparar:
+        metricas.update({
+            f'{nombre}_anterior': Sum(campo, filter=~en_rango) for nombre, campo in METRICAS_SERIE.items()
+        })
+
+    return VentaDiariaSucursal.objects.filter(
+        empresa=empresa,
+        fecha__range=[desde_consulta, hasta]
+    ).annotate(
+        periodo=TRUNCADORES[granularidad](fecha, output_field=DateField())
+    ).values(
+        'periodo'
+    ).annotate(
+        **metricas
+    ).order_by('periodo')
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from django.urls import reverse
 from .models import ReportDefinition, ReportRun
 
 class ReportDefinitionSerializer(serializers.ModelSerializer):
@@ -10,4 +11,21 @@ class ReportRunSerializer(serializers.ModelSerializer):
     class Meta:
         model = ReportRun
         fields = '__all__'
-        read_only_fields = ('estado','archivo','started_at','finished_at','error')
\ No newline at end of file
+        read_only_fields = ('estado','archivo','started_at','finished_at','error')
+
+class TrabajoReporteSerializer(serializers.ModelSerializer):
+    """Vista resumida de un ReportRun usado como trabajo de exportación."""
+    reporte = serializers.CharField(source='report.slug', read_only=True)
+    descarga_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ReportRun
+        fields = ('id', 'reporte', 'formato', 'filtros', 'estado', 'error',
+                  'created_at', 'started_at', 'finished_at', 'descarga_url')
+
+    def get_descarga_url(self, obj):
+        if obj.estado != 'DONE':
+            return None
+        url = reverse('descargar-trabajo-reporte', args=[obj.pk])
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
@@ -0,0 +1,134 @@
+# reports/signals.py
+# Mantiene los rollups al día con CUALQUIER escritura de Venta, DetalleVenta o
+# Pago: VentaViewSet.registrar_venta, el CRUD de los SoftDeleteViewSet (incluido
+# un PATCH que pasa una venta a 'Completado'), el admin o el shell.
+#
+# Cada cambio anota los (empresa, día) que toca: el estado anterior (leído de la
+# BD en pre_save) y el nuevo (post_save, o pre_delete al borrar), así un cambio
+# de fecha recalcula el día viejo y el nuevo (con save(update_fields=...) sin
+# esos campos no se relee la fila). Al confirmar la transacción se recalculan
+# todos juntos una sola vez (rollups.actualizar_dias), lo que también sube la
+# versión de CambioVentas (ETag/304), invalida la caché y cambia la huella de
+# los artefactos prerenderizados y los resúmenes top-k.
+#
+# Las operaciones masivas (bulk_create, QuerySet.update/delete) no emiten
+# señales: después de ellas hay que correr 'reconstruir_rollups'.
+
+import threading
+import weakref
+
+from django.db import transaction
+from django.db.models.signals import post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from ventas.models import DetalleVenta, Pago, Venta
+
+from . import rollups
+
+# alias de la conexión -> weakref al _Pendientes de la transacción en curso.
+# Django guarda la única referencia fuerte en sus callbacks de on_commit: si
+# la transacción (o el savepoint donde se programó) se deshace, los descarta y
+# la weakref muere, así la siguiente escritura programa un callback nuevo.
+_pendientes = threading.local()
+
+# Campos que deciden el (empresa, día) que toca cada modelo
+_CAMPOS_DIA = {
+    Venta: {'empresa', 'empresa_id', 'fecha'},
+    Pago: {'empresa', 'empresa_id', 'fecha'},
+    DetalleVenta: {'venta', 'venta_id'},
+}
+
+
+class _Pendientes:
+    """Callback de on_commit que junta los (empresa, día) de toda la transacción."""
+
+    def __init__(self, using, dias):
+        self.using = using
+        self.dias = set(dias)
+
+    def __call__(self):
+        # Se suelta antes de recalcular: lo que se escriba desde aquí es otra transacción
+        _pendientes.__dict__.pop(self.using, None)
+        rollups.actualizar_dias(self.dias)
+
+
+def _anotar(dias, using):
+    dias = {(empresa_id, dia) for empresa_id, dia in dias if dia is not None}
+    if not dias:
+        return
+    if not transaction.get_connection(using).in_atomic_block:
+        # Autocommit: on_commit lo ejecuta en el acto
+        transaction.on_commit(_Pendientes(using, dias), using=using)
+        return
+    referencia = getattr(_pendientes, using, None)
+    pendientes = referencia() if referencia is not None else None
+    if pendientes is not None:
+        pendientes.dias |= dias
+        return
+    pendientes = _Pendientes(using, dias)
+    setattr(_pendientes, using, weakref.ref(pendientes))
+    transaction.on_commit(pendientes, using=using)
+
+
+def _dia(valor):
+    return rollups.a_fecha_local(valor) if valor else None
+
+
+def _dias_venta_id(venta_id, using):
+    fila = Venta.objects.using(using).filter(pk=venta_id).values_list('empresa_id', 'fecha').first()
+    return {(fila[0], _dia(fila[1]))} if fila else set()
+
+
+def _dias(instancia, using):
+    """(empresa, día) que toca la instancia tal como está en memoria."""
+    if isinstance(instancia, Venta):
+        return {(instancia.empresa_id, _dia(instancia.fecha))}
+    if isinstance(instancia, Pago):
+        return {(instancia.empresa_id, _dia(instancia.fecha))}
+    # DetalleVenta: el día de su venta
+    if DetalleVenta.venta.is_cached(instancia) and instancia.venta is not None:
+        return {(instancia.venta.empresa_id, _dia(instancia.venta.fecha))}
+    return _dias_venta_id(instancia.venta_id, using)
+
+
+def _dias_guardados(sender, instancia, using, update_fields=None):
+    """(empresa, día) que tocaba la fila antes de este cambio (vacío si es nueva)."""
+    if instancia.pk is None:
+        return set()
+    if update_fields is not None and not _CAMPOS_DIA[sender] & set(update_fields):
+        # save(update_fields=...) sin fecha/empresa/venta: el día no cambia
+        return set()
+    if sender is DetalleVenta:
+        venta_id = DetalleVenta.objects.using(using).filter(pk=instancia.pk).values_list('venta_id', flat=True).first()
+        return _dias_venta_id(venta_id, using) if venta_id else set()
+    fila = sender.objects.using(using).filter(pk=instancia.pk).values_list('empresa_id', 'fecha').first()
+    return {(fila[0], _dia(fila[1]))} if fila else set()
+
+
+@receiver(pre_save, sender=Venta)
+@receiver(pre_save, sender=DetalleVenta)
+@receiver(pre_save, sender=Pago)
+def leer_antes_de_guardar(sender, instance, raw=False, using=None, update_fields=None, **kwargs):
+    if raw:  # loaddata
+        return
+    # Solo se guarda en la instancia: pre_save corre fuera de la transacción del
+    # save() y en autocommit on_commit ejecutaría el recálculo antes de guardar
+    instance._rollup_dias_antes = _dias_guardados(sender, instance, using, update_fields)
+
+
+@receiver(post_save, sender=Venta)
+@receiver(post_save, sender=DetalleVenta)
+@receiver(post_save, sender=Pago)
+def anotar_guardado(sender, instance, raw=False, using=None, **kwargs):
+    if raw:
+        return
+    _anotar(getattr(instance, '_rollup_dias_antes', set()) | _dias(instance, using), using)
+    instance._rollup_dias_antes = set()
+
+
+@receiver(pre_delete, sender=Venta)
+@receiver(pre_delete, sender=DetalleVenta)
+@receiver(pre_delete, sender=Pago)
+def anotar_antes_de_borrar(sender, instance, using=None, **kwargs):
+    # En pre_delete: en post_delete de un detalle borrado en cascada su venta ya no existe
+    _anotar(_dias(instance, using), using)
@@ -0,0 +1,84 @@
+# reports/streaming.py
+# Exportación CSV/Excel en streaming: las filas se escriben a medida que llegan
+# del cursor de la BD (queryset.iterator usa un cursor del lado del servidor
+# en PostgreSQL), así la memoria no crece con el tamaño del reporte.
+
+import csv
+from io import BytesIO
+
+from django.http import StreamingHttpResponse
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+
+# Filas por lote leído del cursor y por bloque enviado al cliente
+TAMANO_LOTE = 2000
+
+
+class _Eco:
+    """Pseudo-archivo: csv.writer escribe aquí y recibimos la línea tal cual."""
+    def write(self, value):
+        return value
+
+
+def lineas_csv(encabezados, filas, tamano_bloque=TAMANO_LOTE):
+    """
+    Genera el CSV en bloques de texto. 'filas' es cualquier iterable de
+    tuplas/listas (normalmente un queryset.iterator()).
+    """
+    writer = csv.writer(_Eco())
+    bloque = [writer.writerow(encabezados)]
+    for fila in filas:
+        bloque.append(writer.writerow(fila))
+        if len(bloque) >= tamano_bloque:
+            yield ''.join(bloque)
+            bloque = []
+    if bloque:
+        yield ''.join(bloque)
+
+
+def libro_excel(hoja, encabezados, filas):
+    """
+    Genera un XLSX con openpyxl en modo write-only: cada fila se serializa al
+    XML de la hoja en cuanto llega (sin DataFrame ni modelo de celdas en
+    memoria). Devuelve los bytes del libro, ya comprimido.
+    """
+    return libro_excel_hojas([(hoja, encabezados, filas)])
+
+
+def libro_excel_hojas(hojas):
+    """Igual que libro_excel pero con varias hojas: [(hoja, encabezados, filas), ...]."""
+    libro = Workbook(write_only=True)
+    for hoja, encabezados, filas in hojas:
+        sheet = libro.create_sheet(title=hoja)
+
+        titulos = []
+        for titulo in encabezados:
+            celda = WriteOnlyCell(sheet, value=titulo)
+            celda.font = Font(bold=True)
+            titulos.append(celda)
+        sheet.append(titulos)
+
+        for fila in filas:
+            sheet.append(fila)
+
+    output = BytesIO()
+    libro.save(output)
+    return output.getvalue()
+
+
+def filas_de_registros(registros, campos):
+    """De un iterable de dicts (filas de values()) devuelve solo 'campos', en orden."""
+    for registro in registros:
+        yield [registro[campo] for campo in campos]
+
+
+def filas_de_queryset(queryset, campos, tamano_lote=TAMANO_LOTE):
+    """Recorre un queryset de values() con cursor y devuelve solo 'campos', en orden."""
+    return filas_de_registros(queryset.iterator(chunk_size=tamano_lote), campos)
+
+
+def respuesta_csv(nombre_archivo, encabezados, filas):
+    response = StreamingHttpResponse(lineas_csv(encabezados, filas), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{nombre_archivo}"'
+    return response
@@ -0,0 +1,231 @@
+# reports/topk.py
+# Resúmenes top-k ("más vendidos") por empresa y bucket de tiempo.
+#
+# Para cada empresa y día se guarda un resumen de los productos con más
+# ingresos (capacidad REPORTES_TOPK_CAPACIDAD), y para cada mes la
+# combinación de sus días (ResumenTopProductos). Un top-k de cualquier rango
+# combina los meses completos del rango y los días sueltos de los extremos:
+# para tres años son ~36 resúmenes en vez de agrupar todos los productos.
+#
+# El resumen es el de Space-Saving en su forma combinable: cada producto lleva
+# (estimado, error) con ingresos reales en [estimado - error, estimado], y
+# 'minimo' acota los ingresos de cualquier producto que no aparece. Así el
+# resultado informa su propia cota de error.
+#
+# Igual que los rollups, el resumen de un día se recalcula completo (desde el
+# rollup de producto de ese día) cada vez que rollups.reconstruir toca ese día,
+# y después el de su mes. Los ingresos se guardan en centavos (enteros).
+
+import datetime
+from decimal import Decimal
+from itertools import groupby
+
+from django.conf import settings
+
+from . import rollups
+from .models import ResumenTopProductos, VentaDiariaProducto
+
+
+def _capacidad():
+    return getattr(settings, 'REPORTES_TOPK_CAPACIDAD', 200)
+
+
+def a_centavos(valor):
+    return int((Decimal(valor) * 100).to_integral_value())
+
+
+def a_moneda(centavos):
+    return (Decimal(centavos) / 100).quantize(Decimal('0.01'))
+
+
+class ResumenTopK:
+    """
+    Top-k combinable. contadores: {item: [estimado, error]}; minimo: cota
+    superior de cualquier item ausente; total: suma exacta de todos los pesos.
+    """
+
+    def __init__(self, capacidad, contadores=None, minimo=0, total=0):
+        self.capacidad = capacidad
+        self.contadores = contadores or {}
+        self.minimo = minimo
+        self.total = total
+
+    @classmethod
+    def exacto(cls, pesos, capacidad):
+        """Desde pesos exactos [(item, peso)] con items distintos: error 0."""
+        ordenados = sorted(pesos, key=lambda par: par[1], reverse=True)
+        return cls(
+            capacidad,
+            {item: [peso, 0] for item, peso in ordenados[:capacidad]},
+            minimo=ordenados[capacidad][1] if len(ordenados) > capacidad else 0,
+            total=sum(peso for _, peso in ordenados),
+        )
+
+    @classmethod
+    def combinar(cls, resumenes, capacidad):
+        """
+        Un item ausente de un resumen pudo sumar hasta su 'minimo' ahí: se
+        cuenta como estimado y como error. Lo que no entra en la capacidad
+        sube el 'minimo' del resultado.
+        """
+        resumenes = list(resumenes)
+        base = sum(r.minimo for r in resumenes)
+        estimados, errores = {}, {}
+        for r in resumenes:
+            for item, (estimado, error) in r.contadores.items():
+                estimados[item] = estimados.get(item, 0) + estimado - r.minimo
+                errores[item] = errores.get(item, 0) + error - r.minimo
+        ordenados = sorted(estimados, key=estimados.get, reverse=True)
+        minimo = base
+        if len(ordenados) > capacidad:
+            minimo = max(minimo, base + estimados[ordenados[capacidad]])
+        return cls(
+            capacidad,
+            {item: [base + estimados[item], base + errores[item]] for item in ordenados[:capacidad]},
+            minimo=minimo,
+            total=sum(r.total for r in resumenes),
+        )
+
+    def top(self, k):
+        """[(item, estimado, error)] de los k mayores estimados."""
+        ordenados = sorted(self.contadores.items(), key=lambda par: par[1][0], reverse=True)
+        return [(item, estimado, error) for item, (estimado, error) in ordenados[:k]]
+
+    def cota_fuera(self, k):
+        """Cota superior de los ingresos de cualquier item fuera de top(k)."""
+        siguientes = self.top(k + 1)
+        return max(self.minimo, siguientes[k][1] if len(siguientes) > k else 0)
+
+    def a_json(self):
+        return {
+            'capacidad': self.capacidad,
+            'contadores': [[item, estimado, error] for item, (estimado, error) in self.contadores.items()],
+            'minimo': self.minimo,
+            'total': self.total,
+        }
+
+    @classmethod
+    def de_json(cls, datos):
+        return cls(
+            datos['capacidad'],
+            {item: [estimado, error] for item, estimado, error in datos['contadores']},
+            minimo=datos['minimo'],
+            total=datos['total'],
+        )
+
+
+# --- MANTENIMIENTO (desde rollups.reconstruir) ---
+
+def _inicio_mes(dia):
+    return dia.replace(day=1)
+
+
+def _fin_mes(dia):
+    return (dia.replace(day=28) + datetime.timedelta(days=4)).replace(day=1) - datetime.timedelta(days=1)
+
+
+def _filtrar(queryset, empresa_id, desde, hasta):
+    if empresa_id is not rollups.TODAS:
+        queryset = queryset.filter(empresa_id=empresa_id)
+    if desde:
+        queryset = queryset.filter(fecha__gte=desde)
+    if hasta:
+        queryset = queryset.filter(fecha__lte=hasta)
+    return queryset
+
+
+def _reconstruir(modelo_resumen, modelo_rollup, empresa_id, desde, hasta, capacidad):
+    """Con los modelos como parámetro para poder usarlo también desde una migración."""
+    # 1. Días: desde el rollup exacto de producto de cada día
+    filas = _filtrar(modelo_rollup.objects.all(), empresa_id, desde, hasta).values_list(
+        'empresa_id', 'fecha', 'producto_id', 'ingresos'
+    ).order_by('empresa_id', 'fecha')
+    dias = [
+        modelo_resumen(
+            empresa_id=empresa, granularidad='dia', fecha=fecha,
+            resumen=ResumenTopK.exacto(
+                [(producto, a_centavos(ingresos)) for _, _, producto, ingresos in grupo], capacidad
+            ).a_json(),
+        )
+        for (empresa, fecha), grupo in groupby(
+            filas.iterator(chunk_size=rollups.TAMANO_LOTE), key=lambda fila: (fila[0], fila[1])
+        )
+    ]
+    _filtrar(modelo_resumen.objects.filter(granularidad='dia'), empresa_id, desde, hasta).delete()
+    modelo_resumen.objects.bulk_create(dias, batch_size=rollups.TAMANO_LOTE)
+
+    # 2. Meses que tocan esos días: combinación de sus resúmenes diarios
+    inicio = _inicio_mes(desde) if desde else None
+    fin = _fin_mes(hasta) if hasta else None
+    diarios = _filtrar(modelo_resumen.objects.filter(granularidad='dia'), empresa_id, inicio, fin).values_list(
+        'empresa_id', 'fecha', 'resumen'
+    ).order_by('empresa_id', 'fecha')
+    meses = [
+        modelo_resumen(
+            empresa_id=empresa, granularidad='mes', fecha=mes,
+            resumen=ResumenTopK.combinar(
+                (ResumenTopK.de_json(resumen) for _, _, resumen in grupo), capacidad
+            ).a_json(),
+        )
+        for (empresa, mes), grupo in groupby(
+            diarios.iterator(chunk_size=rollups.TAMANO_LOTE), key=lambda fila: (fila[0], _inicio_mes(fila[1]))
+        )
+    ]
+    _filtrar(modelo_resumen.objects.filter(granularidad='mes'), empresa_id, inicio, fin).delete()
+    modelo_resumen.objects.bulk_create(meses, batch_size=rollups.TAMANO_LOTE)
+    return len(dias) + len(meses)
+
+
+def reconstruir(empresa_id=rollups.TODAS, desde=None, hasta=None):
+    """Recalcula los resúmenes de los días del rango y de sus meses."""
+    return _reconstruir(ResumenTopProductos, VentaDiariaProducto, empresa_id, desde, hasta, _capacidad())
+
+
+# --- LECTURA ---
+
+def resumen(empresa, fecha_inicio, fecha_fin):
+    """
+    ResumenTopK del rango, combinando los meses completos y los días de los
+    extremos; None si no hay resúmenes (sin ventas o aún sin construir).
+    """
+    desde, hasta = rollups.rango_dias(fecha_inicio, fecha_fin)
+    primer_mes = desde if desde.day == 1 else _fin_mes(desde) + datetime.timedelta(days=1)
+    ultimo_mes = _inicio_mes(hasta) if hasta == _fin_mes(hasta) else _inicio_mes(hasta) - datetime.timedelta(days=1)
+
+    resumenes = ResumenTopProductos.objects.filter(empresa=empresa)
+    if primer_mes <= ultimo_mes:
+        # Meses completos [primer_mes, fin de ultimo_mes] y días sueltos a los lados
+        resumenes = (
+            resumenes.filter(granularidad='mes', fecha__range=[primer_mes, _inicio_mes(ultimo_mes)])
+            | resumenes.filter(granularidad='dia', fecha__range=[desde, primer_mes - datetime.timedelta(days=1)])
+            | resumenes.filter(granularidad='dia', fecha__range=[_fin_mes(ultimo_mes) + datetime.timedelta(days=1), hasta])
+        )
+    else:
+        resumenes = resumenes.filter(granularidad='dia', fecha__range=[desde, hasta])
+
+    lista = [ResumenTopK.de_json(datos) for datos in resumenes.values_list('resumen', flat=True)]
+    if not lista:
+        return None
+    return ResumenTopK.combinar(lista, _capacidad())
+
+
+def top_productos(empresa, fecha_inicio, fecha_fin, k=10):
+    """
+    Top-k de ventas_por_producto usando los resúmenes para elegir candidatos.
+    Los 2k candidatos se re-agregan de forma exacta en el rollup (las cifras
+    devueltas son exactas); lo aproximado es solo quién entra en el top.
+    Devuelve (filas, cotas) o None si no hay resúmenes para el rango:
+      cotas['error_maximo']: ingresos máximos de un producto que quedó fuera,
+      cotas['exacto']: True si ningún producto de fuera puede superar al k-ésimo.
+    """
+    datos = resumen(empresa, fecha_inicio, fecha_fin)
+    if datos is None:
+        return None
+    candidatos = [item for item, _, _ in datos.top(2 * k)]
+    filas = list(rollups.ventas_por_producto(
+        empresa, fecha_inicio, fecha_fin, con_totales=False
+    ).filter(producto_id__in=candidatos)[:k])
+
+    fuera = a_moneda(datos.cota_fuera(2 * k))
+    exacto = fuera == 0 or (len(filas) == k and filas[-1]['ingresos_totales'] >= fuera)
+    return filas, {'error_maximo': fuera, 'exacto': exacto}
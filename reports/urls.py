@@ -3,11 +3,18 @@
 from django.urls import path
 from .views import (
     ReporteVentasPorProducto, 
+    ReporteSerieTemporalVentas,
     ReporteVentasPorSucursal,
     ReporteVentasPorVendedor,
     ReporteIngresosPorMetodoPago,
+    ExportarLineasVentaView,
     GenerarReporteNLPView,
     AnalizarVentasProductoView,
+    PaqueteReportesView,
+    LibroVentasView,
+    CrearTrabajoReporteView,
+    EstadoTrabajoReporteView,
+    DescargarTrabajoReporteView,
 )
 urlpatterns = [
     path(
@@ -15,6 +22,11 @@ urlpatterns = [
         ReporteVentasPorProducto.as_view(), 
         name='reporte-filtrado-ventas-producto'
     ),
+    path(
+        'filtrado/serie-temporal/', 
+        ReporteSerieTemporalVentas.as_view(), 
+        name='reporte-filtrado-serie-temporal'
+    ),
     path(
         'filtrado/ventas-por-sucursal/', 
         ReporteVentasPorSucursal.as_view(), 
@@ -30,6 +42,11 @@ urlpatterns = [
         ReporteIngresosPorMetodoPago.as_view(), 
         name='reporte-filtrado-metodo-pago'
     ),
+    path(
+        'exportar/lineas-venta/', 
+        ExportarLineasVentaView.as_view(), 
+        name='exportar-lineas-venta'
+    ),
     path(
         'generar-con-nlp/', 
         GenerarReporteNLPView.as_view(), 
@@ -40,4 +57,29 @@ urlpatterns = [
         AnalizarVentasProductoView.as_view(), 
         name='analizar-ventas-producto'
     ),
+    path(
+        'paquete/', 
+        PaqueteReportesView.as_view(), 
+        name='paquete-reportes'
+    ),
+    path(
+        'libro-ventas/', 
+        LibroVentasView.as_view(), 
+        name='libro-ventas'
+    ),
+    path(
+        'trabajos/', 
+        CrearTrabajoReporteView.as_view(), 
+        name='crear-trabajo-reporte'
+    ),
+    path(
+        'trabajos/<int:pk>/', 
+        EstadoTrabajoReporteView.as_view(), 
+        name='estado-trabajo-reporte'
+    ),
+    path(
+        'trabajos/<int:pk>/descargar/', 
+        DescargarTrabajoReporteView.as_view(), 
+        name='descargar-trabajo-reporte'
+    ),
 ]
\ No newline at end of file
@@ -1,24 +1,64 @@
 # reports/views.py
 
-from django.http import HttpResponse
+from django.http import HttpResponse, FileResponse, StreamingHttpResponse
 from rest_framework.generics import ListAPIView
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAdminUser
-from django.db.models import Sum, Count
 from django_filters.rest_framework import DjangoFilterBackend
-import json
-from django.db.models import Sum
 import datetime
+from django.conf import settings
 from django.utils import timezone
 
 # ¡Importamos la "Fábrica" y el "Intérprete"!
-from . import generators
-from .nlp_utils import parse_natural_query, analyze_data_with_gemini
+from . import analisis, columnar, condicional, generators, hechos, jobs, libro_ventas, paquetes, particiones, rollups, streaming, topk
+from . import cache as cache_reportes
+from .nlp_utils import parse_natural_query
 
 # Importamos los modelos y filtros para las vistas
 from ventas.models import Venta, Pago, DetalleVenta
 from .filters import ReporteVentaFilter, ReportePagoFilter
+from .models import ReportRun
+from .serializers import TrabajoReporteSerializer
+
+# --- FECHAS ---
+def obtener_fechas(params):
+    """
+    Obtiene las fechas de los parámetros (query params o body) o establece
+    un default (últimos 30 días).
+    Devuelve (fecha_inicio, fecha_fin) como objetos 'datetime' CONSCIENTES.
+    """
+    fecha_inicio_str = params.get('fecha_inicio', None)
+    fecha_fin_str = params.get('fecha_fin', None)
+
+    try:
+        if not fecha_inicio_str or not fecha_fin_str:
+            # Caso 1: Default (últimos 30 días)
+            fecha_fin_dt = timezone.now() # <-- Ya es consciente
+            fecha_inicio_dt = fecha_fin_dt - datetime.timedelta(days=30)
+        else:
+            # Caso 2: Fechas de la URL
+
+            # Convertimos string a 'datetime' ingenuo
+            fecha_inicio_naive = datetime.datetime.strptime(fecha_inicio_str, '%Y-%m-%d')
+            fecha_fin_naive = datetime.datetime.strptime(fecha_fin_str, '%Y-%m-%d')
+
+            # ¡LA MAGIA! Los hacemos "conscientes"
+            fecha_inicio_dt = timezone.make_aware(fecha_inicio_naive)
+
+            # Para la fecha final, queremos incluir el DÍA COMPLETO
+            # Así que la ponemos al final del día (23:59:59)
+            fecha_fin_dt = timezone.make_aware(
+                datetime.datetime.combine(fecha_fin_naive.date(), datetime.time.max)
+            )
+
+        return fecha_inicio_dt, fecha_fin_dt
+
+    except ValueError:
+        # Si el formato es malo, usa el default
+        fecha_fin_dt = timezone.now()
+        fecha_inicio_dt = fecha_fin_dt - datetime.timedelta(days=30)
+        return fecha_inicio_dt, fecha_fin_dt
 
 # --- CLASE BASE PARA OBTENER FECHAS ---
 # Esto es para no repetir el código de fechas en cada vista
@@ -28,39 +68,8 @@ class BaseReporteView(ListAPIView):
     def get_fechas(self, request):
             """
             Obtiene las fechas de la URL o establece un default (últimos 30 días).
-            Devuelve (fecha_inicio, fecha_fin) como objetos 'datetime' CONSCIENTES.
             """
-            fecha_inicio_str = request.query_params.get('fecha_inicio', None)
-            fecha_fin_str = request.query_params.get('fecha_fin', None)
-
-            try:
-                if not fecha_inicio_str or not fecha_fin_str:
-                    # Caso 1: Default (últimos 30 días)
-                    fecha_fin_dt = timezone.now() # <-- Ya es consciente
-                    fecha_inicio_dt = fecha_fin_dt - datetime.timedelta(days=30)
-                else:
-                    # Caso 2: Fechas de la URL
-                    
-                    # Convertimos string a 'datetime' ingenuo
-                    fecha_inicio_naive = datetime.datetime.strptime(fecha_inicio_str, '%Y-%m-%d')
-                    fecha_fin_naive = datetime.datetime.strptime(fecha_fin_str, '%Y-%m-%d')
-                    
-                    # ¡LA MAGIA! Los hacemos "conscientes"
-                    fecha_inicio_dt = timezone.make_aware(fecha_inicio_naive)
-                    
-                    # Para la fecha final, queremos incluir el DÍA COMPLETO
-                    # Así que la ponemos al final del día (23:59:59)
-                    fecha_fin_dt = timezone.make_aware(
-                        datetime.datetime.combine(fecha_fin_naive.date(), datetime.time.max)
-                    )
-
-                return fecha_inicio_dt, fecha_fin_dt
-                
-            except ValueError:
-                # Si el formato es malo, usa el default
-                fecha_fin_dt = timezone.now()
-                fecha_inicio_dt = fecha_fin_dt - datetime.timedelta(days=30)
-                return fecha_inicio_dt, fecha_fin_dt
+            return obtener_fechas(request.query_params)
 
 # --- VISTAS DE REPORTES (Ahora súper limpias) ---
 
@@ -73,31 +82,45 @@ class ReporteVentasPorProducto(BaseReporteView):
         formato = request.query_params.get('formato', 'json').lower()
         fecha_inicio, fecha_fin = self.get_fechas(request)
 
-        if formato in ['excel', 'pdf', 'csv']:
+        if formato in generators.EXTENSIONES:
             return generators.generar_reporte_producto(request, formato, fecha_inicio, fecha_fin)
 
-        base_query = Venta.objects.filter(
-            estado='Completado',
-            empresa=request.user.empresa
+        # Top 10 con los resúmenes top-k (reports/topk.py); ?exacto=true, o
+        # REPORTES_TOPK_ACTIVO en False, lo recalcula de forma exacta
+        exacto = (
+            request.query_params.get('exacto', '').lower() == 'true'
+            or not getattr(settings, 'REPORTES_TOPK_ACTIVO', True)
         )
-        ventas_filtradas = base_query.filter(
-            fecha__range=[fecha_inicio, fecha_fin]
+        # Sin ventas nuevas desde la última consulta del cliente: 304 sin agregar nada
+        validador = condicional.validador(request, fecha_inicio, fecha_fin)
+        no_modificado = condicional.no_modificado(request, validador)
+        if no_modificado is not None:
+            return no_modificado
+        clave = cache_reportes.clave_resultado(
+            request.user.empresa, 'ventas_producto_exacto' if exacto else 'ventas_producto',
+            'json', fecha_inicio, fecha_fin
         )
-        if not ventas_filtradas.exists():
-             return Response({"error": "No se encontraron ventas para este rango."}, status=404)
-
-        ventas_ids = ventas_filtradas.values_list('id', flat=True)
-        datos_agregados = DetalleVenta.objects.filter(
-            venta__id__in=ventas_ids
-        ).values(
-            'producto__nombre', 'producto__sku'
-        ).annotate(
-            cantidad_total=Sum('cantidad'),
-            ingresos_totales=Sum('subtotal')
-        ).order_by('-ingresos_totales')
+        guardado = cache_reportes.obtener(clave)
+        if guardado is not None:
+            return condicional.marcar(self._responder_top(*guardado), validador)
+
+        top = None if exacto else topk.top_productos(request.user.empresa, fecha_inicio, fecha_fin, k=10)
+        if top is not None:
+            datos_agregados, cotas = top
+        else:
+            # Una sola consulta con LIMIT 10 (sin exists() previo); los rangos
+            # largos se agregan por particiones en paralelo y se recortan aquí
+            consulta = rollups.ventas_por_producto(
+                request.user.empresa, fecha_inicio, fecha_fin, con_totales=False
+            )
+            if particiones.aplica(fecha_inicio, fecha_fin):
+                datos_agregados = particiones.leer(consulta, fecha_inicio, fecha_fin)[:10]
+            else:
+                datos_agregados = list(consulta[:10])
+            cotas = {'error_maximo': 0, 'exacto': True}
 
         if not datos_agregados:
-            return Response({"error": "Sin datos de detalle de venta."}, status=404)
+            return Response({"error": "No se encontraron ventas para este rango."}, status=404)
         datos_para_grafico = [
             {
                 'name': item['producto__nombre'] or 'Sin Producto',
@@ -105,9 +128,69 @@ class ReporteVentasPorProducto(BaseReporteView):
                 'cantidad': item['cantidad_total'], 
                 'sku': item['producto__sku']  
             }
-            for item in datos_agregados[:10] 
+            for item in datos_agregados
         ]
-        return Response(datos_para_grafico)
+        cache_reportes.guardar(clave, (datos_para_grafico, cotas))
+        return condicional.marcar(self._responder_top(datos_para_grafico, cotas), validador)
+
+    def _responder_top(self, datos_para_grafico, cotas):
+        # Cota de error del top: ingresos máximos (Bs.) de un producto que quedó fuera
+        response = Response(datos_para_grafico)
+        response['X-Top-Exacto'] = 'true' if cotas['exacto'] else 'false'
+        response['X-Top-Error-Maximo'] = str(cotas['error_maximo'])
+        return response
+
+class ReporteSerieTemporalVentas(BaseReporteView):
+    """
+    Tendencia de ingresos, tickets y unidades por día, semana o mes.
+    GET ?granularidad=dia|semana|mes&comparar=true&fecha_inicio=&fecha_fin=
+    Respuesta compacta para gráficos: 'columnas' + 'filas' (lista de listas).
+    Con comparar=true cada fila trae también el periodo anterior de igual duración.
+    """
+    queryset = Venta.objects.all()
+    filterset_class = ReporteVentaFilter
+
+    def get(self, request, *args, **kwargs):
+        fecha_inicio, fecha_fin = self.get_fechas(request)
+        granularidad = request.query_params.get('granularidad', 'dia').lower()
+        comparar = request.query_params.get('comparar', '').lower() in ('1', 'true', 'si', 'sí')
+
+        if granularidad not in rollups.TRUNCADORES:
+            return Response(
+                {"error": f"Granularidad '{granularidad}' no válida. Usa: {', '.join(rollups.TRUNCADORES)}."},
+                status=400,
+            )
+
+        validador = condicional.validador(request, fecha_inicio, fecha_fin)
+        no_modificado = condicional.no_modificado(request, validador)
+        if no_modificado is not None:
+            return no_modificado
+
+        # La clave cubre también los meses del periodo anterior, si se compara
+        desde_clave = rollups.periodo_anterior(fecha_inicio, fecha_fin)[0] if comparar else fecha_inicio
+        clave = cache_reportes.clave_resultado(
+            request.user.empresa, f'serie_temporal:{granularidad}:{int(comparar)}', 'json',
+            desde_clave, fecha_fin
+        )
+        datos = cache_reportes.obtener(clave)
+        if datos is not None:
+            return condicional.marcar(Response(datos), validador)
+
+        columnas = rollups.columnas_serie(comparar)
+
+        serie = rollups.serie_temporal(
+            request.user.empresa, fecha_inicio, fecha_fin, granularidad, comparar
+        )
+        datos = {
+            'granularidad': granularidad,
+            'columnas': ['periodo'] + columnas,
+            'filas': [
+                [fila['periodo'].isoformat()] + [fila[columna] or 0 for columna in columnas]
+                for fila in serie
+            ],
+        }
+        cache_reportes.guardar(clave, datos)
+        return condicional.marcar(Response(datos), validador)
 
 class ReporteVentasPorSucursal(BaseReporteView):
     queryset = Venta.objects.all()
@@ -116,21 +199,25 @@ class ReporteVentasPorSucursal(BaseReporteView):
     def get(self, request, *args, **kwargs):
         formato = request.query_params.get('formato', 'json').lower()
         fecha_inicio, fecha_fin = self.get_fechas(request)
-        if formato == 'excel' or formato == 'pdf' or formato == 'csv':
+        if formato in generators.EXTENSIONES:
             return generators.generar_reporte_sucursal(request, formato, fecha_inicio, fecha_fin)
 
-        base_query = Venta.objects.filter(
-            estado='Completado',
-            empresa=request.user.empresa,
-            fecha__range=[fecha_inicio, fecha_fin]
+        validador = condicional.validador(request, fecha_inicio, fecha_fin)
+        no_modificado = condicional.no_modificado(request, validador)
+        if no_modificado is not None:
+            return no_modificado
+
+        clave = cache_reportes.clave_resultado(
+            request.user.empresa, 'ventas_sucursal', 'json', fecha_inicio, fecha_fin
+        )
+        datos_para_grafico = cache_reportes.obtener(clave)
+        if datos_para_grafico is not None:
+            return condicional.marcar(Response(datos_para_grafico), validador)
+
+        datos_agregados = particiones.leer(
+            rollups.ventas_por_sucursal(request.user.empresa, fecha_inicio, fecha_fin),
+            fecha_inicio, fecha_fin,
         )
-        
-        datos_agregados = base_query.values(
-            'sucursal__nombre'  
-        ).annotate(
-            numero_ventas=Count('id'),
-            ingresos_totales=Sum('total') # Asumo que es 'total', igual que tu generador
-        ).order_by('-ingresos_totales')
 
         datos_para_grafico = [
             {
@@ -141,7 +228,8 @@ class ReporteVentasPorSucursal(BaseReporteView):
             for item in datos_agregados
         ]
 
-        return Response(datos_para_grafico)
+        cache_reportes.guardar(clave, datos_para_grafico)
+        return condicional.marcar(Response(datos_para_grafico), validador)
 
 class ReporteVentasPorVendedor(BaseReporteView):
     queryset = Venta.objects.all()
@@ -162,6 +250,89 @@ class ReporteIngresosPorMetodoPago(BaseReporteView):
         return generators.generar_reporte_metodo_pago(request, formato, fecha_inicio, fecha_fin)
 
 
+class ExportarLineasVentaView(BaseReporteView):
+    """
+    Exporta en CSV (streaming) cada línea de venta (DetalleVenta) del rango.
+    Con ?formato=excel devuelve un XLSX (openpyxl write-only) y con
+    ?formato=parquet|arrow el mismo contenido en formato columnar.
+    Las filas se leen con un cursor del lado del servidor y se escriben a
+    medida que llegan, así la memoria no depende del número de líneas.
+    Si se lee de la vista materializada (reports/hechos.py), la respuesta trae
+    X-Datos-Actualizados-En y X-Datos-Antiguedad-Segundos.
+    """
+    queryset = DetalleVenta.objects.all()
+
+    COLUMNAS = {
+        'venta__numero_nota': 'Nota de Venta',
+        'venta__fecha': 'Fecha',
+        'venta__sucursal__nombre': 'Sucursal',
+        'venta__usuario__email': 'Vendedor',
+        'venta__canal': 'Canal',
+        'producto__sku': 'SKU',
+        'producto__nombre': 'Producto',
+        'cantidad': 'Cantidad',
+        'precio_unitario': 'Precio Unitario (Bs.)',
+        'subtotal': 'Subtotal (Bs.)',
+    }
+
+    def get(self, request, *args, **kwargs):
+        fecha_inicio, fecha_fin = self.get_fechas(request)
+
+        # En PostgreSQL, si la vista materializada está al día, se lee de ella
+        # (sin JOIN) y la respuesta indica la antigüedad de los datos
+        refrescada = hechos.vigente()
+        if refrescada is not None:
+            lineas = hechos.lineas(request.user.empresa, fecha_inicio, fecha_fin)
+            columnas = hechos.COLUMNAS_LINEAS
+        else:
+            lineas = DetalleVenta.objects.filter(
+                venta__estado='Completado',
+                venta__empresa=request.user.empresa,
+                venta__fecha__range=[fecha_inicio, fecha_fin]
+            ).order_by(
+                'venta__fecha', 'venta_id', 'id'
+            ).values(*self.COLUMNAS)
+            columnas = self.COLUMNAS
+
+        nombre_base = (
+            f"lineas_venta_DESDE_{fecha_inicio.strftime('%Y-%m-%d')}"
+            f"_HASTA_{fecha_fin.strftime('%Y-%m-%d')}"
+        )
+
+        formato = request.query_params.get('formato', 'csv').lower()
+        if formato in columnar.FORMATOS or formato == 'excel':
+            if formato == 'excel':
+                # Excel no admite zona horaria: la fecha va como hora local
+                def filas_excel():
+                    for fila in streaming.filas_de_queryset(lineas, list(columnas)):
+                        fila[1] = timezone.make_naive(fila[1])
+                        yield fila
+
+                contenido = streaming.libro_excel(
+                    'Lineas_de_Venta', list(columnas.values()), filas_excel()
+                )
+            else:
+                # Columnar: la fecha se conserva como timestamp (no como texto)
+                if not columnar.disponible():
+                    return HttpResponse(f"El formato '{formato}' requiere pyarrow instalado.", status=400)
+                contenido = columnar.escribir(
+                    formato, lineas.iterator(chunk_size=streaming.TAMANO_LOTE), lineas, columnas
+                )
+            response = HttpResponse(contenido, content_type=generators.CONTENT_TYPES[formato])
+            response['Content-Disposition'] = (
+                f'attachment; filename="{nombre_base}.{generators.EXTENSIONES[formato]}"'
+            )
+            return hechos.marcar_antiguedad(response, refrescada)
+
+        def filas():
+            for fila in streaming.filas_de_queryset(lineas, list(columnas)):
+                fila[1] = timezone.localtime(fila[1]).strftime('%Y-%m-%d %H:%M:%S')
+                yield fila
+
+        response = streaming.respuesta_csv(f"{nombre_base}.csv", list(columnas.values()), filas())
+        return hechos.marcar_antiguedad(response, refrescada)
+
+
 # --- ¡LA NUEVA VISTA DE NLP! ---
 
 class GenerarReporteNLPView(APIView):
@@ -240,6 +411,9 @@ class AnalizarVentasProductoView(APIView):
     Eres un analista de negocios experto en retail de electrodomésticos.
     He extraído un reporte de ventas por producto de mi base de datos.
     Tu tarea es analizar este JSON y darme recomendaciones accionables.
+    El JSON trae: 'resumen' (estadísticas ya calculadas del período), 'top'
+    (los productos con más ingresos, con las columnas indicadas en 'columnas')
+    y 'otros' (el resto de productos, agregado).
 
     Por favor, dame:
     1.  Un resumen muy corto (una frase) del producto estrella.
@@ -266,40 +440,187 @@ class AnalizarVentasProductoView(APIView):
                 fecha_fin = timezone.now().date()
                 fecha_inicio = fecha_fin - datetime.timedelta(days=30)
 
-        # --- 2. Hacer la Consulta (Copiado de tu generador) ---
-        base_query = Venta.objects.filter(
-            estado='Completado',
-            empresa=request.user.empresa
-        )
-        ventas_filtradas = base_query.filter(fecha__range=[fecha_inicio, fecha_fin])
-        
-        if not ventas_filtradas.exists():
+        # Mismos datos que en la consulta anterior del cliente: 304 (ni rollup ni Gemini)
+        validador = condicional.validador(request, fecha_inicio, fecha_fin)
+        no_modificado = condicional.no_modificado(request, validador)
+        if no_modificado is not None:
+            return no_modificado
+
+        # --- 2. Hacer la Consulta (mismo rollup que el generador) ---
+        # ¡Importante! Convertimos el QuerySet (que no es JSON) a una lista:
+        # una sola consulta, que también sirve para saber si hay datos.
+        lista_datos = particiones.leer(rollups.ventas_por_producto(
+            request.user.empresa, fecha_inicio, fecha_fin, con_totales=False
+        ), fecha_inicio, fecha_fin)
+
+        if not lista_datos:
             return Response({"error": "No se encontraron ventas para este rango."}, status=404)
 
-        ventas_ids = ventas_filtradas.values_list('id', flat=True)
-        datos_reporte = DetalleVenta.objects.filter(
-            venta__id__in=ventas_ids
-        ).values(
-            'producto__nombre', 'producto__sku'
-        ).annotate(
-            cantidad_total=Sum('cantidad'),
-            ingresos_totales=Sum('subtotal')
-        ).order_by('-ingresos_totales')
-
-        if not datos_reporte:
-            return Response({"error": "Sin datos de detalle de venta para analizar."}, status=404)
-
-        # --- 3. Convertir Datos a JSON ---
-        # ¡Importante! Convertimos el QuerySet (que no es JSON) a una lista
-        # y luego a un string de JSON.
-        lista_datos = list(datos_reporte)
-        datos_json_str = json.dumps(lista_datos, default=str) # default=str por si hay decimales
-
-        # --- 4. Llamar al "Cerebro Analista" ---
-        resultado = analyze_data_with_gemini(datos_json_str, self.PROMPT_ANALISTA)
+        # --- 3 y 4. Compactar los datos (top N + "otros" + resumen, dentro del
+        # presupuesto de tokens) y llamar al "Cerebro Analista", con caché ---
+        resultado, _ = analisis.analizar(lista_datos, self.PROMPT_ANALISTA)
         
         # --- 5. Devolver el Análisis ---
         if "error" in resultado:
             return Response(resultado, status=500)
             
-        return Response(resultado)
\ No newline at end of file
+        return condicional.marcar(Response(resultado), validador)
+
+
+# --- LIBRO DE VENTAS (CONTABILIDAD) ---
+
+class LibroVentasView(APIView):
+    """
+    Libro de ventas a nivel de línea (venta + detalle + pago + método +
+    sucursal + vendedor) en filas planas, paginado por cursor.
+    GET ?fecha_inicio=YYYY-MM-DD&fecha_fin=YYYY-MM-DD (opcionales: sin ellas, todo el libro)
+        &estado=Completado (opcional)
+        &limite=1000 (máx. 10000) &cursor=<cursor_siguiente de la página anterior>
+        &formato=json (paginado) | ndjson (todo el libro desde el cursor, en streaming)
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        params = request.query_params
+        fecha_inicio = fecha_fin = None
+        if params.get('fecha_inicio') or params.get('fecha_fin'):
+            fecha_inicio, fecha_fin = obtener_fechas(params)
+
+        try:
+            lineas = libro_ventas.consulta(
+                request.user.empresa, fecha_inicio, fecha_fin,
+                estado=params.get('estado'), cursor=params.get('cursor'),
+            )
+        except libro_ventas.CursorInvalido as e:
+            return Response({"error": str(e)}, status=400)
+
+        formato = params.get('formato', 'json').lower()
+        if formato == 'ndjson':
+            response = StreamingHttpResponse(
+                libro_ventas.lineas_ndjson(lineas), content_type='application/x-ndjson'
+            )
+            response['Content-Disposition'] = 'attachment; filename="libro_ventas.ndjson"'
+            return response
+        if formato != 'json':
+            return Response({"error": f"Formato '{formato}' no soportado. Usa json o ndjson."}, status=400)
+
+        try:
+            limite = int(params.get('limite', libro_ventas.LIMITE_DEFECTO))
+        except ValueError:
+            return Response({"error": "'limite' debe ser un número entero."}, status=400)
+        limite = max(1, min(limite, libro_ventas.LIMITE_MAXIMO))
+
+        filas, cursor_siguiente = libro_ventas.pagina(lineas, limite)
+        siguiente = None
+        if cursor_siguiente:
+            query = params.copy()
+            query['cursor'] = cursor_siguiente
+            siguiente = request.build_absolute_uri(f"{request.path}?{query.urlencode()}")
+        return Response({
+            'cursor_siguiente': cursor_siguiente,
+            'siguiente': siguiente,
+            'resultados': filas,
+        })
+
+
+# --- PAQUETE DE REPORTES ---
+
+class PaqueteReportesView(APIView):
+    """
+    Varios reportes del mismo rango en una sola descarga; cada desglose se
+    consulta una sola vez.
+    GET ?reportes=ventas_producto,ventas_sucursal (default: todos)
+        &formato=excel (una hoja por reporte) | zip | json
+        &formato_archivos=csv|excel|pdf|parquet|arrow (solo para zip)
+        &fecha_inicio=YYYY-MM-DD&fecha_fin=YYYY-MM-DD
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        params = request.query_params
+        reportes = [r.strip() for r in params.get('reportes', '').split(',') if r.strip()]
+        formato = params.get('formato', 'excel').lower()
+        fecha_inicio, fecha_fin = obtener_fechas(params)
+
+        validador = condicional.validador(request, fecha_inicio, fecha_fin) if formato == 'json' else None
+        no_modificado = condicional.no_modificado(request, validador)
+        if no_modificado is not None:
+            return no_modificado
+
+        try:
+            resultado = paquetes.construir_paquete(
+                request.user.empresa,
+                reportes or list(generators.REPORTES),
+                formato, fecha_inicio, fecha_fin,
+                formato_archivos=params.get('formato_archivos', 'csv').lower(),
+            )
+        except generators.ReporteError as e:
+            return Response({"error": e.mensaje}, status=e.status)
+
+        if formato == 'json':
+            return condicional.marcar(Response(resultado), validador)
+
+        contenido, content_type, nombre_archivo = resultado
+        response = HttpResponse(contenido, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{nombre_archivo}"'
+        return response
+
+
+# --- TRABAJOS ASÍNCRONOS DE EXPORTACIÓN ---
+
+class CrearTrabajoReporteView(APIView):
+    """
+    Encola la generación de un reporte (pdf/excel/csv) y devuelve el id del
+    trabajo al instante. Si ya hay un trabajo idéntico en curso, devuelve ese.
+    Body: { "reporte": "ventas_producto", "formato": "pdf",
+            "fecha_inicio": "YYYY-MM-DD", "fecha_fin": "YYYY-MM-DD" }
+    """
+    permission_classes = [IsAdminUser]
+
+    def post(self, request, *args, **kwargs):
+        reporte = request.data.get('reporte', '')
+        formato = request.data.get('formato', 'pdf').lower()
+        fecha_inicio, fecha_fin = obtener_fechas(request.data)
+
+        try:
+            run, creado = jobs.encolar(
+                request.user.empresa, request.user, reporte, formato, fecha_inicio, fecha_fin
+            )
+        except generators.ReporteError as e:
+            return Response({"error": e.mensaje}, status=e.status)
+
+        data = TrabajoReporteSerializer(run, context={'request': request}).data
+        data['deduplicado'] = not creado
+        return Response(data, status=202)
+
+class EstadoTrabajoReporteView(APIView):
+    """Estado de un trabajo de exportación (para hacer polling)."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, pk, *args, **kwargs):
+        run = ReportRun.objects.select_related('report').filter(
+            pk=pk, empresa=request.user.empresa
+        ).first()
+        if not run:
+            return Response({"error": "Trabajo no encontrado."}, status=404)
+        return Response(TrabajoReporteSerializer(run, context={'request': request}).data)
+
+class DescargarTrabajoReporteView(APIView):
+    """Descarga el archivo de un trabajo terminado."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, pk, *args, **kwargs):
+        run = ReportRun.objects.filter(pk=pk, empresa=request.user.empresa).first()
+        if not run:
+            return Response({"error": "Trabajo no encontrado."}, status=404)
+        if run.estado != 'DONE' or not run.archivo:
+            return Response(
+                {"error": "El reporte todavía no está listo.", "estado": run.estado},
+                status=409
+            )
+        return FileResponse(
+            run.archivo.open('rb'),
+            as_attachment=True,
+            filename=run.archivo.name.rsplit('/', 1)[-1],
+            content_type=generators.CONTENT_TYPES.get(run.formato, 'application/octet-stream'),
+        )
@@ -15,6 +15,7 @@ from pathlib import Path
 from decouple import config, Csv
 import dj_database_url
 import os
+from corsheaders.defaults import default_headers
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -110,6 +111,25 @@ else:
         }
     }
 
+# CACHE: Redis si hay REDIS_URL (compartida entre workers de gunicorn),
+# si no, memoria local del proceso. Con LocMem y varios workers los reportes
+# siguen al día (la clave lleva la versión de CambioVentas, ver
+# reports/cache.py), pero cada worker calcula y guarda su propia copia
+REDIS_URL = config("REDIS_URL", default=None)
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
 # Password validators (igual que antes)
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -161,6 +181,14 @@ SIMPLE_JWT = {
 # CORS
 CORS_ALLOWED_ORIGINS = config("CORS_ALLOWED_ORIGINS", cast=Csv(), default="")
 CORS_ALLOW_CREDENTIALS = True
+# Indicadores de frescura de los reportes (reports/hechos.py y reports/prerender.py),
+# cota del top (reports/topk.py) y validadores del GET condicional (reports/condicional.py)
+CORS_EXPOSE_HEADERS = [
+    "Content-Disposition", "X-Datos-Actualizados-En", "X-Datos-Antiguedad-Segundos", "X-Reporte-Prerenderizado",
+    "X-Top-Exacto", "X-Top-Error-Maximo", "ETag", "Last-Modified", "X-Recomendaciones-Precalculadas",
+]
+# El frontend puede revalidar los reportes JSON él mismo (304 si no hubo ventas)
+CORS_ALLOW_HEADERS = (*default_headers, "if-none-match", "if-modified-since")
 CSRF_TRUSTED_ORIGINS = config("CSRF_TRUSTED_ORIGINS", cast=Csv(), default="")
 
 # SWAGGER
@@ -171,4 +199,101 @@ SWAGGER_SETTINGS = {
     },
 }
 
-STRIPE_SECRET_KEY = config('STRIPE_SECRET_KEY')
\ No newline at end of file
+STRIPE_SECRET_KEY = config('STRIPE_SECRET_KEY')
+
+# REPORTES
+# Hilos por proceso para los trabajos de exportación asíncronos (reports/jobs.py)
+REPORTES_WORKERS = config("REPORTES_WORKERS", default=2, cast=int)
+# Segundos tras los que un trabajo PENDING/RUNNING se considera colgado
+REPORTES_JOB_TIMEOUT = config("REPORTES_JOB_TIMEOUT", default=900, cast=int)
+# Caché de resultados de reportes (reports/cache.py)
+REPORTES_CACHE_TTL = config("REPORTES_CACHE_TTL", default=600, cast=int)
+REPORTES_CACHE_MAX_BYTES = config("REPORTES_CACHE_MAX_BYTES", default=5 * 1024 * 1024, cast=int)
+# Procesos renderizadores de PDF (reports/pdf.py); 0 = renderizar en el proceso web
+REPORTES_PDF_WORKERS = config("REPORTES_PDF_WORKERS", default=2, cast=int)
+# Filas por bloque: los PDF más grandes se renderizan en paralelo por bloques y se unen
+REPORTES_PDF_FILAS_POR_BLOQUE = config("REPORTES_PDF_FILAS_POR_BLOQUE", default=500, cast=int)
+# Segundos que se recuerda la interpretación de un prompt de reporte (reports/nlp_utils.py)
+REPORTES_NLP_CACHE_TTL = config("REPORTES_NLP_CACHE_TTL", default=24 * 60 * 60, cast=int)
+# Análisis con Gemini (reports/analisis.py): filas del top, presupuesto del JSON y caché
+REPORTES_ANALISIS_TOP_N = config("REPORTES_ANALISIS_TOP_N", default=25, cast=int)
+REPORTES_ANALISIS_MAX_TOKENS = config("REPORTES_ANALISIS_MAX_TOKENS", default=1500, cast=int)
+REPORTES_ANALISIS_CACHE_TTL = config("REPORTES_ANALISIS_CACHE_TTL", default=7 * 24 * 60 * 60, cast=int)
+# Vista materializada de hechos (solo PostgreSQL, 'refrescar_hechos'): se usa si
+# está activada y su último refresco no tiene más de estos segundos
+REPORTES_USAR_VISTA_HECHOS = config("REPORTES_USAR_VISTA_HECHOS", default=True, cast=bool)
+REPORTES_HECHOS_MAX_ANTIGUEDAD = config("REPORTES_HECHOS_MAX_ANTIGUEDAD", default=60 * 60, cast=int)
+# Reportes pre-renderizados por 'prerenderizar_reportes' (reports/prerender.py).
+# Por defecto solo se sirven si los datos no cambiaron; con MAX_DESFASE > 0 se
+# aceptan artefactos de hasta esos segundos aunque haya ventas nuevas
+REPORTES_PRERENDER_ACTIVO = config("REPORTES_PRERENDER_ACTIVO", default=True, cast=bool)
+REPORTES_PRERENDER_MAX_DESFASE = config("REPORTES_PRERENDER_MAX_DESFASE", default=0, cast=int)
+# Rangos largos por particiones de meses en paralelo (reports/particiones.py):
+# meses por partición, hilos (1 = desactivado, una sola consulta) y número
+# mínimo de particiones para que valga la pena repartir
+REPORTES_PARTICION_MESES = config("REPORTES_PARTICION_MESES", default=1, cast=int)
+REPORTES_PARTICION_WORKERS = config("REPORTES_PARTICION_WORKERS", default=4, cast=int)
+REPORTES_PARTICION_MINIMO = config("REPORTES_PARTICION_MINIMO", default=12, cast=int)
+# Top de productos con resúmenes top-k por día/mes (reports/topk.py); con ACTIVO
+# en False (o ?exacto=true) el top se recalcula de forma exacta sobre los rollups
+REPORTES_TOPK_ACTIVO = config("REPORTES_TOPK_ACTIVO", default=True, cast=bool)
+REPORTES_TOPK_CAPACIDAD = config("REPORTES_TOPK_CAPACIDAD", default=200, cast=int)
+
+# PREDICCIONES
+# Ids por petición en los endpoints de lote (predictions/views.py)
+PREDICCIONES_MAX_LOTE = config("PREDICCIONES_MAX_LOTE", default=1000, cast=int)
+# Carga de modelos (predictions/modelos.py): precargarlos al importar smartsales/wsgi.py
+# (con gunicorn --preload, en el master) y mmap_mode de joblib.load ('' = sin mmap)
+PREDICCIONES_PRECARGAR_MODELOS = config("PREDICCIONES_PRECARGAR_MODELOS", default=True, cast=bool)
+PREDICCIONES_MODELOS_MMAP = config("PREDICCIONES_MODELOS_MMAP", default="r")
+# Registro de versiones (predictions/registro.py): cada cuántos segundos revisa cada worker
+# si cambió la versión activa (0 = nunca) y cuántas versiones no fijadas se conservan
+PREDICCIONES_MODELOS_INTERVALO = config("PREDICCIONES_MODELOS_INTERVALO", default=30, cast=int)
+PREDICCIONES_MODELOS_CONSERVAR = config("PREDICCIONES_MODELOS_CONSERVAR", default=3, cast=int)
+# Top-K de recomendaciones precalculado por 'precalcular_recomendaciones' (predictions/recomendaciones.py).
+# Pasada esta antigüedad (o si el modelo es más nuevo) se vuelve a calcular con el modelo en cada petición
+PREDICCIONES_RECOMENDACIONES_K = config("PREDICCIONES_RECOMENDACIONES_K", default=10, cast=int)
+PREDICCIONES_RECOMENDACIONES_MAX_ANTIGUEDAD = config("PREDICCIONES_RECOMENDACIONES_MAX_ANTIGUEDAD", default=7 * 24 * 60 * 60, cast=int)
+# Motor de /recommend/ por defecto: 'modelo' (RandomForest) o 'coocurrencia' (predictions/coocurrencia.py),
+# con su métrica (lift, coseno, jaccard) y las ventas juntas mínimas para recomendar un par
+PREDICCIONES_RECOMENDADOR = config("PREDICCIONES_RECOMENDADOR", default="modelo")
+PREDICCIONES_COOCURRENCIA_METRICA = config("PREDICCIONES_COOCURRENCIA_METRICA", default="lift")
+PREDICCIONES_COOCURRENCIA_MIN_SOPORTE = config("PREDICCIONES_COOCURRENCIA_MIN_SOPORTE", default=1, cast=int)
+
+# GEMINI (utils/gemini.py): cliente compartido por reports y products
+GEMINI_MODELO = config("GEMINI_MODELO", default="gemini-2.5-flash")
+# Vacío = API de Google; p. ej. http://127.0.0.1:8765 para el servidor simulado (gemini_simulado)
+GEMINI_API_ENDPOINT = config("GEMINI_API_ENDPOINT", default="")
+# Segundos máximos por llamada
+GEMINI_TIMEOUT = config("GEMINI_TIMEOUT", default=30, cast=int)
+# Llamadas simultáneas por proceso y segundos de espera por un cupo libre
+GEMINI_MAX_CONCURRENCIA = config("GEMINI_MAX_CONCURRENCIA", default=4, cast=int)
+GEMINI_ESPERA_CUPO_SEGUNDOS = config("GEMINI_ESPERA_CUPO_SEGUNDOS", default=2, cast=int)
+# Circuit breaker: respuestas más lentas que esto cuentan como fallo;
+# tras N fallos seguidos se deja de llamar a la API durante X segundos
+GEMINI_LENTO_SEGUNDOS = config("GEMINI_LENTO_SEGUNDOS", default=15, cast=int)
+GEMINI_FALLOS_PARA_ABRIR = config("GEMINI_FALLOS_PARA_ABRIR", default=3, cast=int)
+GEMINI_ABIERTO_SEGUNDOS = config("GEMINI_ABIERTO_SEGUNDOS", default=30, cast=int)
+
+# Tiempos de render y errores de los módulos de reportes a la consola
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "reports": {
+            "handlers": ["console"],
+            "level": config("REPORTES_LOG_LEVEL", default="INFO"),
+        },
+        "utils": {
+            "handlers": ["console"],
+            "level": config("REPORTES_LOG_LEVEL", default="INFO"),
+        },
+        "predictions": {
+            "handlers": ["console"],
+            "level": config("REPORTES_LOG_LEVEL", default="INFO"),
+        },
+    },
+}
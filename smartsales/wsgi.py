@@ -14,3 +14,15 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'smartsales.settings')
 
 application = get_wsgi_application()
+
+# Modelos ML (predictions/modelos.py): con gunicorn --preload (gunicorn.conf.py)
+# esto corre una vez en el master y los workers los heredan copy-on-write
+from django.conf import settings
+
+if settings.PREDICCIONES_PRECARGAR_MODELOS:
+    from django.db import connections
+    from predictions import modelos
+
+    modelos.precargar()
+    # Los workers no deben heredar la conexión a la BD del master (registro de versiones)
+    connections.close_all()
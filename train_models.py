@@ -2,7 +2,6 @@ import os
 import django
 import pandas as pd
 from sklearn.ensemble import RandomForestRegressor, RandomForestClassifier
-import joblib
 from datetime import timedelta
 from itertools import combinations, permutations
 import sys
@@ -16,14 +15,15 @@ try:
     os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'smartsales.settings') 
     django.setup()
     from ventas.models import DetalleVenta
+    from predictions import modelos, registro
     print("Conexión con Django exitosa.")
 except Exception as e:
     print(f"Error fatal conectando con Django: {e}")
     sys.exit(1)
 
-# --- Crear carpeta si no existe ---
-model_dir = 'ml_models'
-os.makedirs(model_dir, exist_ok=True)
+# --- Cada modelo se guarda como una VERSIÓN NUEVA en el registro ---
+# (ml_models/<nombre>/v0001.pkl + metadatos, ver predictions/registro.py):
+# los servidores la toman en caliente, sin reiniciar.
 
 # --- PARTE 1: MODELO DE VENTAS POR CATEGORÍA (Regresión) ---
 print("\n--- INICIANDO MODELO 1: VENTAS POR CATEGORÍA (Mensual) ---")
@@ -66,9 +66,12 @@ try:
         if not X_demand.empty:
             model_1 = RandomForestRegressor(n_estimators=100, random_state=42)
             model_1.fit(X_demand, y_demand) # ¡Entrenamos!
-            model_path = os.path.join(model_dir, 'sales_category_model.pkl') # <-- Nombre Cerebro 1
-            joblib.dump(model_1, model_path)
-            print(f"¡Modelo 1 (Ventas Categoría) guardado en {model_path}!")
+            version = modelos.guardar(
+                'sales_category_model', model_1, # <-- Nombre Cerebro 1
+                filas=len(X_demand), features=features_demand,
+                metricas={'r2_entrenamiento': round(model_1.score(X_demand, y_demand), 4)},
+            )
+            print(f"¡Modelo 1 (Ventas Categoría) guardado como v{version.version} en ml_models/{version.archivo}!")
         else:
             print("¡ADVERTENCIA (M1)! No hay datos finales para entrenar.")
 except Exception as e:
@@ -114,9 +117,12 @@ try:
         if not X_demand_prod.empty:
             model_2 = RandomForestRegressor(n_estimators=100, random_state=42)
             model_2.fit(X_demand_prod, y_demand_prod) # ¡Entrenamos!
-            model_path = os.path.join(model_dir, 'demand_product_model.pkl') # <-- Nombre Cerebro 2
-            joblib.dump(model_2, model_path)
-            print(f"¡Modelo 2 (Demanda Producto) guardado en {model_path}!")
+            version = modelos.guardar(
+                'demand_product_model', model_2, # <-- Nombre Cerebro 2
+                filas=len(X_demand_prod), features=features_demand_prod,
+                metricas={'r2_entrenamiento': round(model_2.score(X_demand_prod, y_demand_prod), 4)},
+            )
+            print(f"¡Modelo 2 (Demanda Producto) guardado como v{version.version} en ml_models/{version.archivo}!")
         else:
             print("¡ADVERTENCIA (M2)! No hay datos finales para entrenar.")
 except Exception as e:
@@ -172,12 +178,48 @@ try:
                 
                 model_3 = RandomForestClassifier(n_estimators=100, random_state=42)
                 model_3.fit(X_reco, y_reco) # ¡Entrenamos!
-                model_path_reco = os.path.join(model_dir, 'recommendation_model.pkl') # <-- Nombre Cerebro 3
-                joblib.dump(model_3, model_path_reco)
-                print(f"¡Modelo 3 (Recomendación) guardado en {model_path_reco}!")
+                version = modelos.guardar(
+                    'recommendation_model', model_3, # <-- Nombre Cerebro 3
+                    filas=len(X_reco), features=features_reco,
+                    metricas={
+                        'accuracy_entrenamiento': round(model_3.score(X_reco, y_reco), 4),
+                        'pares_positivos': int(y_reco.sum()),
+                    },
+                )
+                print(f"¡Modelo 3 (Recomendación) guardado como v{version.version} en ml_models/{version.archivo}!")
             else:
                  print("¡ADVERTENCIA (M3)! No hay datos finales para entrenar.")
 except Exception as e:
     print(f"❌ ERROR al procesar Modelo 3: {e}")
 
+# MOTOR DE CO-OCURRENCIA (recomendador alternativo, scipy.sparse) ---
+# Sin pares negativos ni permutations(): solo los pares que se vendieron juntos
+print("\n--- INICIANDO MODELO 3b: CO-OCURRENCIA ---")
+try:
+    from predictions.coocurrencia import MotorCoocurrencia
+    motor = MotorCoocurrencia.construir_desde_bd()
+    if not len(motor.ids):
+        print("¡ADVERTENCIA (M3b)! No se encontraron datos.")
+    else:
+        print(f"M3b: {motor.n_cestas} ventas, {len(motor.ids)} productos, {len(motor.datos)} pares con co-ocurrencia.")
+        version = modelos.guardar(
+            'coocurrencia_engine', motor,
+            filas=motor.n_cestas, features=['venta_id', 'producto_id'],
+            metricas={'productos': len(motor.ids), 'pares': len(motor.datos)},
+        )
+        print(f"¡Modelo 3b (Co-ocurrencia) guardado como v{version.version} en ml_models/{version.archivo}!")
+except Exception as e:
+    print(f"❌ ERROR al procesar Modelo 3b: {e}")
+
+# TOP-K DE RECOMENDACIONES PRECALCULADO (lo que sirve /api/predict/recommend/)
+print("\n--- PRECALCULANDO RECOMENDACIONES (top-K por producto) ---")
+try:
+    if registro.activa('recommendation_model') is not None:
+        from django.core.management import call_command
+        call_command('precalcular_recomendaciones')
+    else:
+        print("¡ADVERTENCIA! No hay modelo de recomendación: se omite el precálculo.")
+except Exception as e:
+    print(f"❌ ERROR al precalcular recomendaciones: {e}")
+
 print("\n--- ¡Script de entrenamiento COMPLETO! ---")
\ No newline at end of file
@@ -0,0 +1,202 @@
+# utils/gemini.py
+# Cliente compartido de Gemini (lo usan reports/nlp_utils.py y products/nlp_parser.py).
+#
+# - Un solo GenerativeModel configurado por proceso, no genai.configure() por petición.
+# - Timeout por llamada y un tope global de llamadas simultáneas (GEMINI_MAX_CONCURRENCIA).
+# - Circuit breaker: tras GEMINI_FALLOS_PARA_ABRIR fallos seguidos (errores,
+#   timeouts o respuestas más lentas que GEMINI_LENTO_SEGUNDOS) no se llama a la
+#   API durante GEMINI_ABIERTO_SEGUNDOS y las peticiones fallan al instante.
+#   Pasado ese tiempo se deja pasar una llamada de prueba.
+# - generar() para vistas síncronas y agenerar() para vistas async (ASGI).
+#
+# Con GEMINI_API_ENDPOINT se apunta a otro servidor, p. ej. el simulado local:
+#   python manage.py gemini_simulado --puerto 8765
+#   GEMINI_API_ENDPOINT=http://127.0.0.1:8765
+
+import logging
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from decouple import config
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class GeminiError(Exception):
+    """Fallo al consultar Gemini."""
+
+
+class GeminiNoConfigurado(GeminiError):
+    """No hay API key."""
+
+
+class GeminiNoDisponible(GeminiError):
+    """Circuito abierto o sin cupo: se falla sin llamar a la API."""
+
+
+class GeminiTimeout(GeminiError):
+    """La llamada superó su timeout."""
+
+
+def _ajuste(nombre, defecto):
+    return getattr(settings, nombre, defecto)
+
+
+def _es_timeout(error):
+    try:
+        from google.api_core.exceptions import DeadlineExceeded
+        from requests.exceptions import Timeout
+    except ImportError:
+        return False
+    return isinstance(error, (DeadlineExceeded, Timeout))
+
+
+# --- CIRCUIT BREAKER ---
+
+class _Circuito:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.fallos = 0
+        self.abierto_hasta = 0.0  # 0 = cerrado
+        self.probando = False
+
+    def permitir(self):
+        with self._lock:
+            if not self.abierto_hasta:
+                return True
+            if time.monotonic() < self.abierto_hasta or self.probando:
+                return False
+            # Semiabierto: pasa una sola llamada de prueba
+            self.probando = True
+            return True
+
+    def exito(self):
+        with self._lock:
+            self.fallos = 0
+            self.abierto_hasta = 0.0
+            self.probando = False
+
+    def cancelar(self):
+        """La llamada permitida no llegó a hacerse: libera la prueba del semiabierto."""
+        with self._lock:
+            self.probando = False
+
+    def fallo(self, motivo):
+        with self._lock:
+            self.fallos += 1
+            self.probando = False
+            # Un fallo estando abierto/semiabierto vuelve a abrir el circuito
+            if self.abierto_hasta or self.fallos >= _ajuste('GEMINI_FALLOS_PARA_ABRIR', 3):
+                segundos = _ajuste('GEMINI_ABIERTO_SEGUNDOS', 30)
+                self.abierto_hasta = time.monotonic() + segundos
+                logger.warning(
+                    "Gemini: circuito abierto %ss tras %d fallo(s) seguidos (%s)",
+                    segundos, self.fallos, motivo,
+                )
+
+    def estado(self):
+        with self._lock:
+            if not self.abierto_hasta:
+                return 'cerrado'
+            return 'abierto' if time.monotonic() < self.abierto_hasta else 'semiabierto'
+
+
+_circuito = _Circuito()
+
+
+# --- MODELO Y CUPO COMPARTIDOS ---
+
+_modelo = None
+_cupo = None
+_lock = threading.Lock()
+
+
+def _get_modelo():
+    global _modelo
+    with _lock:
+        if _modelo is None:
+            import google.generativeai as genai
+
+            api_key = config('API_GEMINI', default=config('GOOGLE_API_KEY', default=''))
+            if not api_key:
+                raise GeminiNoConfigurado("API Key no configurada")
+
+            endpoint = _ajuste('GEMINI_API_ENDPOINT', '')
+            if endpoint:
+                genai.configure(api_key=api_key, transport='rest', client_options={'api_endpoint': endpoint})
+            else:
+                genai.configure(api_key=api_key)
+            _modelo = genai.GenerativeModel(_ajuste('GEMINI_MODELO', 'gemini-2.5-flash'))
+        return _modelo
+
+
+def _get_cupo():
+    global _cupo
+    with _lock:
+        if _cupo is None:
+            _cupo = threading.BoundedSemaphore(_ajuste('GEMINI_MAX_CONCURRENCIA', 4))
+        return _cupo
+
+
+def reiniciar():
+    """Descarta modelo, cupo y circuito (al cambiar los ajustes, p. ej. en pruebas)."""
+    global _modelo, _cupo, _circuito
+    with _lock:
+        _modelo = None
+        _cupo = None
+        _circuito = _Circuito()
+
+
+def estado():
+    return {'circuito': _circuito.estado(), 'fallos_seguidos': _circuito.fallos}
+
+
+# --- API ---
+
+def generar(prompt, timeout=None):
+    """
+    Devuelve el texto de la respuesta de Gemini. Lanza GeminiNoConfigurado,
+    GeminiNoDisponible, GeminiTimeout o GeminiError.
+    """
+    modelo = _get_modelo()
+    timeout = timeout or _ajuste('GEMINI_TIMEOUT', 30)
+    circuito = _circuito
+
+    if not circuito.permitir():
+        raise GeminiNoDisponible("Servicio de IA no disponible temporalmente, intente más tarde.")
+
+    cupo = _get_cupo()
+    if not cupo.acquire(timeout=_ajuste('GEMINI_ESPERA_CUPO_SEGUNDOS', 2)):
+        # No es culpa de la API: no cuenta como fallo
+        circuito.cancelar()
+        raise GeminiNoDisponible("Demasiadas consultas de IA simultáneas, intente más tarde.")
+
+    inicio = time.monotonic()
+    try:
+        respuesta = modelo.generate_content(
+            prompt, request_options={'timeout': timeout, 'retry': None}
+        )
+        texto = respuesta.text
+    except Exception as e:
+        if _es_timeout(e):
+            circuito.fallo('timeout')
+            raise GeminiTimeout(f"Gemini no respondió en {timeout}s") from e
+        circuito.fallo(type(e).__name__)
+        raise GeminiError(str(e)) from e
+    finally:
+        cupo.release()
+
+    segundos = time.monotonic() - inicio
+    if segundos > _ajuste('GEMINI_LENTO_SEGUNDOS', 15):
+        # La respuesta sirve, pero el upstream está lento: cuenta para el circuito
+        circuito.fallo(f'lento: {segundos:.1f}s')
+    else:
+        circuito.exito()
+    return texto
+
+
+async def agenerar(prompt, timeout=None):
+    """Igual que generar(), para vistas async: la llamada bloqueante va en un hilo aparte."""
+    return await sync_to_async(generar, thread_sensitive=False)(prompt, timeout)
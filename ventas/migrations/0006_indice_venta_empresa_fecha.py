@@ -0,0 +1,21 @@
+# Generated by Django 5.2.5 on 2026-10-18 15:24
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sucursales', '0002_initial'),
+        ('tenants', '0001_initial'),
+        ('ventas', '0005_alter_pago_fecha'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='venta',
+            index=models.Index(fields=['empresa', 'fecha', 'id'], name='venta_empresa_fecha_idx'),
+        ),
+    ]
@@ -83,6 +83,10 @@ class Venta(models.Model):
         db_table = 'venta'
         ordering = ['-fecha']
         unique_together = ('empresa', 'numero_nota')
+        indexes = [
+            # Rangos de fecha por empresa: reportes, rollups y el libro de ventas (keyset)
+            models.Index(fields=['empresa', 'fecha', 'id'], name='venta_empresa_fecha_idx'),
+        ]
 
     def __str__(self):
         return f"Venta #{self.id} - {self.usuario.email} - {self.total} - {self.estado}"
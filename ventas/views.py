@@ -1,6 +1,7 @@
 # ventas/views.py
 import stripe
 from django.conf import settings
+from django.db import transaction
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -61,6 +62,9 @@ class VentaViewSet(SoftDeleteViewSet):
         return Response(serializer.data)
 
     @action(detail=False, methods=["post"], url_path="registrar")
+    # Una transacción: los rollups de la venta y sus detalles se recalculan una
+    # sola vez al confirmarla (reports/signals.py), no en cada create()
+    @transaction.atomic
     def registrar_venta(self, request):
         """
         Permite registrar una nueva venta con sus detalles.